@@ -11,6 +11,9 @@ file that was distributed with this source code.
 """
 import copy
 import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 
 from decimal import Decimal
 
@@ -19,6 +22,7 @@ import zmq
 from ..logging import RequestLogger
 from ..payload import CommandPayload
 from ..payload import ErrorPayload
+from ..payload import field_name
 from ..payload import get_path
 from ..payload import Payload
 from ..payload import TRANSPORT_MERGEABLE_PATHS
@@ -34,6 +38,7 @@ from .file import file_to_payload
 from .file import payload_to_file
 from .param import Param
 from .param import param_to_payload
+from .schema.entity import EntityValidationError
 
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
@@ -157,6 +162,73 @@ def parse_params(params):
     return result
 
 
+def parse_params_fast(params, names):
+    """Parse a list of parameters to plain payload dictionaries.
+
+    It works like `parse_params` but the payload field names are
+    given already resolved, so it can be used in tight loops.
+
+    :param params: List of `Param` instances.
+    :type params: list
+    :param names: Field names for the parameter name, value and type.
+    :type names: tuple
+
+    :raises: TypeError
+
+    :rtype: list
+
+    """
+
+    result = []
+    if not params:
+        return result
+
+    if not isinstance(params, list):
+        raise TypeError('Parameters must be a list')
+
+    name, value, type_ = names
+    for param in params:
+        if not isinstance(param, Param):
+            raise TypeError('Parameter must be an instance of Param class')
+
+        result.append({
+            name: param.get_name(),
+            value: param.get_value(),
+            type_: param.get_type(),
+            })
+
+    return result
+
+
+def check_spec(spec, min_size, max_size):
+    """Check a specification given to a bulk registration method.
+
+    The specification must be a tuple or a list with a number of items
+    between the given sizes. Missing optional items are set to None.
+
+    :param spec: The specification to check.
+    :type spec: tuple
+    :param min_size: Minimum number of items.
+    :type min_size: int
+    :param max_size: Maximum number of items.
+    :type max_size: int
+
+    :raises: TypeError
+
+    :rtype: list
+
+    """
+
+    if not isinstance(spec, (tuple, list)):
+        raise TypeError('Specification must be a tuple or a list')
+
+    size = len(spec)
+    if size < min_size or size > max_size:
+        raise TypeError('Invalid number of items in specification')
+
+    return list(spec) + [None] * (max_size - size)
+
+
 def runtime_call(address, transport, action, callee, **kwargs):
     """Make a Service run-time call.
 
@@ -274,6 +346,9 @@ class Action(Api):
 
             self.__files[name] = file
 
+        # Remote files with prefetched data by name
+        self.__fetched_files = {}
+
         # Get schema for current action
         try:
             self.__schema = self.get_service_schema(service, version)
@@ -294,6 +369,12 @@ class Action(Api):
             rtype = self.__action_schema.get_return_type()
             self.__return_value.set('return', DEFAULT_RETURN_VALUES.get(rtype))
 
+        # Durations of the run-time calls made by the action
+        self.__runtime_calls = kwargs.get('runtime_calls', [])
+
+        # Collection that is built incrementally by `extend_collection`
+        self.__collection = None
+
         # Make a transport clone to be used for runtime calls.
         # This is required to avoid merging back values that are
         # already inside current transport.
@@ -318,6 +399,45 @@ class Action(Api):
 
         return files_list
 
+    def __create_entity_validator(self):
+        # Validators are only created when validation is enabled
+        if not self.__action_schema.get_entity().get('validate'):
+            return
+
+        return self.__action_schema.get_entity_validator()
+
+    def __get_entity_validator(self):
+        if not self.__action_schema:
+            return
+
+        if not self.__action_schema.has_entity_definition():
+            return
+
+        # Validators are compiled once for each schema mappings update
+        key = (
+            'entity-validator',
+            self.get_name(),
+            self.get_version(),
+            self.get_action_name(),
+            )
+        return self._registry.get_cached(key, self.__create_entity_validator)
+
+    def __get_params_validator(self):
+        if not self.__action_schema:
+            return
+
+        # Validators are compiled once for each schema mappings update
+        key = (
+            'params-validator',
+            self.get_name(),
+            self.get_version(),
+            self.get_action_name(),
+            )
+        return self._registry.get_cached(
+            key,
+            self.__action_schema.get_params_validator,
+            )
+
     def is_origin(self):
         """Determines if the current service is the origin of the request.
 
@@ -417,6 +537,27 @@ class Action(Api):
 
         return params
 
+    def validate_params(self):
+        """Validate the action parameters using the action schema.
+
+        All the parameters are validated in a single pass and all the
+        violations are reported together in the raised error.
+
+        :raises: ParamValidationError
+
+        :rtype: Action
+
+        """
+
+        validator = self.__get_params_validator()
+        if validator:
+            validator.validate({
+                name: payload.get('value')
+                for name, payload in self.__params.items()
+                })
+
+        return self
+
     def new_param(self, name, value=None, type=None):
         """Creates a new parameter object.
 
@@ -470,7 +611,9 @@ class Action(Api):
 
         """
 
-        if self.has_file(name):
+        if name in self.__fetched_files:
+            return self.__fetched_files[name]
+        elif self.has_file(name):
             return payload_to_file(self.__files[name])
         else:
             return File(name, path='')
@@ -483,11 +626,63 @@ class Action(Api):
         """
 
         files = []
-        for payload in self.__files.values():
-            files.append(payload_to_file(payload))
+        for name, payload in self.__files.items():
+            if name in self.__fetched_files:
+                files.append(self.__fetched_files[name])
+            else:
+                files.append(payload_to_file(payload))
 
         return files
 
+    def prefetch_files(self, max_workers=4, in_memory=False, directory=None):
+        """Download all the remote files of the action concurrently.
+
+        Files returned by `get_file()` and `get_files()` after the
+        prefetch read their data from the local copy.
+
+        Files that can't be downloaded are logged and skipped, so they
+        are read from the file server when used.
+
+        :param max_workers: Maximum number of concurrent downloads.
+        :type max_workers: int
+        :param in_memory: Optionally keep file data in memory.
+        :type in_memory: bool
+        :param directory: Optional directory for the temporary files.
+        :type directory: str
+
+        :rtype: Action
+
+        """
+
+        files = []
+        for name, payload in self.__files.items():
+            if name in self.__fetched_files:
+                continue
+
+            file = payload_to_file(payload)
+            if file.get_path() and not file.is_local():
+                files.append(file)
+
+        if not files:
+            return self
+
+        def fetch(file):
+            try:
+                file.fetch(in_memory=in_memory, directory=directory)
+            except:
+                self._logger.exception(
+                    'Unable to prefetch file: %s',
+                    file.get_path(),
+                    )
+            else:
+                self.__fetched_files[file.get_name()] = file
+
+        workers = max(1, min(max_workers, len(files)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fetch, files))
+
+        return self
+
     def new_file(self, name, path, mime=None):
         """Create a new file.
 
@@ -504,6 +699,23 @@ class Action(Api):
 
         return File(name, path, mime=mime)
 
+    def new_files(self, files):
+        """Create many new files.
+
+        Each item is a tuple with the file name, the path and an optional
+        mime type.
+
+        :param files: The file specifications.
+        :type files: list
+
+        :raises: TypeError
+
+        :rtype: list
+
+        """
+
+        return File.create_many(files)
+
     def set_download(self, file):
         """Set a file as the download.
 
@@ -584,6 +796,7 @@ class Action(Api):
         :type entity: dict
 
         :raises: TypeError
+        :raises: EntityValidationError
 
         :rtype: Action
 
@@ -592,6 +805,10 @@ class Action(Api):
         if not isinstance(entity, dict):
             raise TypeError('Entity must be an dict')
 
+        validator = self.__get_entity_validator()
+        if validator:
+            validator.validate(entity)
+
         self.__transport.push(
             'data|{}|{}|{}|{}'.format(
                 self.__gateway[1],
@@ -616,6 +833,7 @@ class Action(Api):
         :type collection: list
 
         :raises: TypeError
+        :raises: EntityValidationError
 
         :rtype: Action
 
@@ -628,6 +846,14 @@ class Action(Api):
             if not isinstance(entity, dict):
                 raise TypeError('Entity must be an dict')
 
+        validator = self.__get_entity_validator()
+        if validator:
+            validator.validate_collection(collection)
+
+        self.__push_collection(collection)
+        return self
+
+    def __push_collection(self, collection):
         self.__transport.push(
             'data|{}|{}|{}|{}'.format(
                 self.__gateway[1],
@@ -638,6 +864,68 @@ class Action(Api):
             collection,
             delimiter='|',
             )
+
+    def extend_collection(self, entities):
+        """Adds entities to the collection data.
+
+        The collection is built incrementally, so entities can be added
+        in chunks, for example while reading rows from a database cursor.
+        Entities can be a single entity or an iterable of entities, like a
+        generator, and they are added directly to a single collection in
+        the transport.
+
+        Only the given entities are validated. When an entity is not valid
+        none of the given entities are added to the collection.
+
+        :param entities: An entity or an iterable with entities.
+        :type entities: dict, iterable
+
+        :raises: TypeError
+        :raises: EntityValidationError
+
+        :rtype: Action
+
+        """
+
+        if isinstance(entities, dict):
+            entities = (entities, )
+        elif isinstance(entities, (str, bytes)):
+            raise TypeError('Entities must be a dict or an iterable')
+
+        try:
+            entities = iter(entities)
+        except TypeError:
+            raise TypeError('Entities must be a dict or an iterable')
+
+        # The collection is added to the transport after the first
+        # entities are validated, so invalid entities never add it.
+        collection = self.__collection
+        if collection is None:
+            collection = []
+
+        size = len(collection)
+        append = collection.append
+        for entity in entities:
+            if not isinstance(entity, dict):
+                # Remove the entities added until now
+                del collection[size:]
+                raise TypeError('Entity must be an dict')
+
+            append(entity)
+
+        # Validate only the entities that were added
+        validator = self.__get_entity_validator()
+        if validator:
+            try:
+                validator.validate_collection(collection[size:])
+            except EntityValidationError:
+                del collection[size:]
+                raise
+
+        if self.__collection is None:
+            self.__collection = collection
+            self.__push_collection(collection)
+
         return self
 
     def relate_one(self, primary_key, service, foreign_key):
@@ -778,6 +1066,92 @@ class Action(Api):
             )
         return self
 
+    def __relate_all(self, address, service, relations):
+        if not isinstance(relations, dict):
+            raise TypeError('Relations must be a dict')
+
+        # Foreign keys are a single key, or a list like in `relate_many`
+        relations = [
+            (str(primary_key), foreign_keys)
+            for primary_key, foreign_keys in relations.items()
+            ]
+        for _, foreign_keys in relations:
+            if not isinstance(foreign_keys, (list, str, int)):
+                raise TypeError('Foreign keys must be a list')
+
+        # Get the primary keys for current service once for all relations
+        path = 'relations|{}|{}'.format(
+            self.__gateway[1],
+            nomap(self.get_name()),
+            )
+        primary_keys = self.__transport.get(path, None, delimiter='|')
+        if primary_keys is None:
+            primary_keys = {}
+            self.__transport.set(path, primary_keys, delimiter='|')
+        elif not isinstance(primary_keys, dict):
+            raise TypeError(path)
+
+        # Check the existing relations before any of them is changed
+        for primary_key, _ in relations:
+            foreign_services = primary_keys.get(primary_key)
+            if foreign_services is None:
+                continue
+            elif not isinstance(foreign_services, dict):
+                raise TypeError(primary_key)
+            elif not isinstance(foreign_services.get(address, {}), dict):
+                raise TypeError(address)
+
+        service = str(service)
+        for primary_key, foreign_keys in relations:
+            foreign_services = primary_keys.setdefault(primary_key, {})
+            foreign_services.setdefault(address, {})[service] = foreign_keys
+
+        return self
+
+    def relate_all(self, service, relations):
+        """Creates relations between many entities and a service.
+
+        Relations is a dictionary where the keys are the primary keys
+        and the values the foreign key for a "one-to-one" relation, or
+        a list of foreign keys for a "one-to-many" relation.
+
+        :param service: The foreign service.
+        :type service: str
+        :param relations: The foreign keys by primary key.
+        :type relations: dict
+
+        :raises: TypeError
+
+        :rtype: Action
+
+        """
+
+        return self.__relate_all(self.__gateway[1], service, relations)
+
+    def relate_all_remote(self, address, service, relations):
+        """Creates relations between many entities and a remote service.
+
+        Relations is a dictionary where the keys are the primary keys
+        and the values the foreign key for a "one-to-one" relation, or
+        a list of foreign keys for a "one-to-many" relation.
+
+        This type of relation is done between entities in different realms.
+
+        :param address: Foreign service public address.
+        :type address: str
+        :param service: The foreign service.
+        :type service: str
+        :param relations: The foreign keys by primary key.
+        :type relations: dict
+
+        :raises: TypeError
+
+        :rtype: Action
+
+        """
+
+        return self.__relate_all(address, service, relations)
+
     def set_link(self, link, uri):
         """Sets a link for the given URI.
 
@@ -876,6 +1250,85 @@ class Action(Api):
         self.__transport.push('transactions/complete', payload)
         return self
 
+    def __register_transactions(self, kind, transactions):
+        # Resolve the payload field names and values once for all the
+        # transactions to keep the loop as tight as possible.
+        name, version, action, caller, params = map(field_name, (
+            'name', 'version', 'action', 'caller', 'params',
+            ))
+        param_names = tuple(map(field_name, ('name', 'value', 'type')))
+        service_name = self.get_name()
+        service_version = self.get_version()
+        caller_name = self.get_action_name()
+
+        payloads = []
+        for spec in transactions:
+            action_name, action_params = check_spec(spec, 1, 2)
+            payload = {
+                name: service_name,
+                version: service_version,
+                action: action_name,
+                caller: caller_name,
+                }
+            if action_params:
+                payload[params] = parse_params_fast(action_params, param_names)
+
+            payloads.append(payload)
+
+        self.__transport.extend('transactions/{}'.format(kind), payloads)
+        return self
+
+    def commit_many(self, transactions):
+        """Register many transactions to be called when request succeeds.
+
+        Each transaction is a tuple with the action name and an
+        optional list of Param objects.
+
+        :param transactions: The transactions to register.
+        :type transactions: list
+
+        :raises: TypeError
+
+        :rtype: Action
+
+        """
+
+        return self.__register_transactions('commit', transactions)
+
+    def rollback_many(self, transactions):
+        """Register many transactions to be called when request fails.
+
+        Each transaction is a tuple with the action name and an
+        optional list of Param objects.
+
+        :param transactions: The transactions to register.
+        :type transactions: list
+
+        :raises: TypeError
+
+        :rtype: Action
+
+        """
+
+        return self.__register_transactions('rollback', transactions)
+
+    def complete_many(self, transactions):
+        """Register many transactions to be called when request finishes.
+
+        Each transaction is a tuple with the action name and an
+        optional list of Param objects.
+
+        :param transactions: The transactions to register.
+        :type transactions: list
+
+        :raises: TypeError
+
+        :rtype: Action
+
+        """
+
+        return self.__register_transactions('complete', transactions)
+
     def call(self, service, version, action, **kwargs):
         """Perform a run-time call to a service.
 
@@ -923,13 +1376,17 @@ class Action(Api):
 
                 raise NoFileServerError(self.get_name(), self.get_version())
 
-        transport, result = runtime_call(
-            address,
-            self.__runtime_transport,
-            self.get_action_name(),
-            [service, version, action],
-            **kwargs
-            )
+        start = time.perf_counter()
+        try:
+            transport, result = runtime_call(
+                address,
+                self.__runtime_transport,
+                self.get_action_name(),
+                [service, version, action],
+                **kwargs
+                )
+        finally:
+            self.__runtime_calls.append(time.perf_counter() - start)
 
         # Clear default to succesfully merge dictionaries. Without
         # this merge would be done with a default value that is not
@@ -966,12 +1423,7 @@ class Action(Api):
         # Add files to transport
         if files:
             self.__transport.set(
-                'files|{}|{}|{}|{}'.format(
-                    self.__gateway[1],
-                    nomap(service),
-                    version,
-                    nomap(action),
-                    ),
+                self.__files_path(service, version, action),
                 self.__files_to_payload(files),
                 delimiter='|',
                 )
@@ -992,6 +1444,91 @@ class Action(Api):
             )
         return self
 
+    def __files_path(self, service, version, action):
+        return 'files|{}|{}|{}|{}'.format(
+            self.__gateway[1],
+            nomap(service),
+            version,
+            nomap(action),
+            )
+
+    def __register_calls(self, calls, remote=False):
+        # Resolve the payload field names and values once for all the
+        # calls to keep the loop as tight as possible.
+        gateway, name, version, action, caller, timeout, params = map(
+            field_name,
+            ('gateway', 'name', 'version', 'action', 'caller', 'timeout',
+             'params'),
+            )
+        param_names = tuple(map(field_name, ('name', 'value', 'type')))
+        caller_name = self.get_action_name()
+
+        payloads = []
+        files_by_path = {}
+        for spec in calls:
+            if remote:
+                (address, service_name, service_version, action_name,
+                 call_params, files, call_timeout) = check_spec(spec, 4, 7)
+            else:
+                (service_name, service_version, action_name,
+                 call_params, files) = check_spec(spec, 3, 5)
+
+            payload = {
+                name: service_name,
+                version: service_version,
+                action: action_name,
+                caller: caller_name,
+                }
+            if remote:
+                if address[:3] != 'ktp':
+                    address = 'ktp://{}'.format(address)
+
+                payload[gateway] = address
+                payload[timeout] = call_timeout or 1000
+
+            if call_params:
+                payload[params] = parse_params_fast(call_params, param_names)
+
+            if files:
+                path = self.__files_path(
+                    service_name,
+                    service_version,
+                    action_name,
+                    )
+                files_by_path[path] = self.__files_to_payload(files)
+
+            payloads.append(payload)
+
+        # Files are added after all calls are validated
+        for path, files in files_by_path.items():
+            self.__transport.set(path, files, delimiter='|')
+
+        # Calls are aggregated to transport calls
+        self.__transport.extend(
+            'calls/{}/{}'.format(nomap(self.get_name()), self.get_version()),
+            payloads,
+            )
+        return self
+
+    def defer_call_many(self, calls):
+        """Register many deferred calls to services.
+
+        Each call is a tuple with the service name, version and action
+        name, optionally followed by a list of Param objects and a list
+        of File objects.
+
+        :param calls: The calls to register.
+        :type calls: list
+
+        :raises: TypeError
+        :raises: NoFileServerError
+
+        :rtype: Action
+
+        """
+
+        return self.__register_calls(calls)
+
     def remote_call(self, address, service, version, action, **kwargs):
         """Register a call to a remote service.
 
@@ -1023,12 +1560,7 @@ class Action(Api):
         files = kwargs.get('files')
         if files:
             self.__transport.set(
-                'files|{}|{}|{}|{}'.format(
-                    self.__gateway[1],
-                    nomap(service),
-                    version,
-                    nomap(action),
-                    ),
+                self.__files_path(service, version, action),
                 self.__files_to_payload(files),
                 delimiter='|',
                 )
@@ -1053,6 +1585,26 @@ class Action(Api):
             )
         return self
 
+    def remote_call_many(self, calls):
+        """Register many calls to remote services.
+
+        Each call is a tuple with the public address of a Gateway from
+        another Realm, the service name, version and action name,
+        optionally followed by a list of Param objects, a list of File
+        objects and a call timeout in milliseconds.
+
+        :param calls: The calls to register.
+        :type calls: list
+
+        :raises: TypeError
+        :raises: NoFileServerError
+
+        :rtype: Action
+
+        """
+
+        return self.__register_calls(calls, remote=True)
+
     def error(self, message, code=None, status=None):
         """Adds an error for the current Service.
 
@@ -208,7 +208,8 @@ class Api(object):
 
         """
 
-        if self._logger:
+        # Skip the value conversion when the level is not enabled
+        if self._logger and self._logger.isEnabledFor(level):
             self._logger.log(level, value_to_log_string(value))
 
     def done(self):
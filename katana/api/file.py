@@ -9,12 +9,19 @@ For the full copyright and license information, please view the LICENSE
 file that was distributed with this source code.
 
 """
+import asyncio
+import functools
 import http.client
+import io
 import logging
 import mimetypes
+import mmap
 import os
-import urllib.request
+import tempfile
+import threading
+import weakref
 
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 from ..payload import get_path
@@ -25,6 +32,553 @@ __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
 
 LOG = logging.getLogger(__name__)
 
+# Default size in bytes for the chunks read when streaming files
+CHUNK_SIZE = 65536
+
+
+class PooledResponse(object):
+    """HTTP response for a connection that belongs to a pool.
+
+    The connection is returned to the pool when the response is closed
+    after all its data was read, otherwise the connection is closed.
+
+    """
+
+    def __init__(self, pool, host, connection, response):
+        self.__pool = pool
+        self.__host = host
+        self.__connection = connection
+        self.__response = response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @property
+    def status(self):
+        return self.__response.status
+
+    @property
+    def reason(self):
+        return self.__response.reason
+
+    def read(self, size=None):
+        """Read data from the response body.
+
+        :param size: Optional maximum number of bytes to read.
+        :type size: int
+
+        :rtype: bytes
+
+        """
+
+        return self.__response.read(size)
+
+    def close(self):
+        """Close the response and release the connection."""
+
+        if not self.__connection:
+            return
+
+        connection = self.__connection
+        self.__connection = None
+        # Connections can only be reused when the response was fully read
+        if self.__response.isclosed() and not self.__response.will_close:
+            self.__pool.release(self.__host, connection)
+        else:
+            self.__response.close()
+            connection.close()
+
+
+class ConnectionPool(object):
+    """Keep-alive HTTP connection pool for file server requests.
+
+    Idle connections are kept for each host, and are discarded when
+    the process is forked.
+
+    """
+
+    def __init__(self, size=10, timeout=2):
+        self.__size = size
+        self.__timeout = timeout
+        self.__lock = threading.Lock()
+        self.__pid = os.getpid()
+        self.__idle = {}
+        self.__created = 0
+        self.__reused = 0
+
+    def __check_pid(self):
+        # Connections can't be shared with forked processes
+        pid = os.getpid()
+        if pid != self.__pid:
+            self.__pid = pid
+            self.__idle = {}
+
+    def __acquire(self, host):
+        with self.__lock:
+            self.__check_pid()
+            connections = self.__idle.get(host)
+            if connections:
+                self.__reused += 1
+                return (connections.pop(), True)
+
+            self.__created += 1
+            timeout = self.__timeout
+
+        return (http.client.HTTPConnection(host, timeout=timeout), False)
+
+    @property
+    def timeout(self):
+        return self.__timeout
+
+    def configure(self, size=None, timeout=None):
+        """Change the pool options.
+
+        :param size: Maximum number of idle connections per host.
+        :type size: int
+        :param timeout: Timeout in seconds for new connections.
+        :type timeout: float
+
+        """
+
+        with self.__lock:
+            if size is not None:
+                self.__size = size
+
+            if timeout is not None:
+                self.__timeout = timeout
+
+    def get_stats(self):
+        """Get the connection counters for the pool.
+
+        :rtype: dict
+
+        """
+
+        with self.__lock:
+            self.__check_pid()
+            return {
+                'created': self.__created,
+                'reused': self.__reused,
+                'idle': sum(len(idle) for idle in self.__idle.values()),
+                }
+
+    def clear(self):
+        """Close all the idle connections."""
+
+        with self.__lock:
+            idle = self.__idle
+            self.__idle = {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def release(self, host, connection):
+        """Return a connection to the pool.
+
+        :param host: The host of the connection.
+        :type host: str
+        :param connection: The connection to return.
+        :type connection: `http.client.HTTPConnection`
+
+        """
+
+        with self.__lock:
+            self.__check_pid()
+            connections = self.__idle.setdefault(host, [])
+            if len(connections) < self.__size:
+                connections.append(connection)
+                return
+
+        connection.close()
+
+    def request(self, method, url, headers=None):
+        """Make an HTTP request using a pooled connection.
+
+        The response must be closed to release the connection.
+
+        :param method: The HTTP method.
+        :type method: str
+        :param url: The request URL.
+        :type url: str
+        :param headers: Optional request headers.
+        :type headers: dict
+
+        :rtype: `PooledResponse`
+
+        """
+
+        part = urlparse(url)
+        path = part.path or '/'
+        if part.query:
+            path = '{}?{}'.format(path, part.query)
+
+        while True:
+            connection, reused = self.__acquire(part.netloc)
+            try:
+                connection.request(method, path, headers=headers or {})
+                response = connection.getresponse()
+            except (http.client.BadStatusLine, ConnectionError):
+                connection.close()
+                # Idle connections can be closed by the server at any time,
+                # so the request is retried when the connection was reused.
+                if not reused:
+                    raise
+            except:
+                connection.close()
+                raise
+            else:
+                return PooledResponse(self, part.netloc, connection, response)
+
+
+# Connection pool for all the file server requests of the process
+CONNECTION_POOL = ConnectionPool()
+
+# Maximum number of threads used by async APIs to read local files
+IO_WORKERS = 4
+
+# Thread pool used by async APIs to read local files
+IO_EXECUTOR = None
+
+
+def get_io_executor():
+    """Get the thread pool used to read local files asynchronously.
+
+    :rtype: `ThreadPoolExecutor`
+
+    """
+
+    global IO_EXECUTOR
+
+    if not IO_EXECUTOR:
+        IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS)
+
+    return IO_EXECUTOR
+
+
+class AsyncHttpResponse(object):
+    """HTTP response that reads its body using non blocking sockets.
+
+    Each read fails with a timeout error when the file server sends
+    no data during `timeout` seconds.
+
+    """
+
+    def __init__(self, reader, transport, status, reason, headers, method,
+                 timeout=None):
+        self.__reader = reader
+        self.__transport = transport
+        self.__timeout = timeout
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.__chunked = headers.get('transfer-encoding') == 'chunked'
+        # Remaining bytes for the body or the current chunk
+        if method == 'HEAD' or status in (204, 304):
+            self.__remaining = 0
+        elif self.__chunked or 'content-length' not in headers:
+            self.__remaining = None
+        else:
+            self.__remaining = int(headers['content-length'])
+
+        self.__done = (self.__remaining == 0)
+
+    @asyncio.coroutine
+    def __wait(self, coroutine):
+        return (yield from asyncio.wait_for(coroutine, self.__timeout))
+
+    @asyncio.coroutine
+    def __read_chunk_size(self):
+        line = yield from self.__wait(self.__reader.readline())
+        try:
+            size = int(line.split(b';', 1)[0], 16)
+        except ValueError:
+            raise OSError('Invalid chunk size in file server response')
+
+        if not size:
+            # Skip the trailer section
+            while True:
+                line = yield from self.__wait(self.__reader.readline())
+                if line in (b'\r\n', b''):
+                    break
+
+        return size
+
+    @asyncio.coroutine
+    def __read_some(self, size):
+        if self.__done:
+            return b''
+
+        if self.__chunked and not self.__remaining:
+            if self.__remaining == 0:
+                # Skip the CRLF at the end of the previous chunk
+                yield from self.__wait(self.__reader.readexactly(2))
+
+            self.__remaining = yield from self.__read_chunk_size()
+            if not self.__remaining:
+                self.__done = True
+                return b''
+
+        if self.__remaining is not None:
+            size = min(size, self.__remaining)
+
+        data = yield from self.__wait(self.__reader.read(size))
+        if self.__remaining is None:
+            self.__done = not data
+        elif not data:
+            raise OSError('Incomplete file server response')
+        else:
+            self.__remaining -= len(data)
+            self.__done = not (self.__remaining or self.__chunked)
+
+        return data
+
+    @asyncio.coroutine
+    def read(self, size=-1):
+        """Read data from the response body.
+
+        :param size: Optional maximum number of bytes to read.
+        :type size: int
+
+        :rtype: bytes
+
+        """
+
+        if size is not None and size >= 0:
+            return (yield from self.__read_some(size))
+
+        data = []
+        while True:
+            chunk = yield from self.__read_some(CHUNK_SIZE)
+            if not chunk:
+                return b''.join(data)
+
+            data.append(chunk)
+
+    def close(self):
+        """Close the connection to the file server."""
+
+        self.__done = True
+        self.__transport.close()
+
+
+@asyncio.coroutine
+def request_async(method, url, headers=None, loop=None):
+    """Make an HTTP request using non blocking sockets.
+
+    The response must be closed to close the connection.
+
+    :param method: The HTTP method.
+    :type method: str
+    :param url: The request URL.
+    :type url: str
+    :param headers: Optional request headers.
+    :type headers: dict
+    :param loop: Optional event loop.
+    :type loop: `asyncio.AbstractEventLoop`
+
+    :rtype: `AsyncHttpResponse`
+
+    """
+
+    loop = loop or asyncio.get_event_loop()
+    timeout = CONNECTION_POOL.timeout
+    part = urlparse(url)
+    path = part.path or '/'
+    if part.query:
+        path = '{}?{}'.format(path, part.query)
+
+    reader = asyncio.StreamReader(loop=loop)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+    transport, _ = yield from asyncio.wait_for(
+        loop.create_connection(
+            lambda: protocol,
+            part.hostname,
+            # File servers use plain HTTP like the blocking requests
+            part.port or http.client.HTTP_PORT,
+            ),
+        timeout,
+        )
+
+    try:
+        lines = ['{} {} HTTP/1.1'.format(method, path)]
+        lines.append('Host: {}'.format(part.netloc))
+        lines.append('Connection: close')
+        for name, value in (headers or {}).items():
+            lines.append('{}: {}'.format(name, value))
+
+        transport.write('\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n')
+
+        # Read the status line and the headers
+        line = yield from asyncio.wait_for(reader.readline(), timeout)
+        parts = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise OSError('Invalid file server response: {!r}'.format(line))
+
+        response_headers = {}
+        while True:
+            line = yield from asyncio.wait_for(reader.readline(), timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+    except:
+        transport.close()
+        raise
+
+    return AsyncHttpResponse(
+        reader,
+        transport,
+        int(parts[1]),
+        parts[2] if len(parts) > 2 else '',
+        response_headers,
+        method,
+        timeout,
+        )
+
+
+class AsyncLocalFile(object):
+    """Local file that is read using a thread pool."""
+
+    def __init__(self, file, loop):
+        self.__file = file
+        self.__loop = loop
+
+    @asyncio.coroutine
+    def read(self, size=-1):
+        return (yield from self.__loop.run_in_executor(
+            get_io_executor(),
+            self.__file.read,
+            size,
+            ))
+
+    def close(self):
+        self.__file.close()
+
+
+class AsyncChunkIterator(object):
+    """Asynchronous iterator for the data of a file.
+
+    Chunks can be read with `next_chunk()`, which returns an empty
+    value when there is no more data, or using "async for" when
+    supported by the Python version.
+
+    """
+
+    def __init__(self, opener, size):
+        self.__opener = opener
+        self.__size = size
+        self.__file = None
+        self.__done = False
+
+    def __aiter__(self):
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self):
+        chunk = yield from self.next_chunk()
+        if not chunk:
+            raise StopAsyncIteration
+
+        return chunk
+
+    @asyncio.coroutine
+    def next_chunk(self):
+        """Read the next chunk of data.
+
+        :raises: OSError
+
+        :returns: The chunk data, or empty when there is no more data.
+        :rtype: bytes
+
+        """
+
+        if self.__done:
+            return b''
+
+        try:
+            if not self.__file:
+                self.__file = yield from self.__opener()
+
+            chunk = yield from self.__file.read(self.__size)
+        except:
+            self.close()
+            raise
+
+        if not chunk:
+            self.close()
+
+        return chunk
+
+    def close(self):
+        """Close the file."""
+
+        self.__done = True
+        if self.__file:
+            self.__file.close()
+            self.__file = None
+
+
+# Maximum number of file extensions with a cached mime type
+MIME_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=MIME_CACHE_SIZE)
+def guess_extension_mime(extension):
+    """Guess the mime type for a file extension.
+
+    :param extension: The file extension, including the dot.
+    :type extension: str
+
+    :rtype: str
+
+    """
+
+    return mimetypes.guess_type('file' + extension)[0] or 'text/plain'
+
+
+def guess_mime(path):
+    """Guess the mime type of a file path.
+
+    Mime types only depend on the last file extension, so they are
+    cached by extension instead of by path. For compressed files, like
+    "a.tar.gz", the extension before the compression one is also used.
+
+    :param path: The file path.
+    :type path: str
+
+    :rtype: str
+
+    """
+
+    root, extension = os.path.splitext(os.path.basename(path))
+    if not extension:
+        return 'text/plain'
+
+    if extension.lower() in mimetypes.encodings_map:
+        extension = os.path.splitext(root)[1] + extension
+
+    return guess_extension_mime(extension)
+
+
+def remove_file(path):
+    """Remove a file from the file system ignoring errors.
+
+    :param path: The file path.
+    :type path: str
+
+    """
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 
 def file_to_payload(file):
     """Convert a File object to a payload.
@@ -93,7 +647,7 @@ class File(object):
         # Set mime type, or guess it from path
         self.__mime = kwargs.get('mime')
         if not self.__mime:
-            self.__mime = mimetypes.guess_type(path)[0] or 'text/plain'
+            self.__mime = guess_mime(path)
 
         # Set file name, or get it from path
         self.__filename = kwargs.get('filename') or os.path.basename(path)
@@ -115,6 +669,10 @@ class File(object):
         if protocol == 'http://' and not self.__token:
             raise TypeError('Token is required for remote file paths')
 
+        # Local copy of the data for prefetched remote files
+        self.__data = None
+        self.__local_path = None
+
     def get_name(self):
         """Get parameter name.
 
@@ -181,20 +739,20 @@ class File(object):
 
         if not self.__path:
             return False
+        elif self.is_fetched():
+            return True
 
         # Check remote file existence when path is HTTP (otherwise is file://)
         if self.__path[:7] == 'http://':
-            # Setup headers for request
-            headers = {}
-            if self.__token:
-                headers['X-Token'] = self.__token
-
             # Make a HEAD request to check that file exists
-            part = urlparse(self.__path)
             try:
-                conn = http.client.HTTPConnection(part.netloc, timeout=2)
-                conn.request('HEAD', part.path, headers=headers)
-                response = conn.getresponse()
+                with CONNECTION_POOL.request(
+                        'HEAD',
+                        self.__path,
+                        headers=self.__get_headers(),
+                        ) as response:
+                    response.read()
+
                 exists = response.status == 200
                 if not exists:
                     LOG.error(
@@ -211,6 +769,56 @@ class File(object):
             # Check file existence locally
             return os.path.isfile(self.__path[7:])
 
+    @asyncio.coroutine
+    def exists_async(self, loop=None):
+        """Check if file exists without blocking the event loop.
+
+        See: `File.exists`.
+
+        :param loop: Optional event loop.
+        :type loop: `asyncio.AbstractEventLoop`
+
+        :rtype: bool.
+
+        """
+
+        if not self.__path:
+            return False
+        elif self.is_fetched():
+            return True
+
+        loop = loop or asyncio.get_event_loop()
+        if self.__path[:7] != 'http://':
+            return (yield from loop.run_in_executor(
+                get_io_executor(),
+                os.path.isfile,
+                self.__path[7:],
+                ))
+
+        try:
+            response = yield from request_async(
+                'HEAD',
+                self.__path,
+                headers=self.__get_headers(),
+                loop=loop,
+                )
+        except asyncio.CancelledError:
+            raise
+        except:
+            LOG.exception('File server request failed: %s', self.__path)
+            return False
+
+        response.close()
+        exists = response.status == 200
+        if not exists:
+            LOG.error(
+                'File server request failed for %s, with error %s %s',
+                self.__path,
+                response.status,
+                response.reason,
+                )
+        return exists
+
     def is_local(self):
         """Check if file is a local file.
 
@@ -220,6 +828,148 @@ class File(object):
 
         return self.__path[:7] == 'file://'
 
+    def __get_headers(self):
+        headers = {}
+        if self.__token:
+            headers['X-Token'] = self.__token
+
+        return headers
+
+    def open(self, use_mmap=False):
+        """Open the file for reading.
+
+        Returns a binary file like object that supports the context
+        manager protocol. Remote files are read from the file server
+        while the file data is consumed, using a pooled keep-alive
+        connection.
+
+        Local files can optionally be memory mapped.
+
+        :param use_mmap: Optionally memory map local files.
+        :type use_mmap: bool
+
+        :raises: OSError
+
+        :returns: A file like object.
+        :rtype: object
+
+        """
+
+        if self.__data is not None:
+            return io.BytesIO(self.__data)
+        elif self.__local_path:
+            path = self.__local_path
+        elif self.__path[:7] == 'http://':
+            response = CONNECTION_POOL.request(
+                'GET',
+                self.__path,
+                headers=self.__get_headers(),
+                )
+            if response.status != 200:
+                with response:
+                    response.read()
+
+                msg = 'File server request failed for {}: {} {}'
+                raise OSError(msg.format(
+                    self.__path,
+                    response.status,
+                    response.reason,
+                    ))
+
+            return response
+        else:
+            path = self.__path[7:]
+
+        file = open(path, 'rb')
+        if not use_mmap:
+            return file
+
+        with file:
+            # Empty files can't be memory mapped
+            if not os.fstat(file.fileno()).st_size:
+                return open(path, 'rb')
+
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def is_fetched(self):
+        """Check if the data of a remote file was fetched.
+
+        :rtype: bool
+
+        """
+
+        return self.__data is not None or self.__local_path is not None
+
+    def fetch(self, in_memory=False, directory=None):
+        """Fetch the data of a remote file.
+
+        The data is downloaded to a temporary file, or optionally to
+        memory, and all the following reads use the local copy.
+        Temporary files are removed when the File is garbage collected.
+
+        Local files are not fetched.
+
+        :param in_memory: Optionally keep the data in memory.
+        :type in_memory: bool
+        :param directory: Optional directory for the temporary file.
+        :type directory: str
+
+        :raises: OSError
+
+        :rtype: `File`
+
+        """
+
+        if self.__path[:7] != 'http://' or self.is_fetched():
+            return self
+
+        if in_memory:
+            with self.open() as file:
+                self.__data = file.read()
+
+            return self
+
+        fd, path = tempfile.mkstemp(prefix='katana-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in self.iter_chunks():
+                    output.write(chunk)
+        except:
+            remove_file(path)
+            raise
+
+        self.__local_path = path
+        weakref.finalize(self, remove_file, path)
+        return self
+
+    def iter_chunks(self, size=CHUNK_SIZE, use_mmap=False):
+        """Iterate the file data in chunks.
+
+        The file data is streamed, so only one chunk is kept in memory.
+
+        :param size: The maximum size in bytes for each chunk.
+        :type size: int
+        :param use_mmap: Optionally memory map local files.
+        :type use_mmap: bool
+
+        :raises: OSError
+
+        :returns: An iterator of bytes.
+        :rtype: iterator
+
+        """
+
+        if size <= 0:
+            raise ValueError('Invalid chunk size: {}'.format(size))
+
+        with self.open(use_mmap=use_mmap) as file:
+            while True:
+                chunk = file.read(size)
+                if not chunk:
+                    break
+
+                yield chunk
+
     def read(self):
         """Get file data.
 
@@ -230,18 +980,14 @@ class File(object):
 
         """
 
+        if self.__data is not None:
+            return self.__data
+
         # Check if file is a remote file
         if self.__path[:7] == 'http://':
-            # Setup headers for request
-            headers = {}
-            if self.__token:
-                headers['X-Token'] = self.__token
-
-            request = urllib.request.Request(self.__path, headers=headers)
-
             # Read file contents from remote file server
             try:
-                with urllib.request.urlopen(request) as file:
+                with self.open() as file:
                     return file.read()
             except:
                 LOG.exception('Unable to read file: %s', self.__path)
@@ -252,25 +998,139 @@ class File(object):
             else:
                 # Read local file contents
                 try:
-                    with open(self.__path[7:], 'rb') as file:
+                    with self.open() as file:
                         return file.read()
                 except:
                     LOG.exception('Unable to read file: %s', self.__path)
 
         return b''
 
-    def copy_with_name(self, name):
+    @asyncio.coroutine
+    def __open_async(self, loop):
+        if self.__path[:7] == 'http://' and not self.is_fetched():
+            response = yield from request_async(
+                'GET',
+                self.__path,
+                headers=self.__get_headers(),
+                loop=loop,
+                )
+            if response.status != 200:
+                response.close()
+                msg = 'File server request failed for {}: {} {}'
+                raise OSError(msg.format(
+                    self.__path,
+                    response.status,
+                    response.reason,
+                    ))
+
+            return response
+
+        file = yield from loop.run_in_executor(get_io_executor(), self.open)
+        return AsyncLocalFile(file, loop)
+
+    def iter_chunks_async(self, size=CHUNK_SIZE, loop=None):
+        """Iterate the file data in chunks without blocking the event loop.
+
+        Remote files are read using non blocking sockets, and local files
+        are read using a bounded thread pool.
+
+        :param size: The maximum size in bytes for each chunk.
+        :type size: int
+        :param loop: Optional event loop.
+        :type loop: `asyncio.AbstractEventLoop`
+
+        :rtype: `AsyncChunkIterator`
+
+        """
+
+        if size <= 0:
+            raise ValueError('Invalid chunk size: {}'.format(size))
+
+        loop = loop or asyncio.get_event_loop()
+        return AsyncChunkIterator(lambda: self.__open_async(loop), size)
+
+    @asyncio.coroutine
+    def read_async(self, loop=None):
+        """Get file data without blocking the event loop.
+
+        See: `File.read`.
+
+        :param loop: Optional event loop.
+        :type loop: `asyncio.AbstractEventLoop`
+
+        :returns: The file data.
+        :rtype: bytes
+
+        """
+
+        loop = loop or asyncio.get_event_loop()
+        try:
+            file = yield from self.__open_async(loop)
+            try:
+                return (yield from file.read())
+            finally:
+                file.close()
+        except asyncio.CancelledError:
+            raise
+        except:
+            LOG.exception('Unable to read file: %s', self.__path)
+
+        return b''
+
+    @classmethod
+    def create_many(cls, files):
+        """Create many local files.
+
+        Each item is a tuple with the file name, the path and an optional
+        mime type. Each distinct path is checked only once.
+
+        :param files: The file specifications.
+        :type files: list
+
+        :raises: TypeError
+
+        :rtype: list
+
+        """
+
+        sizes = {}
+        result = []
+        for spec in files:
+            if not isinstance(spec, (tuple, list)) or len(spec) not in (2, 3):
+                raise TypeError('Invalid file specification')
+
+            name, path = spec[:2]
+            path = (path or '').strip()
+            if path[:7] == 'file://':
+                path = path[7:]
+
+            if path not in sizes:
+                try:
+                    sizes[path] = os.stat(path).st_size if path else 0
+                except OSError:
+                    sizes[path] = 0
+
+            result.append(cls(
+                name,
+                path,
+                mime=spec[2] if len(spec) == 3 else None,
+                size=sizes[path],
+                ))
+
+        return result
+
+    def __copy(self, name, mime):
         return self.__class__(
             name,
             self.__path,
             size=self.__size,
-            mime=self.__mime,
+            mime=mime,
+            filename=self.__filename,
+            token=self.__token,
             )
 
+    def copy_with_name(self, name):
+        return self.__copy(name, self.__mime)
+
     def copy_with_mime(self, mime):
-        return self.__class__(
-            self.__name,
-            self.__path,
-            size=self.__size,
-            mime=mime,
-            )
+        return self.__copy(self.__name, mime)
@@ -0,0 +1,298 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+import threading
+import time
+
+from collections import OrderedDict
+
+from ... import urn
+from ...payload import Payload
+from ...payload import ResponsePayload
+from ...serialization import pack
+from ...serialization import unpack
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+# HTTP methods with cacheable responses
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def parse_cache_control(value):
+    """Parse the value of a Cache-Control header.
+
+    Directive names are returned in lower case. Directives without
+    a value are set to None.
+
+    :param value: The header value.
+    :type value: str
+
+    :rtype: dict
+
+    """
+
+    directives = {}
+    for directive in value.split(','):
+        name, _, argument = directive.strip().partition('=')
+        if not name:
+            continue
+
+        directives[name.lower()] = argument.strip('"') if argument else None
+
+    return directives
+
+
+def get_max_age(directives, default):
+    """Get the number of seconds a response can be cached.
+
+    :param directives: The Cache-Control directives of the response.
+    :type directives: dict
+    :param default: The value to use when no max age is given.
+    :type default: float
+
+    :rtype: float
+
+    """
+
+    for name in ('s-maxage', 'max-age'):
+        if directives.get(name):
+            try:
+                return max(int(directives[name]), 0)
+            except ValueError:
+                return 0
+
+    return default
+
+
+class ResponseCache(object):
+    """In process cache for the HTTP responses of a middleware.
+
+    The cache is used from the request and response callbacks of a
+    middleware. Request callbacks return the cached response when there
+    is one, and response callbacks store the responses to cache:
+
+        cache = ResponseCache(ttl=30, vary=['Accept'])
+
+        def request_handler(request):
+            return cache.get_response(request) or request
+
+        def response_handler(response):
+            cache.store(response)
+            return response
+
+    Responses are cached by HTTP method, URL and the values of the
+    headers in `vary`. Only GET and HEAD requests are cached, and the
+    Cache-Control headers from the request and the response are
+    respected.
+
+    Serialized response payloads are stored in an LRU cache that is
+    limited by the number of entries and by the size in bytes.
+
+    """
+
+    def __init__(self, ttl=60, max_entries=1024, max_size=64 * 1024 * 1024,
+                 vary=None, statuses=(200, )):
+        """Constructor.
+
+        :param ttl: Default seconds to cache a response.
+        :type ttl: float
+        :param max_entries: Maximum number of cached responses.
+        :type max_entries: int
+        :param max_size: Maximum size in bytes for all cached responses.
+        :type max_size: int
+        :param vary: Optional names of the headers used in the cache key.
+        :type vary: list
+        :param statuses: Status codes of the responses to cache.
+        :type statuses: tuple
+
+        """
+
+        self.__ttl = ttl
+        self.__max_entries = max_entries
+        self.__max_size = max_size
+        self.__vary = tuple(vary or ())
+        self.__statuses = statuses
+        self.__lock = threading.Lock()
+        # Cached entries as (expiration time, creation time, data) tuples
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    def __get_key(self, http_request):
+        return (
+            http_request.get_method(),
+            http_request.get_url(),
+            tuple(http_request.get_header(name) for name in self.__vary),
+            )
+
+    def __remove(self, key):
+        entry = self.__entries.pop(key)
+        self.__size -= len(entry[2])
+
+    def get_stats(self):
+        """Get the cache metrics.
+
+        The size is the number of bytes used by the serialized responses.
+
+        :rtype: dict
+
+        """
+
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hit_ratio': (self.__hits / lookups) if lookups else 0.0,
+                'entries': len(self.__entries),
+                'size': self.__size,
+                }
+
+    def clear(self):
+        """Remove all the cached responses."""
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def get_response(self, request):
+        """Get the cached response for a request.
+
+        :param request: The request from a middleware request callback.
+        :type request: `Request`
+
+        :returns: A response, or None when it is not cached.
+        :rtype: `Response`
+
+        """
+
+        if request.get_gateway_protocol() != urn.HTTP:
+            return
+
+        http_request = request.get_http_request()
+        if not http_request:
+            return
+
+        if http_request.get_method() not in CACHEABLE_METHODS:
+            return
+
+        directives = parse_cache_control(
+            http_request.get_header('Cache-Control'),
+            )
+        if 'no-cache' in directives or 'no-store' in directives:
+            return
+
+        key = self.__get_key(http_request)
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[0] <= now:
+                self.__remove(key)
+                entry = None
+
+            if not entry:
+                self.__misses += 1
+                return
+
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+
+        payload = Payload(unpack(entry[2]))
+        code, text = payload.get('response/status').split(' ', 1)
+        response = request.new_response(int(code), text)
+        http_response = response.get_http_response()
+        http_response.set_protocol_version(payload.get('response/version'))
+        http_response.set_body(payload.get('response/body'))
+        for name, values in payload.get('response/headers', {}).items():
+            for value in values:
+                http_response.set_header(name, value)
+
+        http_response.set_header('Age', str(int(now - entry[1])))
+        return response
+
+    def store(self, response):
+        """Store the HTTP response of a middleware response callback.
+
+        Responses that can't be cached are ignored, and so are the
+        responses served from a cache, which have an Age header.
+
+        :param response: The response from a middleware response callback.
+        :type response: `Response`
+
+        :returns: True when the response is cached, otherwise False.
+        :rtype: bool
+
+        """
+
+        if response.get_gateway_protocol() != urn.HTTP:
+            return False
+
+        http_request = response.get_http_request()
+        http_response = response.get_http_response()
+        if not http_request or not http_response:
+            return False
+
+        if http_request.get_method() not in CACHEABLE_METHODS:
+            return False
+        elif http_response.get_status_code() not in self.__statuses:
+            return False
+        elif http_response.has_header('Set-Cookie'):
+            return False
+        elif http_response.has_header('Age'):
+            # Responses that come from a cache, like the ones returned by
+            # `get_response()`, are not stored again so the entries expire.
+            return False
+
+        request_directives = parse_cache_control(
+            http_request.get_header('Cache-Control'),
+            )
+        directives = parse_cache_control(
+            http_response.get_header('Cache-Control'),
+            )
+        if 'no-store' in request_directives or 'no-store' in directives:
+            return False
+        elif 'private' in directives or 'no-cache' in directives:
+            return False
+        elif http_request.has_header('Authorization'):
+            # Shared caches can only cache authorized requests when allowed
+            if 'public' not in directives and 's-maxage' not in directives:
+                return False
+
+        ttl = get_max_age(directives, self.__ttl)
+        if ttl <= 0:
+            return False
+
+        data = pack(ResponsePayload.new(
+            version=http_response.get_protocol_version(),
+            status=http_response.get_status(),
+            body=http_response.get_body(),
+            headers=http_response.get_headers_array().to_dict(),
+            ).entity())
+        size = len(data)
+        if size > self.__max_size:
+            return False
+
+        key = self.__get_key(http_request)
+        now = time.monotonic()
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+
+            self.__entries[key] = (now + ttl, now, data)
+            self.__size += size
+            # Remove the least recently used entries to fit the limits
+            while (len(self.__entries) > self.__max_entries
+                    or self.__size > self.__max_size):
+                self.__remove(next(iter(self.__entries)))
+
+        return True
@@ -0,0 +1,266 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+import hashlib
+import threading
+import zlib
+
+from collections import OrderedDict
+
+from .cache import parse_cache_control
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+# Window bits used by zlib for each content encoding
+ENCODING_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+    }
+
+# HTTP status codes for responses without body
+NO_BODY_STATUSES = (204, 304)
+
+
+def parse_accept_encoding(value):
+    """Parse the value of an Accept-Encoding header.
+
+    :param value: The header value.
+    :type value: str
+
+    :returns: The quality value for each encoding name.
+    :rtype: dict
+
+    """
+
+    encodings = {}
+    for item in value.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params[:2] == 'q=':
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+
+        encodings[name] = quality
+
+    return encodings
+
+
+def negotiate_encoding(value, encodings=('gzip', 'deflate')):
+    """Choose a content encoding for an Accept-Encoding header value.
+
+    :param value: The header value.
+    :type value: str
+    :param encodings: The supported encodings by order of preference.
+    :type encodings: tuple
+
+    :returns: The encoding name, or None when none is accepted.
+    :rtype: str
+
+    """
+
+    accepted = parse_accept_encoding(value)
+    default = accepted.get('*', 0.0)
+    best = None
+    best_quality = 0.0
+    for name in encodings:
+        quality = accepted.get(name, default)
+        if quality > best_quality:
+            best = name
+            best_quality = quality
+
+    return best
+
+
+def compress(data, encoding, level=6):
+    """Compress data with a content encoding.
+
+    :param data: The data to compress.
+    :type data: bytes
+    :param encoding: A content encoding name.
+    :type encoding: str
+    :param level: Compression level.
+    :type level: int
+
+    :rtype: bytes
+
+    """
+
+    wbits = ENCODING_WBITS[encoding]
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+class ResponseCompressor(object):
+    """Compressor for the HTTP response body in middleware responses.
+
+    The encoding is negotiated using the Accept-Encoding header from the
+    HTTP request, and only bodies bigger than a minimum size are
+    compressed.
+
+    Compressed bodies are cached by digest, so identical bodies are
+    compressed only once:
+
+        compressor = ResponseCompressor(min_size=1024)
+
+        def response_handler(response):
+            compressor.compress(response)
+            return response
+
+    """
+
+    def __init__(self, min_size=1024, level=6, encodings=('gzip', 'deflate'),
+                 cache_entries=256, cache_size=16 * 1024 * 1024):
+        """Constructor.
+
+        :param min_size: Minimum size in bytes of the bodies to compress.
+        :type min_size: int
+        :param level: Compression level.
+        :type level: int
+        :param encodings: The supported encodings by order of preference.
+        :type encodings: tuple
+        :param cache_entries: Maximum number of cached compressed bodies.
+        :type cache_entries: int
+        :param cache_size: Maximum size in bytes for all cached bodies.
+        :type cache_size: int
+
+        """
+
+        for encoding in encodings:
+            if encoding not in ENCODING_WBITS:
+                raise ValueError('Unsupported encoding: {}'.format(encoding))
+
+        self.__min_size = min_size
+        self.__level = level
+        self.__encodings = encodings
+        self.__cache_entries = cache_entries
+        self.__cache_size = cache_size
+        self.__lock = threading.Lock()
+        self.__cache = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    def get_stats(self):
+        """Get the metrics for the compressed bodies cache.
+
+        :rtype: dict
+
+        """
+
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'entries': len(self.__cache),
+                'size': self.__size,
+                }
+
+    def compress_body(self, body, encoding):
+        """Compress a body using the cache of compressed bodies.
+
+        :param body: The body to compress.
+        :type body: bytes
+        :param encoding: A content encoding name.
+        :type encoding: str
+
+        :rtype: bytes
+
+        """
+
+        key = (encoding, hashlib.sha1(body).digest())
+        with self.__lock:
+            data = self.__cache.get(key)
+            if data is not None:
+                self.__hits += 1
+                self.__cache.move_to_end(key)
+                return data
+
+            self.__misses += 1
+
+        data = compress(body, encoding, self.__level)
+        size = len(data)
+        if size > self.__cache_size:
+            return data
+
+        with self.__lock:
+            if key not in self.__cache:
+                self.__cache[key] = data
+                self.__size += size
+                while (len(self.__cache) > self.__cache_entries
+                        or self.__size > self.__cache_size):
+                    _, removed = self.__cache.popitem(last=False)
+                    self.__size -= len(removed)
+
+        return data
+
+    def compress(self, response):
+        """Compress the HTTP response body of a middleware response.
+
+        The body is only compressed when the client accepts one of the
+        supported encodings and the response is not already encoded.
+
+        :param response: The response from a middleware response callback.
+        :type response: `Response`
+
+        :returns: The encoding used, or None when body is not compressed.
+        :rtype: str
+
+        """
+
+        http_request = response.get_http_request()
+        http_response = response.get_http_response()
+        if not http_request or not http_response:
+            return
+
+        if http_response.get_status_code() in NO_BODY_STATUSES:
+            return
+        elif http_response.has_header('Content-Encoding'):
+            return
+
+        cache_control = http_response.get_header('Cache-Control')
+        if 'no-transform' in parse_cache_control(cache_control):
+            return
+
+        body = http_response.get_body()
+        if isinstance(body, str):
+            body = body.encode('utf8')
+
+        if len(body) < self.__min_size:
+            return
+
+        encoding = negotiate_encoding(
+            ','.join(http_request.get_header_array('Accept-Encoding')),
+            self.__encodings,
+            )
+        if not encoding:
+            return
+
+        body = self.compress_body(body, encoding)
+        http_response.set_body(body)
+        http_response.set_header('Content-Encoding', encoding)
+        http_response.set_header('Vary', 'Accept-Encoding')
+
+        # Update the content length when the header is present
+        headers = http_response.get_headers_array()
+        name = headers.get_name('Content-Length')
+        if name:
+            del headers[name]
+            http_response.set_header(name, str(len(body)))
+
+        return encoding
@@ -0,0 +1,160 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+from ...utils import MultiDict
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+
+class HttpHeaders(MultiDict):
+    """Case insensitive container for HTTP headers.
+
+    Header names keep the casing used the first time a header is added,
+    and an index of upper case names is kept to find headers by name
+    without iterating all of them.
+
+    Values can be added with `append()` or by setting an item, which
+    appends the value to the list of values for the header.
+
+    """
+
+    def __init__(self, mappings=None):
+        # Header names with their original casing by upper case name
+        self.__index = {}
+        super().__init__(mappings)
+
+    def __setitem__(self, key, value):
+        self.append(key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        del self.__index[key.upper()]
+
+    def _set_mappings(self, mappings):
+        if isinstance(mappings, dict):
+            # Headers from payloads have unique names and list values,
+            # so in that case the index is built in a single pass.
+            index = {name.upper(): name for name in mappings}
+            if len(index) == len(mappings) and all(
+                    value.__class__ is list for value in mappings.values()):
+                self.__index = index
+                dict.update(self, mappings)
+                return
+
+            mappings = mappings.items()
+
+        index = self.__index
+        for name, value in mappings:
+            if not isinstance(value, list):
+                self.append(name, value)
+                continue
+
+            upper = name.upper()
+            if upper in index:
+                dict.__getitem__(self, index[upper]).extend(value)
+            else:
+                # Use the list of values as is to avoid copying it
+                index[upper] = name
+                dict.__setitem__(self, name, value)
+
+    def append(self, name, value):
+        """Add a value to a header.
+
+        :param name: The header name.
+        :type name: str
+        :param value: The header value.
+        :type value: str
+
+        """
+
+        upper = name.upper()
+        if upper in self.__index:
+            dict.__getitem__(self, self.__index[upper]).append(value)
+        else:
+            self.__index[upper] = name
+            dict.__setitem__(self, name, [value])
+
+    def has(self, name):
+        """Check if a header exists.
+
+        Header name is case insensitive.
+
+        :param name: The header name.
+        :type name: str
+
+        :rtype: bool
+
+        """
+
+        return name.upper() in self.__index
+
+    def get_name(self, name):
+        """Get the original casing of a header name.
+
+        :param name: The header name.
+        :type name: str
+
+        :returns: The header name, or None when the header doesn't exist.
+        :rtype: str
+
+        """
+
+        return self.__index.get(name.upper())
+
+    def getall(self, name, default=None):
+        """Get all the values for a header.
+
+        Header name is case insensitive.
+
+        :param name: The header name.
+        :type name: str
+        :param default: The optional default value.
+        :type default: list
+
+        :rtype: list
+
+        """
+
+        original = self.__index.get(name.upper())
+        if original is None:
+            return default
+
+        return dict.__getitem__(self, original)
+
+    def getone(self, name, default=None):
+        """Get the first value for a header.
+
+        Header name is case insensitive.
+
+        :param name: The header name.
+        :type name: str
+        :param default: The optional default value.
+        :type default: str
+
+        :rtype: str
+
+        """
+
+        values = self.getall(name)
+        if not values:
+            return default
+
+        return values[0]
+
+    def to_dict(self):
+        """Get the headers as a dictionary of lists.
+
+        :rtype: dict
+
+        """
+
+        return dict(self)
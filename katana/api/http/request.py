@@ -14,6 +14,7 @@ from urllib.parse import urlparse
 
 from ..file import File
 from ...utils import MultiDict
+from .headers import HttpHeaders
 
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
@@ -27,18 +28,51 @@ class HttpRequest(object):
         self.__method = method.upper()
         self.__url = url
         self.__protocol_version = kwargs.get('protocol_version') or '1.1'
-        self.__query = kwargs.get('query') or MultiDict()
-        self.__post_data = kwargs.get('post_data') or MultiDict()
         self.__body = kwargs.get('body') or ''
-        self.__files = kwargs.get('files') or MultiDict()
-        # Save headers names in upper case
-        self.__headers = MultiDict({
-            name.upper(): value
-            for name, value in (kwargs.get('headers') or {}).items()
-            })
+        # Query, post data, files and headers can be given as plain
+        # dictionaries, and are only converted when they are used.
+        self.__query = kwargs.get('query')
+        self.__post_data = kwargs.get('post_data')
+        self.__files = kwargs.get('files')
+        self.__raw_headers = kwargs.get('headers')
+        self.__headers = None
+        # URL is parsed when a part of it is used
+        self.__parsed_url = None
+
+    def __get_parsed_url(self):
+        if self.__parsed_url is None:
+            self.__parsed_url = urlparse(self.__url)
+
+        return self.__parsed_url
+
+    def __get_query(self):
+        if not isinstance(self.__query, MultiDict):
+            self.__query = MultiDict(self.__query)
 
-        # Save parsed URL
-        self.__parsed_url = urlparse(self.get_url())
+        return self.__query
+
+    def __get_post_data(self):
+        if not isinstance(self.__post_data, MultiDict):
+            self.__post_data = MultiDict(self.__post_data)
+
+        return self.__post_data
+
+    def __get_files(self):
+        if not isinstance(self.__files, MultiDict):
+            self.__files = MultiDict(self.__files)
+
+        return self.__files
+
+    def __get_headers(self):
+        if self.__headers is None:
+            if isinstance(self.__raw_headers, HttpHeaders):
+                self.__headers = self.__raw_headers
+            else:
+                self.__headers = HttpHeaders(self.__raw_headers)
+
+            self.__raw_headers = None
+
+        return self.__headers
 
     def is_method(self, method):
         """Determine if the request used the given HTTP method.
@@ -83,7 +117,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__parsed_url.scheme
+        return self.__get_parsed_url().scheme
 
     def get_url_host(self):
         """Get request URL host.
@@ -94,7 +128,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__parsed_url.netloc
+        return self.__get_parsed_url().netloc
 
     def get_url_path(self):
         """Get request URL path.
@@ -103,7 +137,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__parsed_url.path.rstrip('/')
+        return self.__get_parsed_url().path.rstrip('/')
 
     def has_query_param(self, name):
         """Determines if the param is defined.
@@ -118,7 +152,7 @@ class HttpRequest(object):
 
         """
 
-        return name in self.__query
+        return name in self.__get_query()
 
     def get_query_param(self, name, default=''):
         """Gets a param from the HTTP query string.
@@ -136,7 +170,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__query.get(name, (default, ))[0]
+        return self.__get_query().get(name, (default, ))[0]
 
     def get_query_param_array(self, name, default=None):
         """Gets a param from the HTTP query string.
@@ -160,7 +194,7 @@ class HttpRequest(object):
         elif not isinstance(default, list):
             raise ValueError('Default value is not a list')
 
-        return self.__query.get(name, default)
+        return self.__get_query().get(name, default)
 
     def get_query_params(self):
         """Get all HTTP query params.
@@ -170,7 +204,7 @@ class HttpRequest(object):
 
         """
 
-        return {key: value[0] for key, value in self.__query.items()}
+        return {key: value[0] for key, value in self.__get_query().items()}
 
     def get_query_params_array(self):
         """Get all HTTP query params.
@@ -182,7 +216,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__query
+        return self.__get_query()
 
     def has_post_param(self, name):
         """Determines if the param is defined.
@@ -197,7 +231,7 @@ class HttpRequest(object):
 
         """
 
-        return name in self.__post_data
+        return name in self.__get_post_data()
 
     def get_post_param(self, name, default=''):
         """Gets a param from the HTTP post data.
@@ -216,7 +250,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__post_data.get(name, (default, ))[0]
+        return self.__get_post_data().get(name, (default, ))[0]
 
     def get_post_param_array(self, name, default=None):
         """Gets a param from the HTTP post data.
@@ -240,7 +274,7 @@ class HttpRequest(object):
         elif not isinstance(default, list):
             raise ValueError('Default value is not a list')
 
-        return self.__post_data.get(name, default)
+        return self.__get_post_data().get(name, default)
 
     def get_post_params(self):
         """Get all HTTP post params.
@@ -250,7 +284,7 @@ class HttpRequest(object):
 
         """
 
-        return {key: value[0] for key, value in self.__post_data.items()}
+        return {key: value[0] for key, value in self.__get_post_data().items()}
 
     def get_post_params_array(self):
         """Get all HTTP post params.
@@ -262,7 +296,7 @@ class HttpRequest(object):
 
         """
 
-        return self.__post_data
+        return self.__get_post_data()
 
     def is_protocol_version(self, version):
         """Determine if the request used the given HTTP version.
@@ -305,7 +339,7 @@ class HttpRequest(object):
 
         """
 
-        return name.upper() in self.__headers
+        return self.__get_headers().has(name)
 
     def get_header(self, name, default=''):
         """Get an HTTP header.
@@ -325,11 +359,7 @@ class HttpRequest(object):
 
         """
 
-        name = name.upper()
-        if not self.has_header(name):
-            return default
-
-        return self.__headers.get(name)[0]
+        return self.__get_headers().getone(name, default)
 
     def get_header_array(self, name, default=None):
         """Gets an HTTP header.
@@ -353,7 +383,7 @@ class HttpRequest(object):
         elif not isinstance(default, list):
             raise ValueError('Default value is not a list')
 
-        return self.__headers.get(name.upper(), default)
+        return self.__get_headers().getall(name, default)
 
     def get_headers(self):
         """Get all HTTP headers.
@@ -363,17 +393,25 @@ class HttpRequest(object):
 
         """
 
-        return {key: value[0] for key, value in self.__headers.items()}
+        return {
+            name.upper(): values[0]
+            for name, values in self.__get_headers().items()
+            }
 
     def get_headers_array(self):
         """Get all HTTP headers.
 
+        Header names are returned in upper case.
+
         :returns: The HTTP headers.
-        :rtype: `MultiDict`
+        :rtype: `HttpHeaders`
 
         """
 
-        return self.__headers
+        return HttpHeaders(
+            (name.upper(), values)
+            for name, values in self.__get_headers().items()
+            )
 
     def has_body(self):
         """Determines if the HTTP request body has content.
@@ -409,7 +447,7 @@ class HttpRequest(object):
 
         """
 
-        return name in self.__files
+        return name in self.__get_files()
 
     def get_file(self, name):
         """Get an uploaded file.
@@ -424,9 +462,9 @@ class HttpRequest(object):
 
         """
 
-        if name in self.__files:
+        if name in self.__get_files():
             # Get only the first file
-            return self.__files.getone(name)
+            return self.__get_files().getone(name)
         else:
             return File(name, path='')
 
@@ -442,4 +480,4 @@ class HttpRequest(object):
 
         # Fields might have more than one file uploaded for the same name,
         # there for it can happen that file names are duplicated.
-        return chain.from_iterable(self.__files.values())
+        return chain.from_iterable(self.__get_files().values())
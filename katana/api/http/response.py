@@ -9,7 +9,7 @@ For the full copyright and license information, please view the LICENSE
 file that was distributed with this source code.
 
 """
-from ...utils import MultiDict
+from .headers import HttpHeaders
 
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
@@ -20,26 +20,11 @@ class HttpResponse(object):
 
     def __init__(self, status_code, status_text, *args, **kwargs):
         super().__init__()
-        self.__headers = MultiDict()
         self.set_status(status_code, status_text)
         self.set_protocol_version(kwargs.get('protocol_version'))
         self.set_body(kwargs.get('body'))
-
-        # Save header name mappings to avoid changing use setted header name
-        self.__header_names = {}
-        # Set response headers
-        headers = kwargs.get('headers')
-        if headers:
-            # Headers should be a list of tuples
-            if isinstance(headers, dict):
-                headers = headers.items()
-
-            for name, values in headers:
-                for value in values:
-                    self.set_header(name, value)
-
-                # Save header name mapping
-                self.__header_names[name.upper()] = name
+        # Headers can be a dictionary or a list of tuples with the values
+        self.__headers = HttpHeaders(kwargs.get('headers'))
 
     def is_protocol_version(self, version):
         """Determine if the response uses the given HTTP version.
@@ -149,7 +134,7 @@ class HttpResponse(object):
 
         """
 
-        return name.upper() in self.__header_names
+        return self.__headers.has(name)
 
     def get_header(self, name, default=''):
         """Get an HTTP header.
@@ -169,15 +154,7 @@ class HttpResponse(object):
 
         """
 
-        # Get the header name with the original casing
-        name = self.__header_names.get(name.upper(), name)
-
-        values = self.__headers.get(name)
-        if not values:
-            return ''
-
-        # Get first header value
-        return values[0]
+        return self.__headers.getone(name, default)
 
     def get_header_array(self, name, default=None):
         """Gets an HTTP header.
@@ -201,9 +178,7 @@ class HttpResponse(object):
         elif not isinstance(default, list):
             raise ValueError('Default value is not a list')
 
-        # Get the header name with the original casing
-        name = self.__header_names.get(name.upper(), name)
-        return self.__headers.get(name, default)
+        return self.__headers.getall(name, default)
 
     def get_headers(self):
         """Get all HTTP headers.
@@ -219,7 +194,7 @@ class HttpResponse(object):
         """Get all HTTP headers.
 
         :returns: The HTTP headers.
-        :rtype: `MultiDict`
+        :rtype: `HttpHeaders`
 
         """
 
@@ -239,8 +214,7 @@ class HttpResponse(object):
 
         """
 
-        self.__headers[name] = value
-        self.__header_names[name.upper()] = name
+        self.__headers.append(name, value)
         return self
 
     def has_body(self):
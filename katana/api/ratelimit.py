@@ -0,0 +1,360 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from .. import urn
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+# File header with a magic string and the number of slots in the table
+HEADER = struct.Struct('<8sI')
+HEADER_MAGIC = b'KTNRATE1'
+
+# Each slot contains the key hash, available tokens and last update time
+SLOT = struct.Struct('<Qdd')
+
+# Maximum number of slots to check when looking for the slot of a key
+PROBE_SIZE = 8
+
+# Directory for the table files
+SHM_DIR = '/dev/shm'
+
+
+def get_key_hash(key):
+    """Get the hash used to find a key in the table.
+
+    Zero is used for empty slots so it is never returned.
+
+    :param key: The bucket key.
+    :type key: str
+
+    :rtype: int
+
+    """
+
+    digest = hashlib.md5(key.encode('utf8')).digest()
+    return struct.unpack('<Q', digest[:8])[0] or 1
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter shared between processes.
+
+    Buckets are stored in a table inside a memory mapped file, so all
+    the processes that use the same name share the same limits.
+
+    Each bucket starts with `capacity` tokens and is refilled with `rate`
+    tokens per second. Access to the buckets is serialized between
+    processes using file locks on the slots being used.
+
+    Buckets that are full can be reused by other keys, so the number of
+    slots only limits the number of keys being throttled at the same time.
+
+    """
+
+    def __init__(self, name, rate, capacity=None, slots=4096,
+                 directory=None):
+        """Constructor.
+
+        :param name: Name of the table shared between processes.
+        :type name: str
+        :param rate: Number of tokens added to a bucket every second.
+        :type rate: float
+        :param capacity: Optional maximum number of tokens in a bucket.
+        :type capacity: float
+        :param slots: Number of buckets in the table.
+        :type slots: int
+        :param directory: Optional directory for the table file.
+        :type directory: str
+
+        :raises: ValueError
+
+        """
+
+        self.__fd = None
+        self.__map = None
+        if rate <= 0:
+            raise ValueError('Rate must be greater than zero')
+
+        if not directory:
+            if os.path.isdir(SHM_DIR):
+                directory = SHM_DIR
+            else:
+                directory = tempfile.gettempdir()
+
+        self.__rate = rate
+        self.__capacity = capacity or rate
+        self.__slots = slots
+        self.__path = os.path.join(directory, 'katana-ratelimit-' + name)
+        # File locks are per process so threads must use their own lock
+        self.__lock = threading.Lock()
+        self.__open()
+
+    def __del__(self):
+        self.close()
+
+    def __open(self):
+        # Slots past the end of the table allow probing without wrapping
+        size = HEADER.size + (self.__slots + PROBE_SIZE) * SLOT.size
+        fd = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX, HEADER.size, 0)
+            try:
+                current_size = os.fstat(fd).st_size
+                if current_size == 0:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, HEADER.pack(HEADER_MAGIC, self.__slots), 0)
+                elif current_size != size:
+                    raise ValueError(
+                        'Rate limit table "{}" has a different size'.format(
+                            self.__path,
+                            )
+                        )
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, HEADER.size, 0)
+
+            magic, slots = HEADER.unpack(os.pread(fd, HEADER.size, 0))
+            if magic != HEADER_MAGIC or slots != self.__slots:
+                raise ValueError(
+                    'Invalid rate limit table: "{}"'.format(self.__path),
+                    )
+
+            self.__map = mmap.mmap(fd, size)
+        except Exception:
+            os.close(fd)
+            raise
+
+        self.__fd = fd
+
+    def get_path(self):
+        """Get the path to the table file.
+
+        :rtype: str
+
+        """
+
+        return self.__path
+
+    def close(self):
+        """Close the table file.
+
+        The file is not removed so other processes can keep using it.
+
+        """
+
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def consume(self, key, tokens=1):
+        """Take tokens from the bucket of a key.
+
+        :param key: The bucket key.
+        :type key: str
+        :param tokens: Number of tokens to take.
+        :type tokens: float
+
+        :returns: A tuple with True when the tokens were taken, and the
+            seconds to wait until the tokens are available.
+        :rtype: tuple
+
+        """
+
+        key_hash = get_key_hash(key)
+        home = HEADER.size + (key_hash % self.__slots) * SLOT.size
+        length = PROBE_SIZE * SLOT.size
+        rate = self.__rate
+        capacity = self.__capacity
+        data = self.__map
+        with self.__lock:
+            # Lock all the slots that can be used by the key
+            fcntl.lockf(self.__fd, fcntl.LOCK_EX, length, home)
+            try:
+                now = time.time()
+                offset = None
+                available = capacity
+                for index in range(PROBE_SIZE):
+                    position = home + index * SLOT.size
+                    slot_hash, slot_tokens, updated = SLOT.unpack_from(
+                        data,
+                        position,
+                        )
+                    if slot_hash == key_hash:
+                        offset = position
+                        elapsed = max(now - updated, 0)
+                        available = min(slot_tokens + elapsed * rate, capacity)
+                        break
+                    elif offset is None:
+                        # Use an empty slot or a slot with a full bucket
+                        if not slot_hash or (
+                                slot_tokens + (now - updated) * rate
+                                >= capacity):
+                            offset = position
+
+                owner = key_hash
+                if offset is None:
+                    # When all slots are in use the bucket is shared
+                    offset = home
+                    owner, slot_tokens, updated = SLOT.unpack_from(data, home)
+                    elapsed = max(now - updated, 0)
+                    available = min(slot_tokens + elapsed * rate, capacity)
+
+                allowed = available >= tokens
+                if allowed:
+                    available -= tokens
+
+                SLOT.pack_into(data, offset, owner, available, now)
+            finally:
+                fcntl.lockf(self.__fd, fcntl.LOCK_UN, length, home)
+
+        if allowed:
+            return (True, 0.0)
+
+        return (False, (tokens - available) / rate)
+
+
+def client_key(request):
+    """Get the client IP address of a request as rate limit key.
+
+    When the address has no port the whole address is used.
+
+    :param request: The request from a middleware request callback.
+    :type request: `Request`
+
+    :rtype: str
+
+    """
+
+    address = request.get_client_address()
+    return address.rpartition(':')[0] or address
+
+
+def service_key(request):
+    """Get the service name and version of a request as rate limit key.
+
+    :param request: The request from a middleware request callback.
+    :type request: `Request`
+
+    :rtype: str
+
+    """
+
+    return '{}/{}'.format(
+        request.get_service_name(),
+        request.get_service_version(),
+        )
+
+
+def header_key(name):
+    """Create a function to get an HTTP header as rate limit key.
+
+    :param name: The HTTP header name.
+    :type name: str
+
+    :rtype: function
+
+    """
+
+    def get_key(request):
+        http_request = request.get_http_request()
+        if http_request:
+            return http_request.get_header(name)
+
+        return ''
+
+    return get_key
+
+
+class RequestRateLimiter(object):
+    """Rate limiter for the request callbacks of a middleware.
+
+    Requests are limited using a bucket for each key, and the key
+    is taken from the request using a key function:
+
+        limiter = RequestRateLimiter('api', rate=10, key=client_key)
+
+        def request_handler(request):
+            return limiter.check(request) or request
+
+    Requests that exceed the limit get a 429 response.
+
+    """
+
+    def __init__(self, name, rate, capacity=None, key=client_key, **kwargs):
+        """Constructor.
+
+        Extra keyword arguments are used to create the `RateLimiter`.
+
+        :param name: Name of the table shared between processes.
+        :type name: str
+        :param rate: Number of requests allowed per second.
+        :type rate: float
+        :param capacity: Optional maximum burst of requests.
+        :type capacity: float
+        :param key: Function to get the key for a request.
+        :type key: function
+
+        """
+
+        self.__limiter = RateLimiter(name, rate, capacity, **kwargs)
+        self.__get_key = key
+
+    def get_limiter(self):
+        """Get the rate limiter.
+
+        :rtype: `RateLimiter`
+
+        """
+
+        return self.__limiter
+
+    def check(self, request):
+        """Check if a request exceeds the rate limit.
+
+        Requests without a key are not limited.
+
+        :param request: The request from a middleware request callback.
+        :type request: `Request`
+
+        :returns: A 429 response, or None when the request is allowed.
+        :rtype: `Response`
+
+        """
+
+        key = self.__get_key(request)
+        if not key:
+            return
+
+        allowed, wait = self.__limiter.consume(key)
+        if allowed:
+            return
+
+        response = request.new_response(429, 'Too Many Requests')
+        if request.get_gateway_protocol() == urn.HTTP:
+            response.get_http_response().set_header(
+                'Retry-After',
+                str(int(math.ceil(wait))),
+                )
+
+        return response
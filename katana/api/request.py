@@ -35,7 +35,11 @@ class Request(Api):
         self.__attributes = kwargs['attributes']
         self.__request_id = kwargs.get('rid')
         self.__request_timestamp = kwargs.get('timestamp')
-        self._logger = RequestLogger(self.__request_id, 'katana.api')
+        # The logger is shared with the responses created by the request
+        self._logger = (
+            kwargs.get('logger')
+            or RequestLogger(self.__request_id, 'katana.api')
+            )
         self.__gateway_protocol = kwargs.get('gateway_protocol')
         self.__gateway_addresses = kwargs.get('gateway_addresses')
 
@@ -209,6 +213,7 @@ class Request(Api):
             gateway_protocol=self.get_gateway_protocol(),
             gateway_addresses=self.__gateway_addresses,
             http_response=http_response,
+            logger=self._logger,
             )
 
     def get_http_request(self):
@@ -37,7 +37,10 @@ class Response(Api):
 
     def __init__(self, transport, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._logger = RequestLogger(kwargs.get('rid'), 'katana.api')
+        self._logger = (
+            kwargs.get('logger')
+            or RequestLogger(kwargs.get('rid'), 'katana.api')
+            )
         self.__attributes = kwargs['attributes']
         self.__gateway_protocol = kwargs.get('gateway_protocol')
         self.__gateway_addresses = kwargs.get('gateway_addresses')
@@ -9,8 +9,10 @@ For the full copyright and license information, please view the LICENSE
 file that was distributed with this source code.
 
 """
+from .entity import EntityValidator
 from .error import ServiceSchemaError
 from .param import ParamSchema
+from .param import ParamsValidator
 from .file import FileSchema
 from ... payload import get_path
 from ... payload import path_exists
@@ -190,6 +192,24 @@ class ActionSchema(object):
 
         return entity_from_payload(self.__payload.get('entity', None))
 
+    def get_entity_validator(self):
+        """Get a validator for the entities of the action.
+
+        :rtype: EntityValidator
+
+        """
+
+        return EntityValidator(self)
+
+    def get_params_validator(self):
+        """Get a validator for the parameters of the action.
+
+        :rtype: ParamsValidator
+
+        """
+
+        return ParamsValidator(self)
+
     def has_relations(self):
         """Check if any relations exists for the action.
 
@@ -0,0 +1,172 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+from decimal import Decimal
+
+from .error import ServiceSchemaError
+from ...payload import get_path
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+# Python types for each entity field type
+FIELD_TYPES = {
+    'null': (type(None), ),
+    'boolean': (bool, ),
+    'integer': (int, ),
+    'float': (float, int, Decimal),
+    'string': (str, ),
+    'binary': (bytes, str),
+    'array': (list, tuple),
+    'object': (dict, ),
+    }
+
+
+class EntityValidationError(ServiceSchemaError):
+    """Error raised when an entity is not valid for an action."""
+
+    message = 'Invalid entity for action "{}": {}'
+
+    def __init__(self, action, reason):
+        self.action = action
+        self.reason = reason
+        super().__init__(self.message.format(action, reason))
+
+
+def compile_entity(definition, prefix=''):
+    """Compile an entity definition into a check function.
+
+    The definition is the one returned by `ActionSchema.get_entity()`.
+
+    The check function receives an entity and returns None when the
+    entity is valid, or a string with the reason when it is not.
+
+    :param definition: Entity definition.
+    :type definition: dict
+    :param prefix: Optional prefix for the field names in the reasons.
+    :type prefix: str
+
+    :rtype: function
+
+    """
+
+    # Resolve all the field values once so checks only use local values
+    fields = []
+    for field in definition.get('field', []):
+        field_type = field['type']
+        fields.append((
+            field['name'],
+            prefix + field['name'],
+            FIELD_TYPES.get(field_type, FIELD_TYPES['string']),
+            # Boolean values are integers for python so they must be skipped
+            field_type in ('integer', 'float'),
+            field['optional'],
+            ))
+
+    fieldsets = []
+    for fieldset in definition.get('fields', []):
+        name = fieldset['name']
+        fieldsets.append((
+            name,
+            prefix + name,
+            compile_entity(fieldset, '{}{}/'.format(prefix, name)),
+            fieldset['optional'],
+            ))
+
+    def check(entity):
+        if not isinstance(entity, dict):
+            return '{} is not an object'.format(prefix[:-1] or 'entity')
+
+        for name, path, types, no_bool, optional in fields:
+            if name not in entity:
+                if optional:
+                    continue
+
+                return 'field "{}" is missing'.format(path)
+
+            value = entity[name]
+            if not isinstance(value, types) or (
+                    no_bool and value.__class__ is bool):
+                return 'field "{}" has an invalid type'.format(path)
+
+        for name, path, check_fieldset, optional in fieldsets:
+            if name not in entity:
+                if optional:
+                    continue
+
+                return 'fieldset "{}" is missing'.format(path)
+
+            reason = check_fieldset(entity[name])
+            if reason:
+                return reason
+
+    return check
+
+
+class EntityValidator(object):
+    """Validator for the entities of an action.
+
+    The entity definition is compiled once when the validator is
+    created, so it can be reused to validate many entities.
+
+    """
+
+    def __init__(self, action_schema):
+        self.__action = action_schema.get_name()
+        self.__path = action_schema.get_entity_path()
+        self.__delimiter = action_schema.get_path_delimiter()
+        self.__check = compile_entity(action_schema.get_entity())
+
+    def __resolve(self, data):
+        if not self.__path:
+            return data
+
+        try:
+            return get_path(data, self.__path, delimiter=self.__delimiter)
+        except (KeyError, TypeError):
+            raise EntityValidationError(
+                self.__action,
+                'entity path "{}" not found'.format(self.__path),
+                )
+
+    def validate(self, entity):
+        """Validate an entity.
+
+        :param entity: The entity data.
+        :type entity: dict
+
+        :raises: EntityValidationError
+
+        """
+
+        reason = self.__check(self.__resolve(entity))
+        if reason:
+            raise EntityValidationError(self.__action, reason)
+
+    def validate_collection(self, collection):
+        """Validate all the entities in a collection.
+
+        :param collection: The list of entities.
+        :type collection: list
+
+        :raises: EntityValidationError
+
+        """
+
+        check = self.__check
+        resolve = self.__resolve if self.__path else None
+        for index, entity in enumerate(collection):
+            reason = check(resolve(entity) if resolve else entity)
+            if reason:
+                raise EntityValidationError(
+                    self.__action,
+                    'item {}: {}'.format(index, reason),
+                    )
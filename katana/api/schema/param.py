@@ -9,13 +9,258 @@ For the full copyright and license information, please view the LICENSE
 file that was distributed with this source code.
 
 """
+import logging
+import re
 import sys
 
+from .entity import FIELD_TYPES
+from .error import ServiceSchemaError
 from ...payload import Payload
 
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
 
+LOG = logging.getLogger(__name__)
+
+# Python types for the JSON schema types used in array items
+ITEM_TYPES = {
+    'null': FIELD_TYPES['null'],
+    'boolean': FIELD_TYPES['boolean'],
+    'integer': FIELD_TYPES['integer'],
+    'number': FIELD_TYPES['float'],
+    'string': FIELD_TYPES['string'],
+    'array': FIELD_TYPES['array'],
+    'object': FIELD_TYPES['object'],
+    }
+
+
+class ParamValidationError(ServiceSchemaError):
+    """Error raised when the parameters of an action are not valid."""
+
+    message = 'Invalid parameters for action "{}": {}'
+
+    def __init__(self, action, errors):
+        self.action = action
+        self.errors = errors
+        super().__init__(self.message.format(action, '; '.join(errors)))
+
+
+def has_unique_items(values):
+    """Check that all the items in a list are unique.
+
+    :rtype: bool
+
+    """
+
+    try:
+        return len(set(values)) == len(values)
+    except TypeError:
+        # Some items can't be hashed so items are compared one by one
+        for index, value in enumerate(values):
+            if value in values[index + 1:]:
+                return False
+
+        return True
+
+
+def compile_param(schema):
+    """Compile the constraints of a parameter schema into a check function.
+
+    The check function receives a parameter value and returns a list
+    with the reasons why the value is not valid, which is empty when
+    the value is valid.
+
+    :param schema: Parameter schema.
+    :type schema: ParamSchema
+
+    :rtype: function
+
+    """
+
+    checks = []
+    param_type = schema.get_type()
+    types = FIELD_TYPES.get(param_type, FIELD_TYPES['string'])
+    numeric = param_type in ('integer', 'float')
+
+    if numeric:
+        minimum = schema.get_min()
+        maximum = schema.get_max()
+        # Limits are only checked when they are defined in the schema
+        if minimum == -sys.maxsize - 1:
+            pass
+        elif schema.is_exclusive_min():
+            checks.append((
+                lambda value: value > minimum,
+                'must be greater than {}'.format(minimum),
+                ))
+        else:
+            checks.append((
+                lambda value: value >= minimum,
+                'must be greater than or equal to {}'.format(minimum),
+                ))
+
+        if maximum == sys.maxsize:
+            pass
+        elif schema.is_exclusive_max():
+            checks.append((
+                lambda value: value < maximum,
+                'must be less than {}'.format(maximum),
+                ))
+        else:
+            checks.append((
+                lambda value: value <= maximum,
+                'must be less than or equal to {}'.format(maximum),
+                ))
+
+        multiple_of = schema.get_multiple_of()
+        if multiple_of not in (-1, 0):
+            checks.append((
+                lambda value: value % multiple_of == 0,
+                'must be a multiple of {}'.format(multiple_of),
+                ))
+    elif param_type == 'string':
+        if not schema.allow_empty():
+            checks.append((lambda value: value != '', 'must not be empty'))
+
+        min_length = schema.get_min_length()
+        if min_length != -1:
+            checks.append((
+                lambda value: len(value) >= min_length,
+                'length must be at least {}'.format(min_length),
+                ))
+
+        max_length = schema.get_max_length()
+        if max_length != -1:
+            checks.append((
+                lambda value: len(value) <= max_length,
+                'length must be at most {}'.format(max_length),
+                ))
+
+        pattern = schema.get_pattern()
+        if pattern:
+            try:
+                search = re.compile(pattern).search
+            except re.error:
+                LOG.warning('Invalid pattern for parameter: %s', pattern)
+            else:
+                checks.append((
+                    lambda value: search(value) is not None,
+                    'must match pattern {}'.format(pattern),
+                    ))
+    elif param_type == 'array':
+        min_items = schema.get_min_items()
+        if min_items != -1:
+            checks.append((
+                lambda value: len(value) >= min_items,
+                'must have at least {} items'.format(min_items),
+                ))
+
+        max_items = schema.get_max_items()
+        if max_items != -1:
+            checks.append((
+                lambda value: len(value) <= max_items,
+                'must have at most {} items'.format(max_items),
+                ))
+
+        if schema.has_unique_items():
+            checks.append((has_unique_items, 'items must be unique'))
+
+        items_type = schema.get_items().get('type')
+        if items_type in ITEM_TYPES:
+            item_types = ITEM_TYPES[items_type]
+            if items_type in ('integer', 'number'):
+                def check_items(value):
+                    return all(
+                        isinstance(item, item_types)
+                        and item.__class__ is not bool
+                        for item in value
+                        )
+            else:
+                def check_items(value):
+                    return all(isinstance(item, item_types) for item in value)
+
+            checks.append((
+                check_items,
+                'items must be of type {}'.format(items_type),
+                ))
+
+    enum = schema.get_enum()
+    if enum:
+        checks.append((
+            lambda value: value in enum,
+            'must be one of {}'.format(enum),
+            ))
+
+    def check(value):
+        if not isinstance(value, types) or (
+                numeric and value.__class__ is bool):
+            return ['must be of type {}'.format(param_type)]
+
+        return [reason for is_valid, reason in checks if not is_valid(value)]
+
+    return check
+
+
+class ParamsValidator(object):
+    """Validator for the parameters of an action.
+
+    The constraints of all the parameter schemas are compiled once when
+    the validator is created, so it can be reused to validate the
+    parameters of many requests.
+
+    """
+
+    def __init__(self, action_schema):
+        self.__action = action_schema.get_name()
+        self.__params = []
+        for name in action_schema.get_params():
+            schema = action_schema.get_param_schema(name)
+            self.__params.append((
+                name,
+                schema.is_required() and not schema.has_default_value(),
+                compile_param(schema),
+                ))
+
+    def get_errors(self, values):
+        """Get the errors for a set of parameter values.
+
+        :param values: Parameter values by name.
+        :type values: dict
+
+        :returns: A list with the error messages.
+        :rtype: list
+
+        """
+
+        errors = []
+        for name, required, check in self.__params:
+            if name not in values:
+                if required:
+                    errors.append('"{}" is required'.format(name))
+
+                continue
+
+            for reason in check(values[name]):
+                errors.append('"{}" {}'.format(name, reason))
+
+        return errors
+
+    def validate(self, values):
+        """Validate a set of parameter values.
+
+        All the errors are reported at once.
+
+        :param values: Parameter values by name.
+        :type values: dict
+
+        :raises: ParamValidationError
+
+        """
+
+        errors = self.get_errors(values)
+        if errors:
+            raise ParamValidationError(self.__action, errors)
+
 
 class ParamSchema(object):
     """Parameter schema in the framework."""
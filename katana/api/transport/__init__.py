@@ -15,6 +15,7 @@ from ..base import ApiError
 from ..file import payload_to_file
 
 from .call import Caller
+from .data import data_to_columns
 from .data import ServiceData
 from .error import Error
 from .link import Link
@@ -27,6 +28,26 @@ __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
 EMPTY = object()
 
 
+def select_items(mapping, key=None):
+    """Get the items of a mapping, or only the item for a key.
+
+    :param mapping: The mapping to get the items from.
+    :type mapping: dict
+    :param key: Optional key of the item to get.
+    :type key: str
+
+    :rtype: iterable
+
+    """
+
+    if key is None:
+        return mapping.items()
+    elif key in mapping:
+        return ((key, mapping[key]), )
+
+    return ()
+
+
 class TransactionTypeError(ApiError):
     """Error raised for invalid transaction types."""
 
@@ -46,6 +67,8 @@ class Transport(object):
 
     def __init__(self, payload):
         self.__transport = Payload(payload)
+        # Results of the get methods by payload section name
+        self.__memo = {}
 
     def get_request_id(self):
         """
@@ -144,6 +167,128 @@ class Transport(object):
         if self.has_download():
             return payload_to_file(self.__transport.get('body'))
 
+    def __get_memoized(self, name, factory):
+        # Results are reused while the payload section is the same object
+        section = self.__transport.get(name, None)
+        memo = self.__memo.get(name)
+        if memo is None or memo[0] is not section:
+            memo = (section, factory())
+            self.__memo[name] = memo
+
+        return list(memo[1])
+
+    def __iter_data_items(self, address, service, version, action):
+        data = self.__transport.get('data', None)
+        if not data:
+            return
+
+        for addr, services in select_items(data, address):
+            for svc, versions in select_items(services, service):
+                for ver, actions in select_items(versions, version):
+                    if action is None or action in actions:
+                        yield (addr, svc, ver, actions)
+
+    def __iter_relation_items(self, address, service):
+        data = self.__transport.get('relations', None)
+        if not data:
+            return
+
+        for addr, services in select_items(data, address):
+            for name, pks in select_items(services, service):
+                for pk, foreign_services in pks.items():
+                    yield (addr, name, pk, foreign_services)
+
+    def __iter_link_items(self, address, service):
+        data = self.__transport.get('links', None)
+        if not data:
+            return
+
+        for addr, services in select_items(data, address):
+            for name, references in select_items(services, service):
+                for ref, uri in references.items():
+                    yield (addr, name, ref, uri)
+
+    def __iter_call_items(self, service, version, action):
+        data = self.__transport.get('calls', None)
+        if not data:
+            return
+
+        for name, versions in select_items(data, service):
+            for ver, service_calls in select_items(versions, version):
+                if action is None:
+                    for call_data in service_calls:
+                        yield (name, ver, call_data)
+                    continue
+
+                for call_data in service_calls:
+                    if get_path(call_data, 'caller', '') == action:
+                        yield (name, ver, call_data)
+
+    def __iter_error_items(self, address, service, version):
+        data = self.__transport.get('errors', None)
+        if not data:
+            return
+
+        for addr, services in select_items(data, address):
+            for name, versions in select_items(services, service):
+                for ver, error_data in select_items(versions, version):
+                    for error in error_data:
+                        yield (addr, name, ver, error)
+
+    def iter_data(self, address=None, service=None, version=None,
+                  action=None):
+        """
+        Iterate the Transport data.
+
+        Data can be filtered by Gateway address, Service name, version
+        and action. When an action is given only the Services with data
+        for that action are returned.
+
+        :param address: Optional Gateway address.
+        :type address: str
+        :param service: Optional Service name.
+        :type service: str
+        :param version: Optional Service version.
+        :type version: str
+        :param action: Optional Service action name.
+        :type action: str
+
+        :returns: A generator of `ServiceData`.
+        :rtype: generator
+
+        """
+
+        items = self.__iter_data_items(address, service, version, action)
+        return (ServiceData(*item) for item in items)
+
+    def has_data(self, address=None, service=None, version=None,
+                 action=None):
+        """
+        Check if the Transport contains data.
+
+        Filters are the same as in `iter_data()`.
+
+        :rtype: bool
+
+        """
+
+        items = self.__iter_data_items(address, service, version, action)
+        return any(True for _ in items)
+
+    def count_data(self, address=None, service=None, version=None,
+                   action=None):
+        """
+        Count the Services with data in the Transport.
+
+        Filters are the same as in `iter_data()`.
+
+        :rtype: int
+
+        """
+
+        items = self.__iter_data_items(address, service, version, action)
+        return sum(1 for _ in items)
+
     def get_data(self):
         """
         Get the Transport data.
@@ -155,17 +300,91 @@ class Transport(object):
 
         """
 
-        data = []
-        transport_data = self.__transport.get('data', {})
-        if not transport_data:
-            return data
+        return self.__get_memoized('data', lambda: list(self.iter_data()))
+
+    def get_columns(self, service, version, action, address=None,
+                    fields=None, as_array=False):
+        """
+        Get the entities returned by a Service action as columns.
+
+        The entities returned by all the calls to the action are exported
+        in a single pass. Data from all the Gateways is used unless an
+        address is given.
+
+        When no fields are given all the entity fields are used, and
+        missing values are set to None.
+
+        NumPy must be installed to get the columns as arrays.
+
+        :param service: The Service name.
+        :type service: str
+        :param version: The Service version.
+        :type version: str
+        :param action: The Service action name.
+        :type action: str
+        :param address: Optional Gateway address.
+        :type address: str
+        :param fields: Optional list of field names.
+        :type fields: list
+        :param as_array: Optionally get the columns as NumPy arrays.
+        :type as_array: bool
+
+        :raises: ImportError
+
+        :returns: The list of values, or an array, by field name.
+        :rtype: dict
+
+        """
+
+        call_data = []
+        items = self.__iter_data_items(address, service, version, action)
+        for _, _, _, actions in items:
+            call_data.extend(actions[action])
+
+        return data_to_columns(call_data, fields, as_array)
+
+    def iter_relations(self, address=None, service=None):
+        """
+        Iterate the Service relations.
+
+        Relations can be filtered by Gateway address and Service name.
 
-        for address, services in transport_data.items():
-            for svc, versions in services.items():
-                for ver, actions in versions.items():
-                    data.append(ServiceData(address, svc, ver, actions))
+        :param address: Optional Gateway address.
+        :type address: str
+        :param service: Optional Service name.
+        :type service: str
 
-        return data
+        :returns: A generator of `Relation`.
+        :rtype: generator
+
+        """
+
+        items = self.__iter_relation_items(address, service)
+        return (Relation(*item) for item in items)
+
+    def has_relations(self, address=None, service=None):
+        """
+        Check if the Transport contains relations.
+
+        Filters are the same as in `iter_relations()`.
+
+        :rtype: bool
+
+        """
+
+        return any(True for _ in self.__iter_relation_items(address, service))
+
+    def count_relations(self, address=None, service=None):
+        """
+        Count the relations in the Transport.
+
+        Filters are the same as in `iter_relations()`.
+
+        :rtype: int
+
+        """
+
+        return sum(1 for _ in self.__iter_relation_items(address, service))
 
     def get_relations(self):
         """
@@ -179,19 +398,53 @@ class Transport(object):
 
         """
 
-        relations = []
-        data = self.__transport.get('relations', {})
-        if not data:
-            return relations
+        return self.__get_memoized(
+            'relations',
+            lambda: list(self.iter_relations()),
+            )
 
-        for address, services in data.items():
-            for name, pks in services.items():
-                for pk, foreign_services in pks.items():
-                    relations.append(
-                        Relation(address, name, pk, foreign_services)
-                        )
+    def iter_links(self, address=None, service=None):
+        """
+        Iterate the Service links.
+
+        Links can be filtered by Gateway address and Service name.
+
+        :param address: Optional Gateway address.
+        :type address: str
+        :param service: Optional Service name.
+        :type service: str
+
+        :returns: A generator of `Link`.
+        :rtype: generator
+
+        """
+
+        items = self.__iter_link_items(address, service)
+        return (Link(*item) for item in items)
+
+    def has_links(self, address=None, service=None):
+        """
+        Check if the Transport contains links.
+
+        Filters are the same as in `iter_links()`.
+
+        :rtype: bool
+
+        """
+
+        return any(True for _ in self.__iter_link_items(address, service))
 
-        return relations
+    def count_links(self, address=None, service=None):
+        """
+        Count the links in the Transport.
+
+        Filters are the same as in `iter_links()`.
+
+        :rtype: int
+
+        """
+
+        return sum(1 for _ in self.__iter_link_items(address, service))
 
     def get_links(self):
         """
@@ -205,17 +458,58 @@ class Transport(object):
 
         """
 
-        links = []
-        data = self.__transport.get('links', {})
-        if not data:
-            return links
+        return self.__get_memoized('links', lambda: list(self.iter_links()))
 
-        for address, services in data.items():
-            for name, references in services.items():
-                for ref, uri in references.items():
-                    links.append(Link(address, name, ref, uri))
+    def iter_calls(self, service=None, version=None, action=None):
+        """
+        Iterate the Service calls.
+
+        Calls can be filtered by the name, version and action of the
+        Service that made the call.
 
-        return links
+        :param service: Optional Service name.
+        :type service: str
+        :param version: Optional Service version.
+        :type version: str
+        :param action: Optional Service action name.
+        :type action: str
+
+        :returns: A generator of `Caller`.
+        :rtype: generator
+
+        """
+
+        items = self.__iter_call_items(service, version, action)
+        return (
+            Caller(name, ver, get_path(call_data, 'caller', ''), call_data)
+            for name, ver, call_data in items
+            )
+
+    def has_calls(self, service=None, version=None, action=None):
+        """
+        Check if the Transport contains calls.
+
+        Filters are the same as in `iter_calls()`.
+
+        :rtype: bool
+
+        """
+
+        items = self.__iter_call_items(service, version, action)
+        return any(True for _ in items)
+
+    def count_calls(self, service=None, version=None, action=None):
+        """
+        Count the calls in the Transport.
+
+        Filters are the same as in `iter_calls()`.
+
+        :rtype: int
+
+        """
+
+        items = self.__iter_call_items(service, version, action)
+        return sum(1 for _ in items)
 
     def get_calls(self):
         """
@@ -229,18 +523,7 @@ class Transport(object):
 
         """
 
-        calls = []
-        data = self.__transport.get('calls', {})
-        if not data:
-            return calls
-
-        for service, versions in data.items():
-            for version, service_calls in versions.items():
-                for call_data in service_calls:
-                    action = get_path(call_data, 'caller', '')
-                    calls.append(Caller(service, version, action, call_data))
-
-        return calls
+        return self.__get_memoized('calls', lambda: list(self.iter_calls()))
 
     def get_transactions(self, type):
         """
@@ -269,6 +552,54 @@ class Transport(object):
 
         return [Transaction(type, tr_data) for tr_data in data]
 
+    def iter_errors(self, address=None, service=None, version=None):
+        """
+        Iterate the Transport errors.
+
+        Errors can be filtered by Gateway address, Service name and
+        version.
+
+        :param address: Optional Gateway address.
+        :type address: str
+        :param service: Optional Service name.
+        :type service: str
+        :param version: Optional Service version.
+        :type version: str
+
+        :returns: A generator of `Error`.
+        :rtype: generator
+
+        """
+
+        items = self.__iter_error_items(address, service, version)
+        return (Error(*item) for item in items)
+
+    def has_errors(self, address=None, service=None, version=None):
+        """
+        Check if the Transport contains errors.
+
+        Filters are the same as in `iter_errors()`.
+
+        :rtype: bool
+
+        """
+
+        items = self.__iter_error_items(address, service, version)
+        return any(True for _ in items)
+
+    def count_errors(self, address=None, service=None, version=None):
+        """
+        Count the errors in the Transport.
+
+        Filters are the same as in `iter_errors()`.
+
+        :rtype: int
+
+        """
+
+        items = self.__iter_error_items(address, service, version)
+        return sum(1 for _ in items)
+
     def get_errors(self):
         """
         Get Transport errors.
@@ -281,15 +612,4 @@ class Transport(object):
 
         """
 
-        errors = []
-        data = self.__transport.get('errors', {})
-        if not data:
-            return errors
-
-        for address, services in data.items():
-            for name, versions in services.items():
-                for version, error_data in versions.items():
-                    for data in error_data:
-                        errors.append(Error(address, name, version, data))
-
-        return errors
+        return self.__get_memoized('errors', lambda: list(self.iter_errors()))
@@ -9,10 +9,77 @@ For the full copyright and license information, please view the LICENSE
 file that was distributed with this source code.
 
 """
+from collections import OrderedDict
+from operator import itemgetter
+
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
 
 
+def data_to_columns(call_data, fields=None, as_array=False):
+    """Convert the entities returned by action calls to columns.
+
+    Each item in `call_data` is the data returned by a call, which can be
+    an entity or a collection of entities.
+
+    When no fields are given all the entity fields are used in the order
+    they are first found, and missing values are set to None.
+
+    NumPy must be installed to get the columns as arrays.
+
+    :param call_data: List of entities or collections.
+    :type call_data: list
+    :param fields: Optional list of field names.
+    :type fields: list
+    :param as_array: Optionally get the columns as NumPy arrays.
+    :type as_array: bool
+
+    :raises: ImportError
+
+    :returns: The list of values, or an array, by field name.
+    :rtype: `OrderedDict`
+
+    """
+
+    if as_array:
+        import numpy
+
+    entities = []
+    for data in call_data:
+        if isinstance(data, list):
+            entities.extend(data)
+        else:
+            entities.append(data)
+
+    if not fields:
+        # Keep the order in which fields are first found. Most entities
+        # have the same fields, so they are skipped with a single check.
+        fields = []
+        found = set()
+        for entity in entities:
+            if not found.issuperset(entity):
+                for name in entity:
+                    if name not in found:
+                        found.add(name)
+                        fields.append(name)
+
+    columns = OrderedDict()
+    for name in fields:
+        try:
+            columns[name] = list(map(itemgetter(name), entities))
+        except KeyError:
+            # Fields missing in some entities are None
+            columns[name] = [entity.get(name) for entity in entities]
+
+    if as_array:
+        return OrderedDict(
+            (name, numpy.asarray(values))
+            for name, values in columns.items()
+            )
+
+    return columns
+
+
 class ServiceData(object):
     """Represents a Service which stored data in the Transport."""
 
@@ -111,3 +178,23 @@ class ActionData(object):
         """
 
         return self.__data
+
+    def get_columns(self, fields=None, as_array=False):
+        """
+        Get the entities returned by the action as columns.
+
+        NumPy must be installed to get the columns as arrays.
+
+        :param fields: Optional list of field names.
+        :type fields: list
+        :param as_array: Optionally get the columns as NumPy arrays.
+        :type as_array: bool
+
+        :raises: ImportError
+
+        :returns: The list of values, or an array, by field name.
+        :rtype: `OrderedDict`
+
+        """
+
+        return data_to_columns(self.__data, fields, as_array)
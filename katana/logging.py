@@ -11,6 +11,8 @@ file that was distributed with this source code.
 """
 import base64
 import logging
+import queue
+import threading
 import time
 import types
 import sys
@@ -44,73 +46,203 @@ SYSLOG_NUMERIC = {
     7: logging.DEBUG,
     }
 
+# Maximum size for the binary values inside logged objects
+MAX_LOG_BYTES = 1024
 
-class RequestLogger(object):
+
+class RequestLogger(logging.LoggerAdapter):
     """
     Logger for requests.
 
     It appends the request ID to all logging messages.
 
+    Messages are only processed when the logging level is enabled,
+    so disabled levels have no formatting cost.
+
     """
 
     def __init__(self, rid, name):
+        super().__init__(logging.getLogger(name), {})
         self.rid = rid
-        self.__logger = logging.getLogger(name)
 
-    def debug(self, msg, *args, **kw):
+    def process(self, msg, kwargs):
         if self.rid:
-            msg += ' |{}|'.format(self.rid)
+            msg = '{} |{}|'.format(msg, self.rid)
 
-        self.__logger.debug(msg, *args, **kw)
+        return msg, kwargs
 
-    def info(self, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
 
-        self.__logger.info(msg, *args, **kw)
+class KatanaFormatter(logging.Formatter):
+    """Default KATANA logging formatter."""
 
-    def warning(self, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
+    def formatTime(self, record, *args, **kwargs):
+        utc = time.mktime(time.gmtime(record.created)) + (record.created % 1)
+        return datetime.fromtimestamp(utc).isoformat()[:-3]
 
-        self.__logger.warning(msg, *args, **kw)
 
-    def error(self, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
+class QueueStreamHandler(logging.Handler):
+    """Logging handler that writes to a stream from a background thread.
 
-        self.__logger.error(msg, *args, **kw)
+    Records are formatted by the thread that logs them and added to a
+    bounded queue, so logging never blocks on a slow stream. The writer
+    thread writes the queued messages to the stream in batches.
 
-    def critical(self, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
+    Messages are dropped when the queue is full, and the number of
+    dropped messages is available from `get_dropped()`.
 
-        self.__logger.critical(msg, *args, **kw)
+    """
 
-    def exception(self, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
+    def __init__(self, stream=None, max_size=10000, batch_size=100):
+        """Constructor.
+
+        :param stream: Optional stream to write to. Default is stderr.
+        :type stream: io.IOBase
+        :param max_size: Maximum number of messages in the queue.
+        :type max_size: int
+        :param batch_size: Maximum number of messages per write.
+        :type batch_size: int
+
+        """
+
+        super().__init__()
+        self.stream = stream or sys.stderr
+        self.__queue = queue.Queue(max_size)
+        self.__batch_size = batch_size
+        self.__dropped = 0
+        self.__closed = False
+        self.__thread = threading.Thread(
+            target=self.__write_messages,
+            name='katana-logging',
+            daemon=True,
+            )
+        self.__thread.start()
+
+    def __write_messages(self):
+        get = self.__queue.get
+        get_nowait = self.__queue.get_nowait
+        task_done = self.__queue.task_done
+        while True:
+            messages = [get()]
+            try:
+                while len(messages) < self.__batch_size:
+                    messages.append(get_nowait())
+            except queue.Empty:
+                pass
+
+            # None is queued when the handler is closed
+            finished = messages[-1] is None
+            if finished:
+                messages.pop()
+
+            if messages:
+                try:
+                    self.stream.write('\n'.join(messages) + '\n')
+                    self.stream.flush()
+                except Exception:
+                    # There is no record to pass to handleError()
+                    pass
+
+            for _ in range(len(messages) + finished):
+                task_done()
+
+            if finished:
+                break
+
+    def get_dropped(self):
+        """Get the number of messages dropped because the queue was full.
+
+        :rtype: int
+
+        """
+
+        return self.__dropped
+
+    def emit(self, record):
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        try:
+            self.__queue.put_nowait(message)
+        except queue.Full:
+            self.__dropped += 1
+
+    def flush(self):
+        """Wait until all the queued messages are written."""
+
+        if self.__thread.is_alive():
+            self.__queue.join()
+
+    def close(self):
+        """Write the queued messages and stop the writer thread."""
+
+        self.acquire()
+        try:
+            if not self.__closed:
+                self.__closed = True
+                if self.__thread.is_alive():
+                    self.__queue.put(None)
+                    self.__thread.join()
+        finally:
+            self.release()
+
+        super().close()
+
+
+class LogEncoder(json.Encoder):
+    """JSON encoder for logged values.
+
+    Binary values bigger than `MAX_LOG_BYTES` are summarized, and
+    binary values that are not valid UTF-8 are encoded as base64.
 
-        self.__logger.exception(msg, *args, **kw)
+    """
 
-    def log(self, lvl, msg, *args, **kw):
-        if self.rid:
-            msg += ' |{}|'.format(self.rid)
+    def default(self, obj):
+        if isinstance(obj, bytes):
+            if len(obj) > MAX_LOG_BYTES:
+                return '[binary data: {} bytes]'.format(len(obj))
 
-        self.__logger.log(lvl, msg, *args, **kw)
+            try:
+                return obj.decode('utf8')
+            except UnicodeDecodeError:
+                return base64.b64encode(obj).decode('ascii')
 
+        return super().default(obj)
 
-class KatanaFormatter(logging.Formatter):
-    """Default KATANA logging formatter."""
 
-    def formatTime(self, record, *args, **kwargs):
-        utc = time.mktime(time.gmtime(record.created)) + (record.created % 1)
-        return datetime.fromtimestamp(utc).isoformat()[:-3]
+def serialize_log_value(value, max_chars):
+    """Serialize a value to pretty JSON up to a number of characters.
+
+    JSON is generated incrementally and serialization stops as soon
+    as the maximum number of characters is reached.
+
+    :param value: A value to serialize.
+    :type value: object
+    :param max_chars: Maximum number of characters to return.
+    :type max_chars: int
+
+    :rtype: str
+
+    """
+
+    chunks = []
+    size = 0
+    for chunk in LogEncoder(indent=2).iterencode(value):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_chars:
+            break
+
+    return ''.join(chunks)[:max_chars]
 
 
 def value_to_log_string(value, max_chars=100000):
     """Convert a value to a string.
 
+    The cost of converting big values is bounded by `max_chars`.
+
     :param value: A value to log.
     :type value: object
     :param max_chars: Optional maximum number of characters to return.
@@ -127,10 +259,12 @@ def value_to_log_string(value, max_chars=100000):
     elif isinstance(value, str):
         output = value
     elif isinstance(value, bytes):
-        # Binary data is logged as base64
+        # Binary data is logged as base64. Each 3 bytes are encoded
+        # as 4 characters so only the bytes that fit are encoded.
+        value = value[:(max_chars // 4 + 1) * 3]
         output = base64.b64encode(value).decode('utf8')
     elif isinstance(value, (dict, list, tuple)):
-        output = json.serialize(value, prettify=True).decode('utf8')
+        output = serialize_log_value(value, max_chars)
     elif isinstance(value, types.FunctionType):
         if value.__name__ == '<lambda>':
             output = 'anonymous'
@@ -158,7 +292,8 @@ def disable_logging():
     logging.disable(sys.maxsize)
 
 
-def setup_katana_logging(type, name, version, framework, level):
+def setup_katana_logging(type, name, version, framework, level,
+                         use_queue=False):
     """Initialize logging defaults for KATANA.
 
     :param type: Component type.
@@ -166,6 +301,7 @@ def setup_katana_logging(type, name, version, framework, level):
     :param version: Component version.
     :param framework: KATANA framework version.
     :param level: Logging level.
+    :param use_queue: Optionally write the logs from a background thread.
 
     """
 
@@ -180,29 +316,38 @@ def setup_katana_logging(type, name, version, framework, level):
 
     output = get_output_buffer()
 
+    # When the queue is used all loggers share the same writer thread
+    queue_handler = None
+    if use_queue:
+        queue_handler = QueueStreamHandler(stream=output)
+        queue_handler.setFormatter(KatanaFormatter(format))
+
+    def create_handler():
+        if queue_handler:
+            return queue_handler
+
+        handler = logging.StreamHandler(stream=output)
+        handler.setFormatter(KatanaFormatter(format))
+        return handler
+
     # Setup root logger
     root = logging.root
     if not root.handlers:
-        logging.basicConfig(level=level, stream=output)
+        logging.basicConfig(level=level, handlers=[create_handler()])
         root.setLevel(level)
-        root.handlers[0].setFormatter(KatanaFormatter(format))
 
     # Setup katana logger
     logger = logging.getLogger('katana')
     logger.setLevel(level)
     if not logger.handlers:
-        handler = logging.StreamHandler(stream=output)
-        handler.setFormatter(KatanaFormatter(format))
-        logger.addHandler(handler)
+        logger.addHandler(create_handler())
         logger.propagate = False
 
     # Setup katana api logger
     logger = logging.getLogger('katana.api')
     logger.setLevel(level)
     if not logger.handlers:
-        handler = logging.StreamHandler(stream=output)
-        handler.setFormatter(KatanaFormatter(format))
-        logger.addHandler(handler)
+        logger.addHandler(create_handler())
         logger.propagate = False
 
     # Setup other loggers
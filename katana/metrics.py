@@ -0,0 +1,667 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+import asyncio
+import functools
+import logging
+import resource
+import threading
+import time
+
+from bisect import bisect_left
+
+from .schema import SchemaRegistry
+from .utils import Singleton
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+# Upper bounds in seconds for the latency histogram buckets.
+# Buckets grow in powers of two from 100 microseconds to 13 seconds.
+LATENCY_BUCKETS = tuple(0.0001 * 2 ** exponent for exponent in range(18))
+
+# Upper bounds in bytes for the payload size histogram buckets.
+# Buckets grow in powers of four from 256 bytes to 64 MiB.
+PAYLOAD_BUCKETS = tuple(256 * 4 ** exponent for exponent in range(10))
+
+# Kinds of payloads with a size histogram
+PAYLOAD_KINDS = ('request', 'response')
+
+# Content type for the text exposition format
+EXPOSITION_CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+LOG = logging.getLogger(__name__)
+
+
+class Histogram(object):
+    """Histogram with fixed bucket bounds."""
+
+    def __init__(self, bounds):
+        """Constructor.
+
+        :param bounds: Sorted upper bounds for the buckets.
+        :type bounds: tuple
+
+        """
+
+        self.bounds = bounds
+        self.sum = 0
+        # The last bucket counts the values above the last bound
+        self.buckets = [0] * (len(bounds) + 1)
+
+    def observe(self, value):
+        """Add a value to the histogram.
+
+        :param value: The value to add.
+        :type value: float
+
+        """
+
+        self.sum += value
+        self.buckets[bisect_left(self.bounds, value)] += 1
+
+    def to_dict(self):
+        """Get the histogram as a dictionary.
+
+        Buckets are a list of upper bound and count pairs, where the
+        bound for the last bucket is None.
+
+        :rtype: dict
+
+        """
+
+        return {
+            'sum': self.sum,
+            'buckets': [
+                [bound, count]
+                for bound, count in zip(self.bounds + (None, ), self.buckets)
+                ],
+            }
+
+
+class PhaseTimer(object):
+    """Timer for the phases of the request pipeline.
+
+    Each phase is timed from the end of the previous phase, so marking
+    a phase takes a single clock read.
+
+    The component server uses the phases "recv", "mappings", "unpack",
+    "component", "callback", "result", "meta", "pack" and "send", and
+    "timeout" for the time spent waiting for a request that timed out.
+
+    """
+
+    def __init__(self):
+        self.action = None
+        self.request_id = None
+        self.request_size = 0
+        self.response_size = 0
+        self.phases = []
+        self.__last = time.perf_counter()
+
+    def mark(self, phase):
+        """Register the end of a phase.
+
+        :param phase: The phase name.
+        :type phase: str
+
+        """
+
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.__last))
+        self.__last = now
+
+    def get_total(self):
+        """Get the seconds spent in all the phases.
+
+        :rtype: float
+
+        """
+
+        return sum(duration for _, duration in self.phases)
+
+    def format(self):
+        """Format the phase timings in milliseconds for the logs.
+
+        :rtype: str
+
+        """
+
+        return ' '.join(
+            '{}={:.3f}ms'.format(phase, duration * 1000)
+            for phase, duration in self.phases
+            )
+
+
+class ActionMetrics(object):
+    """Request counters and latency histogram for an action."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        # Total seconds spent in each phase of the request pipeline
+        self.phases = {}
+
+    def observe(self, duration, error=False):
+        """Register a processed request.
+
+        :param duration: Seconds spent processing the request.
+        :type duration: float
+        :param error: Optional flag for requests that failed.
+        :type error: bool
+
+        """
+
+        self.requests += 1
+        if error:
+            self.errors += 1
+
+        self.latency.observe(duration)
+
+    def observe_phases(self, phases):
+        """Add the phase timings of a request.
+
+        :param phases: A list of phase name and seconds pairs.
+        :type phases: list
+
+        """
+
+        totals = self.phases
+        for phase, duration in phases:
+            totals[phase] = totals.get(phase, 0) + duration
+
+    def to_dict(self):
+        """Get the metrics as a dictionary.
+
+        :rtype: dict
+
+        """
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'latency': self.latency.to_dict(),
+            'phases': dict(self.phases),
+            }
+
+
+class MetricsRegistry(object, metaclass=Singleton):
+    """Global registry for the metrics of the component actions.
+
+    Metrics are updated by the component server, and can be read from
+    any thread.
+
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__actions = {}
+        self.__payloads = {
+            kind: Histogram(PAYLOAD_BUCKETS) for kind in PAYLOAD_KINDS
+            }
+
+    def get_action(self, name):
+        """Get the metrics for an action.
+
+        :param name: The action name.
+        :type name: str
+
+        :rtype: `ActionMetrics`
+
+        """
+
+        metrics = self.__actions.get(name)
+        if metrics is None:
+            with self.__lock:
+                metrics = self.__actions.setdefault(name, ActionMetrics())
+
+        return metrics
+
+    def observe(self, action, duration, error=False):
+        """Register a processed request for an action.
+
+        :param action: The action name.
+        :type action: str
+        :param duration: Seconds spent processing the request.
+        :type duration: float
+        :param error: Optional flag for requests that failed.
+        :type error: bool
+
+        """
+
+        self.get_action(action).observe(duration, error)
+
+    def timeout(self, action):
+        """Register a request that timed out for an action.
+
+        :param action: The action name.
+        :type action: str
+
+        """
+
+        self.get_action(action).timeouts += 1
+
+    def observe_phases(self, action, phases):
+        """Add the phase timings of a request for an action.
+
+        :param action: The action name.
+        :type action: str
+        :param phases: A list of phase name and seconds pairs.
+        :type phases: list
+
+        """
+
+        self.get_action(action).observe_phases(phases)
+
+    def observe_payload(self, kind, size):
+        """Register the size of a payload.
+
+        :param kind: The payload kind, "request" or "response".
+        :type kind: str
+        :param size: The payload size in bytes.
+        :type size: int
+
+        """
+
+        self.__payloads[kind].observe(size)
+
+    def get_payload_metrics(self):
+        """Get the size histograms for the payloads.
+
+        :returns: The histograms by payload kind.
+        :rtype: dict
+
+        """
+
+        return {
+            kind: histogram.to_dict()
+            for kind, histogram in self.__payloads.items()
+            }
+
+    def get_actions(self):
+        """Get the action names and metrics.
+
+        :returns: A list of name and `ActionMetrics` pairs.
+        :rtype: list
+
+        """
+
+        with self.__lock:
+            return list(self.__actions.items())
+
+    def get_payloads(self):
+        """Get the payload kinds and size histograms.
+
+        :returns: A list of kind and `Histogram` pairs.
+        :rtype: list
+
+        """
+
+        return [(kind, self.__payloads[kind]) for kind in PAYLOAD_KINDS]
+
+    def get_metrics(self):
+        """Get the metrics for all the actions.
+
+        :returns: The metrics by action name.
+        :rtype: dict
+
+        """
+
+        return {
+            name: metrics.to_dict()
+            for name, metrics in self.get_actions()
+            }
+
+    def reset(self):
+        """Remove all the metrics."""
+
+        with self.__lock:
+            self.__actions = {}
+            self.__payloads = {
+                kind: Histogram(PAYLOAD_BUCKETS) for kind in PAYLOAD_KINDS
+                }
+
+
+def get_metrics_registry():
+    """Get the global metrics registry.
+
+    :rtype: `MetricsRegistry`
+
+    """
+
+    return MetricsRegistry()
+
+
+def get_process_rss():
+    """Get the resident memory size of the current process in bytes.
+
+    When the current size is not available the peak size is returned.
+
+    :rtype: int
+
+    """
+
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return pages * resource.getpagesize()
+
+
+def get_executor_stats(executor):
+    """Get the number of threads and queued tasks of a thread pool.
+
+    :param executor: A thread pool executor.
+    :type executor: `ThreadPoolExecutor`
+
+    :returns: The number of threads and the queue size.
+    :rtype: tuple
+
+    """
+
+    threads = getattr(executor, '_threads', ())
+    work_queue = getattr(executor, '_work_queue', None)
+    return (len(threads), work_queue.qsize() if work_queue else 0)
+
+
+def escape_label(value):
+    """Escape a label value for the text exposition format.
+
+    :param value: The label value.
+    :type value: str
+
+    :rtype: str
+
+    """
+
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n',
+        '\\n',
+        )
+
+
+def render_histogram(lines, name, labels, histogram):
+    """Add the lines for a histogram in the text exposition format.
+
+    :param lines: The list to add the lines to.
+    :type lines: list
+    :param name: The metric name.
+    :type name: str
+    :param labels: The metric labels as a string.
+    :type labels: str
+    :param histogram: The histogram to render.
+    :type histogram: `Histogram`
+
+    """
+
+    count = 0
+    for bound, bucket in zip(histogram.bounds, histogram.buckets):
+        count += bucket
+        lines.append('{}_bucket{{{},le="{}"}} {}'.format(
+            name,
+            labels,
+            bound,
+            count,
+            ))
+
+    count += histogram.buckets[-1]
+    lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, count))
+    lines.append('{}_sum{{{}}} {}'.format(name, labels, histogram.sum))
+    lines.append('{}_count{{{}}} {}'.format(name, labels, count))
+
+
+def render_metrics(registry=None, loop=None, lag=None):
+    """Render the component metrics in the text exposition format.
+
+    :param registry: Optional metrics registry.
+    :type registry: `MetricsRegistry`
+    :param loop: Optional event loop to get the default executor stats.
+    :type loop: `BaseEventLoop`
+    :param lag: Optional last and maximum event loop lag in seconds.
+    :type lag: tuple
+
+    :rtype: str
+
+    """
+
+    registry = registry or get_metrics_registry()
+    actions = registry.get_actions()
+    lines = []
+
+    counters = (
+        ('katana_action_requests_total', 'requests'),
+        ('katana_action_errors_total', 'errors'),
+        ('katana_action_timeouts_total', 'timeouts'),
+        )
+    for name, attribute in counters:
+        lines.append('# TYPE {} counter'.format(name))
+        for action, metrics in actions:
+            lines.append('{}{{action="{}"}} {}'.format(
+                name,
+                escape_label(action),
+                getattr(metrics, attribute),
+                ))
+
+    name = 'katana_action_latency_seconds'
+    lines.append('# TYPE {} histogram'.format(name))
+    for action, metrics in actions:
+        labels = 'action="{}"'.format(escape_label(action))
+        render_histogram(lines, name, labels, metrics.latency)
+
+    name = 'katana_action_phase_seconds_total'
+    lines.append('# TYPE {} counter'.format(name))
+    for action, metrics in actions:
+        action = escape_label(action)
+        for phase, duration in sorted(metrics.phases.items()):
+            lines.append('{}{{action="{}",phase="{}"}} {}'.format(
+                name,
+                action,
+                phase,
+                duration,
+                ))
+
+    name = 'katana_payload_size_bytes'
+    lines.append('# TYPE {} histogram'.format(name))
+    for kind, histogram in registry.get_payloads():
+        render_histogram(lines, name, 'kind="{}"'.format(kind), histogram)
+
+    executors = []
+    if loop and getattr(loop, '_default_executor', None):
+        executors.append(('default', loop._default_executor))
+
+    # Import here to avoid loading the API when metrics are not served
+    from .api import file
+    if file.IO_EXECUTOR:
+        executors.append(('files', file.IO_EXECUTOR))
+
+    if executors:
+        lines.append('# TYPE katana_executor_threads gauge')
+        lines.append('# TYPE katana_executor_queue_size gauge')
+        for executor_name, executor in executors:
+            threads, queue_size = get_executor_stats(executor)
+            lines.append('katana_executor_threads{{executor="{}"}} {}'.format(
+                executor_name,
+                threads,
+                ))
+            lines.append(
+                'katana_executor_queue_size{{executor="{}"}} {}'.format(
+                    executor_name,
+                    queue_size,
+                    )
+                )
+
+    if lag:
+        lines.append('# TYPE katana_event_loop_lag_seconds gauge')
+        lines.append('katana_event_loop_lag_seconds {}'.format(lag[0]))
+        lines.append('# TYPE katana_event_loop_lag_max_seconds gauge')
+        lines.append('katana_event_loop_lag_max_seconds {}'.format(lag[1]))
+
+    if SchemaRegistry.instance:
+        lines.append('# TYPE katana_schema_registry_generation gauge')
+        lines.append('katana_schema_registry_generation {}'.format(
+            SchemaRegistry.instance.generation,
+            ))
+
+    lines.append('# TYPE katana_process_resident_memory_bytes gauge')
+    lines.append('katana_process_resident_memory_bytes {}'.format(
+        get_process_rss(),
+        ))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class MetricsProtocol(asyncio.Protocol):
+    """Protocol to serve the metrics to HTTP clients.
+
+    The metrics are sent as response to any request, and the
+    connection is closed after the response is sent.
+
+    """
+
+    # Maximum size for the request headers
+    max_request_size = 8192
+
+    def __init__(self, listener):
+        self.__listener = listener
+        self.__transport = None
+        self.__data = b''
+
+    def connection_made(self, transport):
+        self.__transport = transport
+
+    def data_received(self, data):
+        self.__data += data
+        if b'\r\n\r\n' not in self.__data and b'\n\n' not in self.__data:
+            if len(self.__data) < self.max_request_size:
+                return
+
+        body = self.__listener.render().encode('utf8')
+        self.__transport.write(
+            'HTTP/1.0 200 OK\r\n'
+            'Content-Type: {}\r\n'
+            'Content-Length: {}\r\n'
+            '\r\n'.format(EXPOSITION_CONTENT_TYPE, len(body)).encode('utf8')
+            + body
+            )
+        self.__transport.close()
+
+
+class MetricsListener(object):
+    """Listener that serves the component metrics over HTTP.
+
+    The listener runs in the component event loop and also measures
+    the event loop lag, which is the time the loop takes to run a
+    callback after it is due.
+
+    """
+
+    def __init__(self, address, loop=None, lag_interval=1.0):
+        """Constructor.
+
+        The address is a local TCP port, or an IPC path for a unix
+        socket. IPC names starting with "@" use the abstract namespace.
+
+        :param address: A TCP port or an IPC path.
+        :type address: str
+        :param loop: Optional event loop.
+        :type loop: `BaseEventLoop`
+        :param lag_interval: Seconds between event loop lag checks.
+        :type lag_interval: float
+
+        """
+
+        self.__address = str(address)
+        self.__loop = loop or asyncio.get_event_loop()
+        self.__lag_interval = lag_interval
+        self.__lag = 0.0
+        self.__max_lag = 0.0
+        self.__server = None
+
+    def get_lag(self):
+        """Get the last and maximum event loop lag in seconds.
+
+        :rtype: tuple
+
+        """
+
+        return (self.__lag, self.__max_lag)
+
+    def render(self):
+        """Render the metrics in the text exposition format.
+
+        :rtype: str
+
+        """
+
+        return render_metrics(loop=self.__loop, lag=self.get_lag())
+
+    @asyncio.coroutine
+    def start(self):
+        """Start listening for metrics requests."""
+
+        factory = functools.partial(MetricsProtocol, self)
+        if self.__address.isdigit():
+            self.__server = yield from self.__loop.create_server(
+                factory,
+                '127.0.0.1',
+                int(self.__address),
+                )
+        else:
+            path = self.__address
+            if path.startswith('@'):
+                path = '\0' + path[1:]
+
+            self.__server = yield from self.__loop.create_unix_server(
+                factory,
+                path,
+                )
+
+    def stop(self):
+        """Stop listening for metrics requests."""
+
+        if self.__server:
+            self.__server.close()
+            self.__server = None
+
+    @asyncio.coroutine
+    def serve(self):
+        """Serve the metrics until the task is cancelled.
+
+        Errors starting the listener are logged so they don't stop
+        the component.
+
+        """
+
+        try:
+            yield from self.start()
+        except OSError as err:
+            LOG.error(
+                'Failed to serve metrics in "%s": %s',
+                self.__address,
+                err,
+                )
+            return
+
+        LOG.debug('Serving metrics in: "%s"', self.__address)
+        try:
+            while True:
+                start = self.__loop.time()
+                yield from asyncio.sleep(self.__lag_interval)
+                elapsed = self.__loop.time() - start
+                self.__lag = max(elapsed - self.__lag_interval, 0.0)
+                self.__max_lag = max(self.__max_lag, self.__lag)
+        finally:
+            self.stop()
@@ -22,7 +22,6 @@ from .payload import Payload
 from .payload import ResponsePayload
 from .payload import ServiceCallPayload
 from .server import ComponentServer
-from .utils import MultiDict
 
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
@@ -52,15 +51,16 @@ class MiddlewareServer(ComponentServer):
         if not payload.path_exists('request'):
             return
 
+        # Request values are converted by the HTTP request when used
         return {
             'method': payload.get('request/method'),
             'url': payload.get('request/url'),
             'protocol_version': payload.get('request/version'),
-            'query': MultiDict(payload.get('request/query', {})),
-            'headers': MultiDict(payload.get('request/headers', {})),
-            'post_data': MultiDict(payload.get('request/post_data', {})),
+            'query': payload.get('request/query', None),
+            'headers': payload.get('request/headers', None),
+            'post_data': payload.get('request/post_data', None),
             'body': payload.get('request/body'),
-            'files': MultiDict(payload.get('request/files', {})),
+            'files': payload.get('request/files', None),
             }
 
     @staticmethod
@@ -71,7 +71,7 @@ class MiddlewareServer(ComponentServer):
         code, text = payload.get('response/status').split(' ', 1)
         return {
             'version': payload.get('response/version', '1.1'),
-            'headers': MultiDict(payload.get('response/headers', {})),
+            'headers': payload.get('response/headers', None),
             'status_code': int(code),
             'status_text': text,
             'body': payload.get('response/body', ''),
@@ -112,6 +112,7 @@ class MiddlewareServer(ComponentServer):
             debug=self.debug,
             variables=self.variables,
             return_value=payload.get('return', NO_RETURN_VALUE),
+            rid=payload.get('meta/id', None),
             # TODO: Use meta and argument
             gateway_protocol=payload.get('meta/protocol'),
             gateway_addresses=payload.get('meta/gateway'),
@@ -178,7 +179,7 @@ class MiddlewareServer(ComponentServer):
                 version=http_response.get_protocol_version(),
                 status=http_response.get_status(),
                 body=http_response.get_body(),
-                headers=dict(http_response.get_headers_array()),
+                headers=http_response.get_headers_array().to_dict(),
                 )
         else:
             LOG.error('Invalid Middleware callback result')
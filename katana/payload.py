@@ -178,6 +178,24 @@ TRANSPORT_MERGEABLE_PATHS = (
     )
 
 
+def field_name(name):
+    """Get the name to use for a payload field.
+
+    The mapped field name is returned unless field mappings are disabled.
+
+    :param name: The full field name.
+    :type name: str
+
+    :rtype: str
+
+    """
+
+    if DISABLE_FIELD_MAPPINGS:
+        return name
+
+    return FIELD_MAPPINGS.get(name, name)
+
+
 def get_path(payload, path, default=EMPTY, mappings=None, delimiter=SEP):
     """Get payload dictionary value by path.
 
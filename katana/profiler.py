@@ -0,0 +1,236 @@
+"""
+Python 3 SDK for the KATANA(tm) Framework (http://katana.kusanagi.io)
+
+Copyright (c) 2016-2018 KUSANAGI S.L. All rights reserved.
+
+Distributed under the MIT license.
+
+For the full copyright and license information, please view the LICENSE
+file that was distributed with this source code.
+
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+from collections import Counter
+
+__license__ = "MIT"
+__copyright__ = "Copyright (c) 2016-2018 KUSANAGI S.L. (http://kusanagi.io)"
+
+LOG = logging.getLogger(__name__)
+
+# Default number of samples per second
+DEFAULT_RATE = 100
+
+# Stack root for the samples taken while no action is being processed
+IDLE = 'idle'
+
+
+def get_label(value):
+    """Get a name that can be used as a frame in a collapsed stack.
+
+    :param value: A name.
+    :type value: str
+
+    :rtype: str
+
+    """
+
+    return str(value).replace(';', '_').replace(' ', '_')
+
+
+class SamplingProfiler(object):
+    """Profiler that samples the Python stacks of all the threads.
+
+    Samples are taken from a background thread, so the profiled code
+    is not instrumented. Each sample is tagged with the action being
+    processed when it was taken, and the results are saved as collapsed
+    stacks that can be used by flamegraph tools.
+
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, get_action=None, directory=None):
+        """Constructor.
+
+        :param rate: Optional number of samples per second.
+        :type rate: int
+        :param get_action: Optional callable to get the current action.
+        :type get_action: callable
+        :param directory: Optional directory for the profile files.
+        :type directory: str
+
+        """
+
+        self.__interval = 1.0 / rate
+        self.__get_action = get_action
+        self.__directory = directory or tempfile.gettempdir()
+        self.__samples = Counter()
+        # Frame labels by code object
+        self.__labels = {}
+        self.__thread = None
+        self.__stop = None
+        self.__path = None
+
+    def is_running(self):
+        """Check if the profiler is taking samples.
+
+        :rtype: bool
+
+        """
+
+        return self.__thread is not None and not self.__stop.is_set()
+
+    def get_samples(self):
+        """Get the number of samples for each stack.
+
+        Stacks are tuples with the action, the thread name and the
+        frame labels starting from the outermost frame.
+
+        :rtype: `Counter`
+
+        """
+
+        return Counter(self.__samples)
+
+    def __get_frame_label(self, frame):
+        code = frame.f_code
+        label = self.__labels.get(code)
+        if label is None:
+            label = get_label('{}.{}'.format(
+                frame.f_globals.get('__name__', '?'),
+                code.co_name,
+                ))
+            self.__labels[code] = label
+
+        return label
+
+    def __sample(self, samples, stop):
+        own_ident = threading.get_ident()
+        get_action = self.__get_action
+        while not stop.wait(self.__interval):
+            action = get_label((get_action and get_action()) or IDLE)
+            names = {
+                thread.ident: get_label(thread.name)
+                for thread in threading.enumerate()
+                }
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(self.__get_frame_label(frame))
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                stack.append(action)
+                stack.reverse()
+                samples[tuple(stack)] += 1
+
+        # The file is written by the sampling thread so stopping
+        # the profiler doesn't block the event loop.
+        self.__path = self.__save(samples)
+
+    def __save(self, samples):
+        if not samples:
+            LOG.info('Profiler stopped without samples')
+            return
+
+        name = 'katana-profile-{}-{}.txt'.format(os.getpid(), int(time.time()))
+        path = os.path.join(self.__directory, name)
+        try:
+            with open(path, 'w') as file:
+                for stack, count in sorted(samples.items()):
+                    file.write('{} {}\n'.format(';'.join(stack), count))
+        except OSError:
+            LOG.exception('Failed to save profile: "%s"', path)
+            return
+
+        LOG.info('Profile saved to: "%s"', path)
+        return path
+
+    def start(self):
+        """Start taking samples."""
+
+        if self.is_running():
+            return
+
+        LOG.info('Starting profiler ...')
+        # Each run uses its own samples and event, so a new run can start
+        # while the previous one is still being saved.
+        self.__samples = Counter()
+        self.__stop = threading.Event()
+        self.__path = None
+        self.__thread = threading.Thread(
+            target=self.__sample,
+            args=(self.__samples, self.__stop),
+            name='katana-profiler',
+            daemon=True,
+            )
+        self.__thread.start()
+
+    def stop(self, wait=True):
+        """Stop taking samples and save them to a file.
+
+        The file is saved by the sampling thread. When `wait` is False
+        the method returns without waiting for the file to be saved.
+
+        When the profiler is already stopped this waits for the last
+        file to be saved.
+
+        :param wait: Optionally wait until the file is saved.
+        :type wait: bool
+
+        :returns: The path to the profile file, or None when no samples
+            were taken or when not waiting.
+        :rtype: str
+
+        """
+
+        if not self.__thread:
+            return
+
+        self.__stop.set()
+        if not wait:
+            return
+
+        self.__thread.join()
+        return self.__path
+
+    def toggle(self):
+        """Start taking samples or stop and save them.
+
+        The profiler doesn't wait for the file to be saved, so it can be
+        toggled from the event loop.
+
+        """
+
+        if self.is_running():
+            self.stop(wait=False)
+        else:
+            self.start()
+
+    @asyncio.coroutine
+    def __cleanup(self, ctx):
+        # Save the samples when the component stops while profiling
+        yield from ctx.loop.run_in_executor(None, self.stop)
+
+    def register(self, ctx, signum=signal.SIGUSR2):
+        """Toggle the profiler with a signal while a run context runs.
+
+        :param ctx: The run context.
+        :type ctx: `RunContext`
+        :param signum: Optional signal number to toggle the profiler.
+        :type signum: int
+
+        """
+
+        ctx.add_signal_handler(signum, self.toggle)
+        ctx.register_callback(self.__cleanup)
@@ -24,6 +24,8 @@ class SchemaRegistry(object, metaclass=Singleton):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__mappings = Payload()
+        self.__generation = 0
+        self.__cache = {}
 
     @staticmethod
     def is_empty(value):
@@ -45,6 +47,16 @@ class SchemaRegistry(object, metaclass=Singleton):
 
         return len(self.__mappings) > 0
 
+    @property
+    def generation(self):
+        """Get the number of times the mappings were updated.
+
+        :rtype: int
+
+        """
+
+        return self.__generation
+
     def update_registry(self, mappings):
         """Update schema registry with mappings info.
 
@@ -54,6 +66,30 @@ class SchemaRegistry(object, metaclass=Singleton):
         """
 
         self.__mappings = Payload(mappings or {})
+        self.__generation += 1
+        # Values cached for previous mappings are not valid anymore
+        self.__cache = {}
+
+    def get_cached(self, key, factory):
+        """Get a value cached for the current mappings.
+
+        The factory is called to create the value when it is not cached.
+        All cached values are discarded when the mappings are updated.
+
+        :param key: Key for the cached value.
+        :type key: object
+        :param factory: Callable that creates the value.
+        :type factory: function
+
+        :rtype: object
+
+        """
+
+        try:
+            return self.__cache[key]
+        except KeyError:
+            value = self.__cache[key] = factory()
+            return value
 
     def path_exists(self, path):
         """Check if a path is available.
@@ -15,6 +15,7 @@ import logging
 from ..errors import KatanaError
 from ..logging import INFO
 from ..logging import value_to_log_string
+from ..metrics import get_metrics_registry
 from ..schema import SchemaRegistry
 from ..utils import Singleton
 
@@ -170,3 +171,26 @@ class Component(object, metaclass=Singleton):
         """
 
         self.__logger.log(level, value_to_log_string(value))
+
+    def get_metrics(self):
+        """Get the request metrics for the component actions.
+
+        Metrics contain the number of requests, errors and timeouts, and
+        a latency histogram for each action.
+
+        :returns: The metrics by action name.
+        :rtype: dict
+
+        """
+
+        return get_metrics_registry().get_metrics()
+
+    def dump_metrics(self, level=INFO):
+        """Write the request metrics for the component actions to the logs.
+
+        :param level: Optional logging level.
+        :type level: int
+
+        """
+
+        self.log(self.get_metrics(), level=level)
@@ -24,6 +24,8 @@ from ..errors import KatanaError
 from ..logging import disable_logging
 from ..logging import setup_katana_logging
 from ..logging import SYSLOG_NUMERIC
+from ..metrics import MetricsListener
+from ..profiler import SamplingProfiler
 from ..utils import EXIT_ERROR
 from ..utils import EXIT_OK
 from ..utils import install_uvevent_loop
@@ -256,6 +258,26 @@ class ComponentRunner(object):
                     ),
                 type=click.IntRange(0, 7, clamp=True),
                 ),
+            click.option(
+                '--log-queue',
+                is_flag=True,
+                help=(
+                    'Write logs from a background thread using a bounded '
+                    'queue.'
+                    ),
+                ),
+            click.option(
+                '--metrics',
+                help='Serve metrics in a local TCP port or IPC path.',
+                ),
+            click.option(
+                '--profile-rate',
+                help=(
+                    'Enable a sampling profiler that is started and stopped '
+                    'with SIGUSR2, using a rate in samples per second.'
+                    ),
+                type=click.IntRange(1, 1000, clamp=True),
+                ),
             click.option(
                 '-n', '--name',
                 required=True,
@@ -270,6 +292,14 @@ class ComponentRunner(object):
                 '-s', '--socket',
                 help='IPC socket name.',
                 ),
+            click.option(
+                '--slow-threshold',
+                help=(
+                    'Log requests that take longer than the threshold, '
+                    'in milliseconds.'
+                    ),
+                type=click.IntRange(1, None),
+                ),
             click.option(
                 '-t', '--tcp',
                 help='TCP port to use when IPC socket is not used.',
@@ -353,6 +383,7 @@ class ComponentRunner(object):
                 kwargs['version'],
                 kwargs['framework_version'],
                 SYSLOG_NUMERIC[log_level],
+                use_queue=kwargs.get('log_queue', False),
                 )
         else:
             # No logs are printed when log-level is not available
@@ -368,6 +399,7 @@ class ComponentRunner(object):
                 message['payload'] = json.loads(contents)
             except:
                 LOG.exception('Stdin input value is not valid JSON')
+                logging.shutdown()
                 os._exit(EXIT_ERROR)
 
             # Add action name to message
@@ -416,6 +448,18 @@ class ComponentRunner(object):
 
             server_task = self.loop.create_task(server.listen(channel))
 
+            # Serve metrics in the same loop as the component server
+            if self.args.get('metrics'):
+                listener = MetricsListener(self.args['metrics'], self.loop)
+                ctx.tasks.append(self.loop.create_task(listener.serve()))
+
+            if self.args.get('profile_rate'):
+                profiler = SamplingProfiler(
+                    self.args['profile_rate'],
+                    get_action=lambda: server.current_action,
+                    )
+                profiler.register(ctx)
+
         ctx.tasks.append(server_task)
 
         # By default exit successfully
@@ -467,4 +511,6 @@ class ComponentRunner(object):
         if exit_code == EXIT_OK:
             LOG.info('Operation complete')
 
+        # Exit skips the interpreter cleanup so logs must be flushed here
+        logging.shutdown()
         os._exit(exit_code)
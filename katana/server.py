@@ -13,6 +13,7 @@ file that was distributed with this source code.
 import asyncio
 import logging
 import os
+import time
 
 from collections import namedtuple
 
@@ -21,6 +22,8 @@ import zmq.asyncio
 from .errors import KatanaError
 from .json import serialize
 from .logging import RequestLogger
+from .metrics import get_metrics_registry
+from .metrics import PhaseTimer
 from .payload import CommandPayload
 from .payload import CommandResultPayload
 from .payload import ErrorPayload
@@ -44,6 +47,9 @@ DL = DOWNLOAD = b'\x04'
 # Allowed response meta values
 META_VALUES = (EMPTY_META, SE, FI, TR, DL)
 
+# Minimum seconds between slow request logs
+SLOW_LOG_INTERVAL = 1.0
+
 # Multipart request frames
 Frames = namedtuple('Frames', ['action', 'mappings', 'stream'])
 
@@ -84,6 +90,14 @@ class ComponentServer(object):
         self.__args = args
         self.__socket = None
         self.__registry = get_schema_registry()
+        self.__metrics = get_metrics_registry()
+        self.__action = None
+
+        # Requests that take longer than the threshold are logged
+        threshold = args.get('slow_threshold')
+        self.__slow_threshold = threshold / 1000.0 if threshold else None
+        self.__slow_logged = None
+        self.__slow_suppressed = 0
 
         # Check the first callback to see if asyncio is being used,
         # otherwise callbacks are standard python callables.
@@ -129,6 +143,10 @@ class ComponentServer(object):
     def variables(self):
         return self.__args.get('var')
 
+    @property
+    def current_action(self):
+        return self.__action
+
     @property
     def component_title(self):
         return '"{}" ({})'.format(self.component_name, self.component_version)
@@ -182,6 +200,17 @@ class ComponentServer(object):
 
         raise NotImplementedError()
 
+    def get_runtime_calls(self):
+        """Get the durations of the run-time calls of the last request.
+
+        By default components don't make run-time calls.
+
+        :rtype: list
+
+        """
+
+        return []
+
     def get_response_meta(self, payload):
         """Get metadata for multipart response.
 
@@ -213,11 +242,11 @@ class ComponentServer(object):
             LOG.exception('Failed to update schemas')
 
     @asyncio.coroutine
-    def __process_request_payload(self, action, payload):
+    def __process_request_payload(self, action, payload, timer=None):
         # Call request handler and send response back
         cmd = CommandPayload(payload)
         try:
-            payload = yield from self.process_payload(action, cmd)
+            payload = yield from self.process_payload(action, cmd, timer)
         except asyncio.CancelledError:
             # Avoid logging task cancel errors by catching it here
             raise
@@ -231,7 +260,7 @@ class ComponentServer(object):
         return payload
 
     @asyncio.coroutine
-    def __process_request(self, stream):
+    def __process_request(self, stream, timer):
         try:
             frames = Frames(*stream)
         except asyncio.CancelledError:
@@ -244,6 +273,8 @@ class ComponentServer(object):
         if frames.mappings:
             self.__update_schema_registry(frames.mappings)
 
+        timer.mark('mappings')
+
         # Get action name
         action = frames.action.decode('utf8')
         if action not in self.callbacks:
@@ -254,6 +285,10 @@ class ComponentServer(object):
                 action,
                 )
 
+        timer.action = self.__action = action
+        timer.request_size = len(frames.stream)
+        self.__metrics.observe_payload('request', timer.request_size)
+
         # Get command payload from request stream
         try:
             payload = unpack(frames.stream)
@@ -263,18 +298,97 @@ class ComponentServer(object):
             LOG.exception('Received an invalid message format')
             return create_error_stream('Internal communication failed')
 
-        payload = yield from self.__process_request_payload(action, payload)
+        timer.mark('unpack')
+        payload = yield from self.__process_request_payload(
+            action,
+            payload,
+            timer,
+            )
+        meta = self.get_response_meta(payload) or EMPTY_META
+        timer.mark('meta')
+        response = pack(payload)
+        timer.mark('pack')
+        timer.response_size = len(response)
+        self.__metrics.observe_payload('response', timer.response_size)
+
+        return [meta, response]
+
+    def __log_phases(self, timer):
+        """Register the phase timings of a request.
+
+        In debug mode the timings are also written to the request logs.
 
-        return [self.get_response_meta(payload) or EMPTY_META, pack(payload)]
+        :param timer: The timer for the request phases.
+        :type timer: `PhaseTimer`
+
+        """
+
+        self.__metrics.observe_phases(timer.action, timer.phases)
+        if self.debug:
+            RequestLogger(timer.request_id, __name__).debug(
+                'Request phases for "%s": %s total=%.3fms',
+                timer.action,
+                timer.format(),
+                timer.get_total() * 1000,
+                )
+
+        if self.__slow_threshold:
+            duration = timer.get_total()
+            if duration > self.__slow_threshold:
+                self.__log_slow_request(timer, duration)
+
+    def __log_slow_request(self, timer, duration):
+        """Write a log record for a request that exceeds the threshold.
+
+        Only one record is written every `SLOW_LOG_INTERVAL` seconds.
+        The number of slow requests that were not logged is added to
+        the next record.
+
+        :param timer: The timer for the request phases.
+        :type timer: `PhaseTimer`
+        :param duration: Seconds spent processing the request.
+        :type duration: float
+
+        """
+
+        now = time.monotonic()
+        if self.__slow_logged and now - self.__slow_logged < SLOW_LOG_INTERVAL:
+            self.__slow_suppressed += 1
+            return
+
+        self.__slow_logged = now
+        calls = self.get_runtime_calls()
+        data = {
+            'action': timer.action,
+            'request_id': timer.request_id,
+            'duration_ms': round(duration * 1000, 3),
+            'request_size': timer.request_size,
+            'response_size': timer.response_size,
+            'phases_ms': {
+                phase: round(elapsed * 1000, 3)
+                for phase, elapsed in timer.phases
+                },
+            'runtime_calls': len(calls),
+            'runtime_call_ms': round(sum(calls) * 1000, 3),
+            'suppressed': self.__slow_suppressed,
+            }
+        self.__slow_suppressed = 0
+        RequestLogger(timer.request_id, __name__).warning(
+            'Slow request: %s',
+            serialize(data, encoding=None),
+            extra={'slow_request': data},
+            )
 
     @asyncio.coroutine
-    def process_payload(self, action, payload):
+    def process_payload(self, action, payload, timer=None):
         """Process a request payload.
 
         :param action: Name of action that must process payload.
         :type action: str
         :param payload: A command payload.
         :type payload: CommandPayload
+        :param timer: Optional timer for the request phases.
+        :type timer: `PhaseTimer`
 
         :returns: A Payload with the component response.
         :rtype: coroutine.
@@ -285,9 +399,9 @@ class ComponentServer(object):
             LOG.error("Invalid request: Command payload is missing")
             return ErrorPayload.new('Internal communication failed').entity()
 
+        timer = timer or PhaseTimer()
+        timer.request_id = payload.request_id
         command_name = payload.get('command/name')
-        # Create a request logger using the request ID from the command payload
-        rlog = RequestLogger(payload.request_id, __name__)
         # Create a variable to hold extra command reply result values.
         # This is used for example to the request attributes.
         # Because extra is passed by reference any modification by the
@@ -300,7 +414,9 @@ class ComponentServer(object):
         if not component:
             return ErrorPayload.new('Internal communication failed').entity()
 
+        timer.mark('component')
         error = None
+        start = time.perf_counter()
         try:
             if self.__use_async:
                 # Call callback asynchronusly
@@ -316,6 +432,7 @@ class ComponentServer(object):
             # Avoid logging task cancel errors by catching it here.
             raise
         except KatanaError as exc:
+            timer.mark('callback')
             error = exc
             payload = self.create_error_payload(
                 exc,
@@ -323,13 +440,25 @@ class ComponentServer(object):
                 payload=payload,
                 )
         except Exception as exc:
-            rlog.exception('Component failed')
+            timer.mark('callback')
+            RequestLogger(timer.request_id, __name__).exception(
+                'Component failed',
+                )
             error = exc
             payload = ErrorPayload.new(str(exc)).entity()
         else:
+            timer.mark('callback')
             payload = self.component_to_payload(payload, component)
 
+        self.__metrics.observe(
+            action,
+            time.perf_counter() - start,
+            error is not None,
+            )
+
         if error and self.error_callback:
+            # Request logger is only created when it is used
+            rlog = RequestLogger(timer.request_id, __name__)
             rlog.debug('Running error callback ...')
             try:
                 self.error_callback(error)
@@ -341,7 +470,9 @@ class ComponentServer(object):
             payload.update(extra)
 
         # Convert callback result to a command payload
-        return CommandResultPayload.new(command_name, payload).entity()
+        payload = CommandResultPayload.new(command_name, payload).entity()
+        timer.mark('result')
+        return payload
 
     @asyncio.coroutine
     def process_input(self, message):
@@ -409,16 +540,23 @@ class ComponentServer(object):
                 events = dict(events)
 
                 if events.get(self.__socket) == zmq.POLLIN:
+                    timer = PhaseTimer()
                     # Get request multipart stream
                     stream = yield from self.__socket.recv_multipart()
+                    timer.mark('recv')
 
                     # Process request and get response stream
                     try:
                         stream = yield from asyncio.wait_for(
-                            self.__process_request(stream),
+                            self.__process_request(stream, timer),
                             timeout=timeout,
                             )
                     except asyncio.TimeoutError:
+                        timer.mark('timeout')
+                        action = stream[0].decode('utf8', 'replace')
+                        if action in self.callbacks:
+                            self.__metrics.timeout(action)
+
                         msg = 'SDK execution timed out after {}ms'.format(
                             int(timeout * 1000),
                             pid,
@@ -431,6 +569,10 @@ class ComponentServer(object):
                         stream = error_stream
 
                     yield from self.__socket.send_multipart(stream)
+                    timer.mark('send')
+                    self.__action = None
+                    if timer.action:
+                        self.__log_phases(timer)
         except:
             self.stop()
             raise
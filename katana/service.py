@@ -37,6 +37,7 @@ class ServiceServer(ComponentServer):
         self.__component = get_component()
         self.__return_value = None
         self.__transport = None
+        self.__runtime_calls = []
 
     @staticmethod
     def get_type():
@@ -117,6 +118,7 @@ class ServiceServer(ComponentServer):
         # TODO: This should use the extra argument that this method receives
         #       See middlewares and "attributes".
         self.__return_value = Payload()
+        self.__runtime_calls = []
 
         return Action(
             action,
@@ -130,8 +132,18 @@ class ServiceServer(ComponentServer):
             variables=self.variables,
             debug=self.debug,
             return_value=self.__return_value,
+            runtime_calls=self.__runtime_calls,
             )
 
+    def get_runtime_calls(self):
+        """Get the durations of the run-time calls of the last request.
+
+        :rtype: list
+
+        """
+
+        return self.__runtime_calls
+
     def component_to_payload(self, payload, *args, **kwargs):
         """Convert component to a command result payload.
 
@@ -536,6 +536,33 @@ class LookupDict(dict):
 
         """
 
+        self.__get_list(path, delimiter).append(value)
+        return self
+
+    def extend(self, path, values, delimiter=DELIMITER):
+        """Extend a list by key path.
+
+        It works like `push` but all the given values are appended
+        to the list in a single operation.
+
+        :param path: Path to a value.
+        :type path: str
+        :param values: Values to append to the list in the give path.
+        :type values: list
+        :param delimiter: Optional path delimiter.
+        :type delimiter: str
+
+        :raises: TypeError
+
+        :returns: Current instance.
+        :rtype: `LookupDict`
+
+        """
+
+        self.__get_list(path, delimiter).extend(values)
+        return self
+
+    def __get_list(self, path, delimiter):
         item = self
         parts = path.split(delimiter)
         last_part_index = len(parts) - 1
@@ -555,8 +582,7 @@ class LookupDict(dict):
                     # When last key exists it must be a list
                     raise TypeError(name)
 
-                item[name].append(value)
-                break
+                return item[name]
 
             if name not in item:
                 item[name] = {}
@@ -567,8 +593,6 @@ class LookupDict(dict):
             else:
                 raise TypeError(part)
 
-        return self
-
     def merge(self, path, value, delimiter=DELIMITER):
         """Merge a dictionary value into a location.
 
@@ -696,12 +720,29 @@ class RunContext(object):
         self.__terminate = False
         self.__cleaned = False
         self.__callbacks = []
+        self.__signal_handlers = []
         self.tasks = []
         self.loop = loop
 
     def hook_signals(self):
         self.loop.add_signal_handler(signal.SIGTERM, self.terminate)
         self.loop.add_signal_handler(signal.SIGINT, self.terminate)
+        for signum, callback in self.__signal_handlers:
+            self.loop.add_signal_handler(signum, callback)
+
+    def add_signal_handler(self, signum, callback):
+        """Add a handler for a signal.
+
+        Handlers are hooked to the event loop when the context runs.
+
+        :param signum: The signal number.
+        :type signum: int
+        :param callback: Callable to call when the signal is received.
+        :type callback: callable
+
+        """
+
+        self.__signal_handlers.append((signum, callback))
 
     def terminate(self, *args, **kwargs):
         self.__terminate = True
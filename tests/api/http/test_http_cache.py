@@ -0,0 +1,167 @@
+from katana import urn
+from katana.api.http.cache import get_max_age
+from katana.api.http.cache import parse_cache_control
+from katana.api.http.cache import ResponseCache
+from katana.api.request import Request
+from katana.api.response import Response
+from katana.api.transport import Transport
+from katana.schema import SchemaRegistry
+
+VALUES = {
+    'attributes': {},
+    'component': object(),
+    'path': '/path/to/file.py',
+    'name': 'dummy',
+    'version': '1.0',
+    'framework_version': '1.0.0',
+    'client_address': '205.81.5.62:7681',
+    'gateway_protocol': urn.HTTP,
+    'gateway_addresses': ['12.34.56.78:1234', 'http://127.0.0.1:80'],
+    }
+
+
+def create_request(method='GET', url='http://foo.com/bar', headers=None):
+    return Request(http_request={
+        'method': method,
+        'url': url,
+        'headers': headers,
+        }, **VALUES)
+
+
+def create_response(request, status_code=200, headers=None, body='BODY'):
+    return Response(
+        Transport({}),
+        http_request={
+            'method': request.get_http_request().get_method(),
+            'url': request.get_http_request().get_url(),
+            'headers': request.get_http_request().get_headers_array(),
+            },
+        http_response={
+            'status_code': status_code,
+            'status_text': 'OK',
+            'headers': headers,
+            'body': body,
+            },
+        **VALUES
+        )
+
+
+def test_api_http_cache_control():
+    directives = parse_cache_control('Public, max-age=10, s-maxage="20"')
+    assert directives == {'public': None, 'max-age': '10', 's-maxage': '20'}
+    assert parse_cache_control('') == {}
+
+    assert get_max_age(directives, 5) == 20
+    assert get_max_age({'max-age': '10'}, 5) == 10
+    assert get_max_age({'max-age': 'invalid'}, 5) == 0
+    assert get_max_age({}, 5) == 5
+
+
+def test_api_http_response_cache(mocker):
+    SchemaRegistry()
+    monotonic = mocker.patch('time.monotonic', return_value=100.0)
+    cache = ResponseCache(ttl=10, vary=['Accept'])
+
+    # Nothing is cached at the beginning
+    request = create_request(headers={'Accept': ['text/plain']})
+    assert cache.get_response(request) is None
+
+    response = create_response(request, headers={'X-Type': ['A', 'B']})
+    assert cache.store(response)
+
+    # Cached responses are returned as new responses
+    monotonic.return_value = 105.0
+    cached = cache.get_response(request)
+    assert isinstance(cached, Response)
+    http_response = cached.get_http_response()
+    assert http_response.get_status() == '200 OK'
+    assert http_response.get_body() == 'BODY'
+    assert http_response.get_header_array('X-Type') == ['A', 'B']
+    assert http_response.get_header('Age') == '5'
+
+    # The response callbacks get the served response with its Age header.
+    # It is not stored again, so the entry still expires after the TTL.
+    served = create_response(request, headers={
+        'X-Type': ['A', 'B'],
+        'Age': ['5'],
+        })
+    assert not cache.store(served)
+
+    # Vary headers are part of the key
+    assert cache.get_response(create_request()) is None
+    # Responses expire after the TTL
+    monotonic.return_value = 110.0
+    assert cache.get_response(request) is None
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 3
+    assert stats['hit_ratio'] == 0.25
+    assert stats['entries'] == 0
+    assert stats['size'] == 0
+
+    # Cache-Control max age is used as TTL
+    response = create_response(request, headers={
+        'Cache-Control': ['max-age=100'],
+        })
+    assert cache.store(response)
+    monotonic.return_value = 200.0
+    assert cache.get_response(request) is not None
+    assert cache.get_stats()['size'] > 0
+
+    # Requests can skip the cache
+    no_cache = create_request(headers={
+        'Accept': ['text/plain'],
+        'Cache-Control': ['no-cache'],
+        })
+    assert cache.get_response(no_cache) is None
+
+    cache.clear()
+    assert cache.get_stats()['entries'] == 0
+
+    # Check responses that are not cached
+    assert not cache.store(create_response(request, status_code=500))
+    assert not cache.store(create_response(create_request('POST')))
+    for value in ('no-store', 'private', 'no-cache', 'max-age=0'):
+        headers = {'Cache-Control': [value]}
+        assert not cache.store(create_response(request, headers=headers))
+
+    headers = {'Set-Cookie': ['a=1']}
+    assert not cache.store(create_response(request, headers=headers))
+
+    # Authorized requests are only cached when the response is public
+    request = create_request(headers={'Authorization': ['Basic xx']})
+    assert not cache.store(create_response(request))
+    headers = {'Cache-Control': ['public']}
+    assert cache.store(create_response(request, headers=headers))
+
+
+def test_api_http_response_cache_limits():
+    SchemaRegistry()
+    cache = ResponseCache(max_entries=2)
+    requests = [
+        create_request(url='http://foo.com/{}'.format(index))
+        for index in range(3)
+        ]
+    for request in requests:
+        assert cache.store(create_response(request))
+
+    # Least recently used responses are removed first
+    assert cache.get_stats()['entries'] == 2
+    assert cache.get_response(requests[0]) is None
+    assert cache.get_response(requests[1]) is not None
+    assert cache.store(create_response(requests[0]))
+    assert cache.get_response(requests[2]) is None
+    assert cache.get_response(requests[1]) is not None
+
+    # Responses are limited by size
+    size = cache.get_stats()['size'] // 2
+    cache = ResponseCache(max_size=size)
+    assert cache.store(create_response(requests[0]))
+    assert not cache.store(create_response(requests[1], body='BODY' * 10))
+    assert cache.get_stats()['entries'] == 1
+
+    # Responses are only cached for HTTP
+    request = create_request()
+    request._Request__gateway_protocol = urn.KTP
+    assert cache.get_response(request) is None
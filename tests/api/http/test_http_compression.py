@@ -0,0 +1,137 @@
+import gzip
+import zlib
+
+import pytest
+
+from katana import urn
+from katana.api.http.compression import compress
+from katana.api.http.compression import negotiate_encoding
+from katana.api.http.compression import parse_accept_encoding
+from katana.api.http.compression import ResponseCompressor
+from katana.api.response import Response
+from katana.api.transport import Transport
+from katana.schema import SchemaRegistry
+
+VALUES = {
+    'attributes': {},
+    'component': object(),
+    'path': '/path/to/file.py',
+    'name': 'dummy',
+    'version': '1.0',
+    'framework_version': '1.0.0',
+    'client_address': '205.81.5.62:7681',
+    'gateway_protocol': urn.HTTP,
+    'gateway_addresses': ['12.34.56.78:1234', 'http://127.0.0.1:80'],
+    }
+
+BODY = 'Lorem ipsum dolor sit amet. ' * 100
+
+
+def create_response(accept='gzip', status_code=200, headers=None, body=BODY):
+    return Response(
+        Transport({}),
+        http_request={
+            'method': 'GET',
+            'url': 'http://foo.com/bar',
+            'headers': {'Accept-Encoding': [accept]} if accept else {},
+            },
+        http_response={
+            'status_code': status_code,
+            'status_text': 'OK',
+            'headers': headers,
+            'body': body,
+            },
+        **VALUES
+        )
+
+
+def test_api_http_accept_encoding():
+    assert parse_accept_encoding('') == {}
+    assert parse_accept_encoding('GZip, deflate;q=0.5, br;q=x') == {
+        'gzip': 1.0,
+        'deflate': 0.5,
+        'br': 0.0,
+        }
+
+    assert negotiate_encoding('gzip, deflate') == 'gzip'
+    assert negotiate_encoding('gzip;q=0.5, deflate') == 'deflate'
+    assert negotiate_encoding('gzip;q=0, deflate;q=0') is None
+    assert negotiate_encoding('*') == 'gzip'
+    assert negotiate_encoding('*, gzip;q=0') == 'deflate'
+    assert negotiate_encoding('identity') is None
+    assert negotiate_encoding('gzip', encodings=('deflate', )) is None
+
+
+def test_api_http_compress():
+    data = BODY.encode('utf8')
+    assert gzip.decompress(compress(data, 'gzip')) == data
+    assert zlib.decompress(compress(data, 'deflate')) == data
+
+
+def test_api_http_response_compressor():
+    SchemaRegistry()
+    with pytest.raises(ValueError):
+        ResponseCompressor(encodings=('br', ))
+
+    compressor = ResponseCompressor(min_size=100)
+
+    response = create_response(headers={'Content-Length': [str(len(BODY))]})
+    assert compressor.compress(response) == 'gzip'
+    http_response = response.get_http_response()
+    body = http_response.get_body()
+    assert gzip.decompress(body) == BODY.encode('utf8')
+    assert http_response.get_header('Content-Encoding') == 'gzip'
+    assert http_response.get_header('Vary') == 'Accept-Encoding'
+    assert http_response.get_header('Content-Length') == str(len(body))
+    assert compressor.get_stats() == {
+        'hits': 0,
+        'misses': 1,
+        'entries': 1,
+        'size': len(body),
+        }
+
+    # Identical bodies are compressed once
+    response = create_response()
+    assert compressor.compress(response) == 'gzip'
+    assert response.get_http_response().get_body() == body
+    assert not response.get_http_response().has_header('Content-Length')
+    assert compressor.get_stats()['hits'] == 1
+
+    # Each encoding is cached separately
+    response = create_response(accept='deflate')
+    assert compressor.compress(response) == 'deflate'
+    assert zlib.decompress(response.get_http_response().get_body()) == (
+        BODY.encode('utf8')
+        )
+    assert compressor.get_stats()['entries'] == 2
+
+    # Responses that are not compressed
+    for response in (
+            create_response(accept=None),
+            create_response(accept='br'),
+            create_response(body='small'),
+            create_response(status_code=304),
+            create_response(headers={'Content-Encoding': ['br']}),
+            create_response(headers={'Cache-Control': ['no-transform']}),
+            ):
+        body = response.get_http_response().get_body()
+        assert compressor.compress(response) is None
+        assert response.get_http_response().get_body() == body
+
+    assert compressor.get_stats()['misses'] == 2
+
+
+def test_api_http_response_compressor_limits():
+    SchemaRegistry()
+    compressor = ResponseCompressor(min_size=0, cache_entries=2)
+    for index in range(3):
+        compressor.compress(create_response(body='body {}'.format(index)))
+
+    stats = compressor.get_stats()
+    assert stats['entries'] == 2
+    assert stats['misses'] == 3
+
+    # Compressed bodies bigger than the cache are not cached
+    compressor = ResponseCompressor(min_size=0, cache_size=10)
+    assert compressor.compress(create_response()) == 'gzip'
+    assert compressor.get_stats()['entries'] == 0
@@ -0,0 +1,43 @@
+from katana.api.http.headers import HttpHeaders
+
+
+def test_api_http_headers():
+    headers = HttpHeaders()
+    assert headers == {}
+    assert not headers.has('X-Type')
+    assert headers.get_name('X-Type') is None
+    assert headers.getall('X-Type') is None
+    assert headers.getall('X-Type', []) == []
+    assert headers.getone('X-Type') is None
+    assert headers.getone('X-Type', 'A') == 'A'
+
+    # Header names are case insensitive and keep the first casing used
+    headers.append('X-Type', 'A')
+    headers['x-type'] = 'B'
+    assert headers.has('X-TYPE')
+    assert headers.get_name('x-TYPE') == 'X-Type'
+    assert headers.getall('x-type') == ['A', 'B']
+    assert headers.getone('x-type') == 'A'
+    assert headers.to_dict() == {'X-Type': ['A', 'B']}
+    assert dict(headers) == headers.to_dict()
+
+    del headers['X-Type']
+    assert not headers.has('x-type')
+    assert headers == {}
+
+    # Create headers with values
+    values = ['A']
+    headers = HttpHeaders({'X-Type': values})
+    assert headers.getall('x-type') is values
+    assert headers.get_name('X-TYPE') == 'X-Type'
+
+    headers = HttpHeaders({'X-Type': values, 'X-Single': 'B'})
+    assert headers.getall('X-TYPE') is values
+    assert headers.getall('X-SINGLE') == ['B']
+
+    headers = HttpHeaders([
+        ('X-Type', ['A']),
+        ('x-type', ['B']),
+        ('x-type', 'C'),
+        ])
+    assert headers == {'X-Type': ['A', 'B', 'C']}
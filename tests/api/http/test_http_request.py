@@ -1,3 +1,5 @@
+from urllib.parse import urlparse
+
 from katana.api.http.request import HttpRequest
 from katana.api.file import File
 from katana.api.file import payload_to_file
@@ -151,3 +153,30 @@ def test_api_http_request_files():
     assert request.has_file('test')
     assert request.get_file('test') == file
     assert list(request.get_files()) == [file]
+
+
+def test_api_http_request_lazy(mocker):
+    parse = mocker.patch('katana.api.http.request.urlparse', wraps=urlparse)
+    # Request values can be plain dictionaries
+    request = HttpRequest(
+        'GET',
+        'http://foo.com/bar/index/',
+        query={'a': ['1']},
+        post_data={'b': ['2', '3']},
+        headers={'X-Type': ['json']},
+        )
+
+    # URL is only parsed once when it is used
+    assert not parse.called
+    assert request.get_url_host() == 'foo.com'
+    assert request.get_url_path() == '/bar/index'
+    parse.assert_called_once_with('http://foo.com/bar/index/')
+
+    # Values are converted when they are used
+    assert request.get_query_param('a') == '1'
+    assert isinstance(request.get_query_params_array(), MultiDict)
+    assert request.get_post_param_array('b') == ['2', '3']
+    assert isinstance(request.get_post_params_array(), MultiDict)
+    assert request.get_header('x-type') == 'json'
+    assert request.get_headers_array() == {'X-TYPE': ['json']}
+    assert list(request.get_files()) == []
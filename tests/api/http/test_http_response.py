@@ -87,3 +87,13 @@ def test_api_http_response_body():
     assert response.set_body(content=expected) == response
     assert response.get_body() == expected
     assert response.has_body()
+
+
+def test_api_http_response_headers_case():
+    response = HttpResponse(200, 'OK', headers=[('X-Type', ['A'])])
+
+    # Headers with different casing are merged
+    response.set_header('x-type', 'B')
+    assert response.get_header_array('X-TYPE') == ['A', 'B']
+    assert response.get_headers_array() == {'X-Type': ['A', 'B']}
+    assert response.get_header('X-Missing', 'C') == 'C'
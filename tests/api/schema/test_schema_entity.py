@@ -0,0 +1,72 @@
+import pytest
+
+from katana.api.schema.action import ActionSchema
+from katana.api.schema.entity import compile_entity
+from katana.api.schema.entity import EntityValidationError
+from katana.api.schema.entity import EntityValidator
+from katana.payload import FIELD_MAPPINGS
+from katana.payload import Payload
+
+
+def test_api_schema_entity_compile():
+    check = compile_entity({
+        'field': [
+            {'name': 'id', 'type': 'integer', 'optional': False},
+            {'name': 'name', 'type': 'string', 'optional': True},
+            ],
+        'fields': [{
+            'name': 'contact',
+            'optional': False,
+            'field': [{'name': 'email', 'type': 'string', 'optional': False}],
+            }],
+        })
+
+    # Valid entities have no reason
+    assert check({'id': 1, 'contact': {'email': 'a@b.c'}}) is None
+    assert check({'id': 1, 'name': 'foo', 'contact': {'email': ''}}) is None
+
+    # Check invalid entities
+    assert check([]) == 'entity is not an object'
+    assert check({'contact': {'email': ''}}) == 'field "id" is missing'
+    assert check({'id': True, 'contact': {'email': ''}}) == (
+        'field "id" has an invalid type'
+        )
+    assert check({'id': 1, 'name': 1, 'contact': {'email': ''}}) == (
+        'field "name" has an invalid type'
+        )
+    assert check({'id': 1}) == 'fieldset "contact" is missing'
+    assert check({'id': 1, 'contact': 1}) == 'contact is not an object'
+    assert check({'id': 1, 'contact': {}}) == (
+        'field "contact/email" is missing'
+        )
+
+
+def test_api_schema_entity_validator(read_json):
+    payload = Payload(read_json('schema-service')).get('actions/foo')
+    entity = {
+        'id': 1,
+        'name': 'foo',
+        'active': True,
+        'contact': {'id': 2, 'email': 'a@b.c', 'location': {}},
+        }
+
+    # The action uses "foo:bar" as entity path
+    validator = ActionSchema('foo', payload).get_entity_validator()
+    assert isinstance(validator, EntityValidator)
+    validator.validate({'foo': {'bar': entity}})
+    validator.validate_collection([{'foo': {'bar': entity}}])
+
+    with pytest.raises(EntityValidationError):
+        validator.validate(entity)
+
+    # Validate without an entity path
+    del payload[FIELD_MAPPINGS['entity_path']]
+    validator = ActionSchema('foo', payload).get_entity_validator()
+    validator.validate(entity)
+    validator.validate_collection([entity, entity])
+
+    with pytest.raises(EntityValidationError) as excinfo:
+        validator.validate_collection([entity, {'id': 1}])
+
+    assert excinfo.value.action == 'foo'
+    assert excinfo.value.reason == 'item 1: field "name" is missing'
@@ -1,6 +1,12 @@
 import sys
 
+import pytest
+
+from katana.api.schema.action import ActionSchema
+from katana.api.schema.param import compile_param
 from katana.api.schema.param import ParamSchema
+from katana.api.schema.param import ParamsValidator
+from katana.api.schema.param import ParamValidationError
 from katana.api.schema.param import HttpParamSchema
 from katana.payload import Payload
 
@@ -68,3 +74,82 @@ def test_api_schema_param(read_json):
     assert not http_schema.is_accessible()
     assert http_schema.get_input() == payload.get('http/input')
     assert http_schema.get_param() == payload.get('http/param')
+
+
+def test_api_schema_param_compile():
+    # Values without constraints only check the type
+    check = compile_param(ParamSchema('foo', {}))
+    assert check('') == ['must not be empty']
+    assert check('foo') == []
+    assert check(1) == ['must be of type string']
+
+    check = compile_param(ParamSchema('foo', Payload({
+        'type': 'integer',
+        'min': 2,
+        'max': 10,
+        'exclusive_max': True,
+        'multiple_of': 2,
+        })))
+    assert check(4) == []
+    assert check(True) == ['must be of type integer']
+    assert check(1.0) == ['must be of type integer']
+    assert check(10) == ['must be less than 10']
+    assert check(1) == [
+        'must be greater than or equal to 2',
+        'must be a multiple of 2',
+        ]
+
+    check = compile_param(ParamSchema('foo', Payload({
+        'allow_empty': True,
+        'pattern': '^a+$',
+        'max_length': 3,
+        'enum': ['a', 'aa', 'aaaa'],
+        })))
+    assert check('') == ['must match pattern ^a+$', 'must be one of {}'.format(
+        ['a', 'aa', 'aaaa'],
+        )]
+    assert check('aa') == []
+    assert check('aaaa') == ['length must be at most 3']
+
+    # Invalid patterns are ignored
+    check = compile_param(ParamSchema('foo', Payload({'pattern': '('})))
+    assert check('foo') == []
+
+    check = compile_param(ParamSchema('foo', Payload({
+        'type': 'array',
+        'items': {'type': 'integer'},
+        'min_items': 2,
+        'unique_items': True,
+        })))
+    assert check([1, 2]) == []
+    assert check(['1', 1]) == ['items must be of type integer']
+    assert check([1]) == ['must have at least 2 items']
+    assert check([1, 1]) == ['items must be unique']
+    assert check([[1], [1]]) == [
+        'items must be unique',
+        'items must be of type integer',
+        ]
+
+
+def test_api_schema_params_validator(read_json):
+    action_schema = ActionSchema('foo', Payload({
+        'params': {
+            'id': {'type': 'integer', 'required': True},
+            'name': {'required': True, 'default_value': 'foo'},
+            'tags': {'type': 'array', 'max_items': 1},
+            },
+        }))
+    validator = ParamsValidator(action_schema)
+    assert validator.get_errors({'id': 1}) == []
+    validator.validate({'id': 1, 'name': 'bar', 'tags': ['a']})
+
+    # All the errors are reported together
+    with pytest.raises(ParamValidationError) as excinfo:
+        validator.validate({'name': '', 'tags': ['a', 'b']})
+
+    assert excinfo.value.action == 'foo'
+    assert excinfo.value.errors == [
+        '"id" is required',
+        '"name" must not be empty',
+        '"tags" must have at most 1 items',
+        ]
@@ -1,19 +1,25 @@
+import copy
+
 import pytest
 
 from katana.api.action import Action
 from katana.api.action import NoFileServerError
 from katana.api.action import parse_params
 from katana.api.action import ReturnTypeError
+from katana.api.action import RuntimeCallError
 from katana.api.action import UndefinedReturnValueError
 from katana.api.file import File
 from katana.api.file import file_to_payload
 from katana.api.param import Param
 from katana.api.param import TYPE_INTEGER
 from katana.api.param import TYPE_STRING
+from katana.api.schema.entity import EntityValidationError
+from katana.api.schema.param import ParamValidationError
 from katana.payload import delete_path
 from katana.payload import ErrorPayload
 from katana.payload import FIELD_MAPPINGS
 from katana.payload import get_path
+from katana.payload import path_exists
 from katana.payload import Payload
 from katana.schema import SchemaRegistry
 from katana.utils import nomap
@@ -149,6 +155,51 @@ def test_api_action_params(read_json, registry):
         action.new_param('foo', value='bar', type=TYPE_INTEGER)
 
 
+def test_api_action_validate_params(read_json, registry):
+    service_name = 'foo'
+    service_version = '1.0'
+    transport = Payload(read_json('transport.json'))
+    # Action "foo" has a "value" array parameter
+    mappings = Payload(read_json('schema-service.json'))
+    registry.update_registry({service_name: {service_version: mappings}})
+
+    def create_action(value):
+        return Action(**{
+            'action': 'foo',
+            'params': [{PARAM['name']: 'value', PARAM['value']: value}],
+            'transport': transport,
+            'component': None,
+            'path': '/path/to/file.py',
+            'name': service_name,
+            'version': service_version,
+            'framework_version': '1.0.0',
+            })
+
+    action = create_action([1, 2])
+    with pytest.raises(ParamValidationError) as excinfo:
+        action.validate_params()
+
+    assert excinfo.value.errors == ['"value" must be one of [1, 2, 3]']
+
+    # The validator is compiled once and reused by other actions
+    validator = action._Action__get_params_validator()
+    action = create_action([1, 1, 'a'])
+    assert action._Action__get_params_validator() is validator
+    with pytest.raises(ParamValidationError) as excinfo:
+        action.validate_params()
+
+    assert excinfo.value.errors == [
+        '"value" items must be unique',
+        '"value" items must be of type integer',
+        '"value" must be one of [1, 2, 3]',
+        ]
+
+    # Actions without schema skip the validation
+    registry.update_registry({})
+    action = create_action('foo')
+    assert action.validate_params() == action
+
+
 def test_api_action_files(read_json, registry):
     transport = Payload(read_json('transport.json'))
     service_name = 'users'
@@ -202,6 +253,51 @@ def test_api_action_files(read_json, registry):
     assert isinstance(file, File)
     assert file.get_name() == 'foo'
 
+    # Check bulk file creation
+    files = action.new_files([
+        ('foo', '/tmp/file.ext'),
+        ('bar', '/tmp/file.json', 'text/plain'),
+        ])
+    assert [file.get_name() for file in files] == ['foo', 'bar']
+    assert files[1].get_mime() == 'text/plain'
+
+
+def test_api_action_prefetch_files(read_json, registry, mocker):
+    transport = Payload(read_json('transport.json'))
+    action = Action(**{
+        'action': 'create',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': 'users',
+        'version': '1.0.0',
+        'framework_version': '1.0.0',
+        })
+
+    fetch = mocker.patch.object(File, 'fetch', side_effect=Exception)
+    # Files that fail to download are skipped
+    assert action.prefetch_files(in_memory=True) == action
+    fetch.assert_called_once_with(in_memory=True, directory=None)
+    assert action.get_file('avatar') is not action.get_file('avatar')
+
+    # Only remote files are prefetched
+    fetch.side_effect = None
+    assert action.prefetch_files(max_workers=2, directory='/tmp') == action
+    fetch.assert_called_with(in_memory=False, directory='/tmp')
+    assert fetch.call_count == 2
+
+    # Prefetched files are returned by the getters
+    file = action.get_file('avatar')
+    assert file.get_name() == 'avatar'
+    assert file is action.get_file('avatar')
+    assert file in action.get_files()
+    assert len(action.get_files()) == 2
+
+    # Prefetched files are not fetched again
+    action.prefetch_files()
+    assert fetch.call_count == 2
+
 
 def test_api_action_download(read_json, registry):
     service_name = 'dummy'
@@ -310,6 +406,154 @@ def test_api_action_data(read_json, registry):
         action.set_collection([1])
 
 
+def test_api_action_extend_collection(read_json, registry):
+    transport = Payload(read_json('transport.json'))
+    address = transport.get('meta/gateway')[1]
+    data_path = '|'.join([
+        'data',
+        address,
+        nomap('users'),
+        '1.0.0',
+        nomap('list'),
+        ])
+    action = Action(**{
+        'action': 'list',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': 'users',
+        'version': '1.0.0',
+        'framework_version': '1.0.0',
+        })
+
+    # Clear transport data
+    del transport[FIELD_MAPPINGS['data']]
+
+    # The collection is not added when the first entities are not valid
+    with pytest.raises(TypeError):
+        action.extend_collection([{'id': 1}, 1])
+
+    assert not transport.path_exists(data_path, delimiter='|')
+
+    # Add entities using a list, a generator and a single entity
+    assert action.extend_collection([{'id': 1}]) == action
+    assert action.extend_collection({'id': i} for i in (2, 3)) == action
+    assert action.extend_collection({'id': 4}) == action
+    collection = [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}]
+    assert transport.get(data_path, delimiter='|') == [collection]
+
+    # Entities are not added when any of them is not valid
+    with pytest.raises(TypeError):
+        action.extend_collection([{'id': 5}, 1])
+
+    with pytest.raises(TypeError):
+        action.extend_collection(1)
+
+    with pytest.raises(TypeError):
+        action.extend_collection('invalid')
+
+    assert transport.get(data_path, delimiter='|') == [collection]
+
+
+def test_api_action_entity_validation(read_json, registry):
+    service_name = 'foo'
+    service_version = '1.0'
+    transport = Payload(read_json('transport.json'))
+    data_path = '|'.join([
+        'data',
+        transport.get('meta/gateway')[1],
+        nomap(service_name),
+        service_version,
+        nomap('foo'),
+        ])
+    # Action "foo" validates entities using "foo:bar" as entity path
+    mappings = Payload(read_json('schema-service.json'))
+    registry.update_registry({service_name: {service_version: mappings}})
+    action = Action(**{
+        'action': 'foo',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+
+    # Clear transport data
+    del transport[FIELD_MAPPINGS['data']]
+
+    entity = {'foo': {'bar': {
+        'id': 1,
+        'name': 'foo',
+        'active': True,
+        'contact': {'id': 2, 'email': 'a@b.c', 'location': {}},
+        }}}
+    invalid = {'foo': {'bar': {'id': 1}}}
+
+    assert action.set_entity(entity) == action
+    assert action.set_collection([entity]) == action
+    assert action.extend_collection([entity]) == action
+    assert transport.get(data_path, delimiter='|') == [
+        entity,
+        [entity],
+        [entity],
+        ]
+
+    with pytest.raises(EntityValidationError):
+        action.set_entity(invalid)
+
+    with pytest.raises(EntityValidationError):
+        action.set_collection([entity, invalid])
+
+    # Invalid entities are not added to the collection
+    with pytest.raises(EntityValidationError):
+        action.extend_collection([entity, invalid])
+
+    assert transport.get(data_path, delimiter='|') == [
+        entity,
+        [entity],
+        [entity],
+        ]
+
+    # No collection is added when the first entities are not valid
+    action = Action(**{
+        'action': 'foo',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+    with pytest.raises(EntityValidationError):
+        action.extend_collection([invalid])
+
+    assert len(transport.get(data_path, delimiter='|')) == 3
+
+    # Validator is compiled once for the current mappings
+    key = ('entity-validator', service_name, service_version, 'foo')
+    validator = registry.get_cached(key, None)
+    assert validator is not None
+
+    # Nothing is validated when validation is disabled
+    mappings.set('actions/foo/entity/validate', False)
+    registry.update_registry({service_name: {service_version: mappings}})
+    action = Action(**{
+        'action': 'foo',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+    assert action.set_entity(invalid) == action
+
+
 def test_api_action_relate(read_json, registry):
     transport = Payload(read_json('transport.json'))
     address = transport.get('meta/gateway')[1]
@@ -385,6 +629,55 @@ def test_api_action_relate(read_json, registry):
         action.relate_many_remote(pk, remote, service_name, 1)
 
 
+def test_api_action_relate_all(read_json, registry):
+    transport = Payload(read_json('transport.json'))
+    expected = Payload(read_json('transport.json'))
+    remote = 'ktp://87.65.43.21:4321'
+    action_args = {
+        'action': 'bar',
+        'params': [],
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': 'foo',
+        'version': '1.0',
+        'framework_version': '1.0.0',
+        }
+    action = Action(transport=transport, **action_args)
+    single = Action(transport=expected, **action_args)
+
+    # Clear transport relations
+    del transport[FIELD_MAPPINGS['relations']]
+    del expected[FIELD_MAPPINGS['relations']]
+
+    # Create relations one by one to compare the results
+    single.relate_one(1, 'bar', '321')
+    single.relate_many('2', 'bar', ['1', '2'])
+    single.relate_one('1', 'baz', '4')
+    single.relate_many_remote(1, remote, 'bar', ['5'])
+
+    assert action.relate_all('bar', {1: '321', '2': ['1', '2']}) == action
+    assert action.relate_all('baz', {'1': '4'}) == action
+    assert action.relate_all_remote(remote, 'bar', {1: ['5']}) == action
+    assert transport.get('relations') == expected.get('relations')
+
+    # Relations must be a dictionary
+    with pytest.raises(TypeError):
+        action.relate_all('bar', [1])
+
+    with pytest.raises(TypeError):
+        action.relate_all_remote(remote, 'bar', [1])
+
+    # Foreign keys are checked before any relation is added
+    relations = copy.deepcopy(transport.get('relations'))
+    with pytest.raises(TypeError):
+        action.relate_all('qux', {'1': '7', '2': ('1', '2')})
+
+    with pytest.raises(TypeError):
+        action.relate_all('qux', {'1': '7', '2': {'id': '1'}})
+
+    assert transport.get('relations') == relations
+
+
 def test_api_action_links(read_json, registry):
     transport = Payload(read_json('transport.json'))
     address = transport.get('meta/gateway')[1]
@@ -474,6 +767,79 @@ def test_api_action_transactions(read_json, registry):
             assert get_path(tr, 'params', default='NO') == tr_params
 
 
+def test_api_action_transactions_many(read_json, registry):
+    transport = Payload(read_json('transport.json'))
+    service_name = 'foo'
+    service_version = '1.0'
+    params = [Param('dummy', value=123)]
+    action = Action(**{
+        'action': 'foo',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+
+    # Clear transport transactions
+    del transport[FIELD_MAPPINGS['transactions']]
+
+    tr_params = [{
+        PARAM['name']: 'dummy',
+        PARAM['value']: 123,
+        PARAM['type']: TYPE_INTEGER
+        }]
+
+    cases = {
+        'commit': action.commit_many,
+        'rollback': action.rollback_many,
+        'complete': action.complete_many,
+        }
+
+    # Check all transaction types
+    for type, register in cases.items():
+        assert register([('action-1', params), ('action-2', )]) == action
+
+        transactions = transport.get('transactions/{}'.format(type))
+        assert isinstance(transactions, list)
+        assert len(transactions) == 2
+        for tr in transactions:
+            assert get_path(tr, 'name', default='NO') == service_name
+            assert get_path(tr, 'version', default='NO') == service_version
+            assert get_path(tr, 'caller', default='NO') == 'foo'
+
+        assert get_path(transactions[0], 'action') == 'action-1'
+        assert get_path(transactions[0], 'params') == tr_params
+        assert get_path(transactions[1], 'action') == 'action-2'
+        assert not path_exists(transactions[1], 'params')
+
+    # Nothing is registered when a transaction is not valid
+    del transport[FIELD_MAPPINGS['transactions']]
+    with pytest.raises(TypeError):
+        action.commit_many([('action-1', params), ('action-2', [1])])
+
+    assert not transport.path_exists('transactions')
+
+    # Specifications must be tuples or lists of a valid size
+    del transport[FIELD_MAPPINGS['calls']]
+    with pytest.raises(TypeError):
+        action.commit_many(['ab'])
+
+    with pytest.raises(TypeError):
+        action.commit_many([('action-1', params, 'extra')])
+
+    with pytest.raises(TypeError):
+        action.defer_call_many([('foo', '1.0')])
+
+    with pytest.raises(TypeError):
+        action.remote_call_many([('ktp://1.2.3.4:1', 'foo', '1.0')])
+
+    assert not transport.path_exists('transactions')
+    assert not transport.path_exists('calls')
+
+
 def test_api_action_return_value(read_json, registry):
     service_name = 'foo'
     service_version = '1.0'
@@ -745,6 +1111,151 @@ def test_api_action_call_remote(read_json, registry):
         action.remote_call(**kwargs)
 
 
+def test_api_action_call_durations(read_json, registry, mocker):
+    service_name = 'foo'
+    service_version = '1.0'
+    registry.update_registry({
+        service_name: {
+            service_version: {
+                FIELD_MAPPINGS['address']: '1.2.3.4:77',
+                FIELD_MAPPINGS['actions']: {'test': {}},
+                },
+            },
+        })
+
+    runtime_calls = []
+    action = Action(**{
+        'action': 'test',
+        'params': [],
+        'transport': Payload(read_json('transport.json')),
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        'runtime_calls': runtime_calls,
+        })
+
+    runtime_call = mocker.patch('katana.api.action.runtime_call')
+    runtime_call.return_value = ({}, 42)
+    assert action.call('bar', '1.0', 'baz') == 42
+    assert len(runtime_calls) == 1
+    assert runtime_calls[0] >= 0
+
+    # Failed calls are also registered
+    runtime_call.side_effect = RuntimeCallError('Timeout')
+    with pytest.raises(RuntimeCallError):
+        action.call('bar', '1.0', 'baz')
+
+    assert len(runtime_calls) == 2
+
+
+def test_api_action_calls_many(read_json, registry):
+    service_name = 'foo'
+    service_version = '1.0'
+    registry.update_registry({
+        service_name: {
+            service_version: {
+                FIELD_MAPPINGS['files']: True,
+                FIELD_MAPPINGS['actions']: {'test': {}},
+                },
+            },
+        })
+
+    transport = Payload(read_json('transport.json'))
+    calls_path = 'calls/{}/{}'.format(nomap(service_name), service_version)
+    action = Action(**{
+        'action': 'test',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+
+    # Clear transport calls
+    del transport[FIELD_MAPPINGS['calls']]
+
+    params = [Param('dummy', value=123)]
+    c_params = [{
+        PARAM['name']: 'dummy',
+        PARAM['value']: 123,
+        PARAM['type']: TYPE_INTEGER
+        }]
+    files = [action.new_file('download', '/tmp/file.ext')]
+    files_path = '|'.join([
+        'files',
+        transport.get('meta/gateway')[1],
+        nomap('bar'),
+        '1.1',
+        nomap('baz'),
+        ])
+
+    # Register many deferred calls
+    calls = [
+        ('foo', '1.0', 'bar', params),
+        ('bar', '1.1', 'baz', None, files),
+        ]
+    assert action.defer_call_many(calls) == action
+    calls = transport.get(calls_path)
+    assert isinstance(calls, list)
+    assert len(calls) == 2
+    assert get_path(calls[0], 'name') == 'foo'
+    assert get_path(calls[0], 'version') == '1.0'
+    assert get_path(calls[0], 'action') == 'bar'
+    assert get_path(calls[0], 'caller') == 'test'
+    assert get_path(calls[0], 'params') == c_params
+    assert get_path(calls[1], 'name') == 'bar'
+    assert not path_exists(calls[1], 'params')
+    assert transport.get(files_path, delimiter='|') == [
+        file_to_payload(files[0]),
+        ]
+
+    # Register many remote calls
+    del transport[FIELD_MAPPINGS['calls']]
+    calls = [
+        ('87.65.43.21:4321', 'foo', '1.0', 'bar', params),
+        ('ktp://87.65.43.21:4321', 'bar', '1.1', 'baz', None, None, 2000),
+        ]
+    assert action.remote_call_many(calls) == action
+    calls = transport.get(calls_path)
+    assert len(calls) == 2
+    assert get_path(calls[0], 'gateway') == 'ktp://87.65.43.21:4321'
+    assert get_path(calls[0], 'name') == 'foo'
+    assert get_path(calls[0], 'caller') == 'test'
+    assert get_path(calls[0], 'params') == c_params
+    assert get_path(calls[0], 'timeout') == 1000
+    assert get_path(calls[1], 'gateway') == 'ktp://87.65.43.21:4321'
+    assert get_path(calls[1], 'timeout') == 2000
+
+    # Without a file server no calls are registered when local files are used
+    registry.update_registry({
+        service_name: {
+            service_version: {
+                FIELD_MAPPINGS['files']: False,
+                FIELD_MAPPINGS['actions']: {'test': {}},
+                },
+            },
+        })
+    action = Action(**{
+        'action': 'test',
+        'params': [],
+        'transport': transport,
+        'component': None,
+        'path': '/path/to/file.py',
+        'name': service_name,
+        'version': service_version,
+        'framework_version': '1.0.0',
+        })
+    del transport[FIELD_MAPPINGS['calls']]
+    with pytest.raises(NoFileServerError):
+        action.defer_call_many([('foo', '1.0', 'bar', params, files)])
+
+    assert not transport.path_exists('calls')
+
+
 def test_api_action_errors(read_json, registry):
     transport = Payload(read_json('transport.json'))
     address = transport.get('meta/gateway')[1]
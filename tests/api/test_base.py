@@ -1,8 +1,11 @@
+import logging
+
 import pytest
 
 from katana.api import base
 from katana.api.schema.service import ServiceSchema
 from katana.errors import KatanaError
+from katana.logging import RequestLogger
 from katana.schema import get_schema_registry
 from katana.schema import SchemaRegistry
 
@@ -142,3 +145,9 @@ def test_api_base_log(mocker, logs):
     out = logs.getvalue()
     # There should be no ouput at all
     assert len(out) == 0
+
+    # Values are not converted when the level is not enabled
+    to_string = mocker.patch('katana.api.base.value_to_log_string')
+    api._logger = RequestLogger('RID', 'katana.api')
+    api.log(log_message, level=logging.DEBUG)
+    to_string.assert_not_called()
@@ -1,10 +1,18 @@
+import asyncio
+import gc
+import mimetypes
 import os
 
 import pytest
 
+from katana.api.file import ConnectionPool
+from katana.api.file import CONNECTION_POOL
 from katana.api.file import File
 from katana.api.file import file_to_payload
+from katana.api.file import guess_extension_mime
+from katana.api.file import guess_mime
 from katana.api.file import payload_to_file
+from katana.api.file import request_async
 from katana.payload import FIELD_MAPPINGS
 
 
@@ -57,7 +65,7 @@ def test_api_file(data_path, mocker):
         File('foo', 'http://127.0.0.1:8080/ANBDKAD23142421')
 
     # Patch HTTP connection object and make al request "200 OK"
-    response = mocker.MagicMock(status=200, reason='OK')
+    response = mocker.MagicMock(status=200, reason='OK', will_close=True)
     connection = mocker.MagicMock()
     connection.getresponse.return_value = response
     mocker.patch('http.client.HTTPConnection', return_value=connection)
@@ -80,16 +88,23 @@ def test_api_file(data_path, mocker):
     assert not file.exists()
 
     # Check remote file read
-    request = mocker.MagicMock()
-    request.read.return_value = b'CONTENT'
-    reader = mocker.MagicMock()
-    reader.__enter__.return_value = request
-    reader.__exit__.return_value = False
-    mocker.patch('urllib.request.urlopen', return_value=reader)
+    connection.request.side_effect = None
+    response.status = 200
+    response.read.return_value = b'CONTENT'
     assert file.read() == b'CONTENT'
+    connection.request.assert_called_with(
+        'GET',
+        '/ANBDKAD23142421',
+        headers={'X-Token': 'xx'},
+        )
+
+    # Check remote file read for a missing file
+    response.status = 404
+    assert file.read() == b''
 
     # Check error during remote file read
-    request.read.side_effect = Exception
+    response.status = 200
+    response.read.side_effect = Exception
     assert file.read() == b''
 
     # A file with empty path should not exist
@@ -126,6 +141,61 @@ def test_api_file(data_path, mocker):
     assert file.get_size() == 0
 
 
+def test_api_file_guess_mime():
+    paths = (
+        '/tmp/file.json',
+        'file:///tmp/file.JPG',
+        '/tmp/file.tar.gz',
+        '/tmp/a.b.c.tar.gz',
+        '/tmp/file.tgz',
+        '/tmp/report.2024.10.18.pdf',
+        '/tmp/a.b/file',
+        '/tmp/.bashrc',
+        'http://127.0.0.1:8080/file.json?a=1',
+        '',
+        )
+    # Mime types are the same than the ones guessed for the full path
+    for path in paths:
+        expected = mimetypes.guess_type(path)[0] or 'text/plain'
+        assert guess_mime(path) == expected
+
+    # Names with many dots share the cache entry of their extension
+    guess_extension_mime.cache_clear()
+    for path in ('report.2024.10.18.pdf', 'report.2024.10.19.pdf'):
+        assert guess_mime(path) == 'application/pdf'
+
+    for path in ('a.b.c.tar.gz', 'd.e.tar.gz'):
+        assert guess_mime(path) == 'application/x-tar'
+
+    info = guess_extension_mime.cache_info()
+    assert info.currsize == 2
+    assert info.hits == 2
+
+
+def test_api_file_create_many(data_path, mocker):
+    local_file = os.path.join(data_path, 'foo.json')
+    stat = mocker.patch('os.stat', wraps=os.stat)
+    files = File.create_many([
+        ('foo', local_file),
+        ('bar', 'file://' + local_file, 'text/plain'),
+        ['baz', 'does-not-exist'],
+        ])
+    # Paths are only checked once
+    assert stat.call_count == 2
+    assert [file.get_name() for file in files] == ['foo', 'bar', 'baz']
+    assert [file.get_size() for file in files] == [54, 54, 0]
+    assert [file.get_mime() for file in files] == [
+        'application/json',
+        'text/plain',
+        'text/plain',
+        ]
+    assert files[1].get_path() == files[0].get_path()
+
+    for spec in ('foo', ('foo', ), ('foo', local_file, None, None)):
+        with pytest.raises(TypeError):
+            File.create_many([spec])
+
+
 def test_api_file_copy(data_path):
     file = File('foo', os.path.join(data_path, 'foo.json'))
 
@@ -147,3 +217,325 @@ def test_api_file_copy(data_path):
     assert clon.get_name() == file.get_name()
     assert clon.get_path() == file.get_path()
     assert clon.get_size() == file.get_size()
+
+    # Copies of remote files keep the token and the file name
+    file = File(
+        'foo',
+        'http://127.0.0.1:8080/ANBDKAD23142421',
+        token='xx',
+        filename='foo.json',
+        )
+    for clon in (file.copy_with_name('clon'), file.copy_with_mime('a/b')):
+        assert clon.get_token() == 'xx'
+        assert clon.get_filename() == 'foo.json'
+
+
+def test_api_file_stream(data_path, mocker, tmpdir):
+    local_file = os.path.join(data_path, 'foo.json')
+    with open(local_file, 'rb') as test_file:
+        content = test_file.read()
+
+    # Stream local file contents, optionally using memory maps
+    file = File('foo', local_file)
+    for use_mmap in (False, True):
+        chunks = list(file.iter_chunks(10, use_mmap=use_mmap))
+        assert len(chunks) == 6
+        assert all(len(chunk) == 10 for chunk in chunks[:-1])
+        assert b''.join(chunks) == content
+
+        with file.open(use_mmap=use_mmap) as stream:
+            assert stream.read() == content
+
+    # Empty files can be opened with memory map enabled
+    empty_file = tmpdir.join('empty.txt')
+    empty_file.write('')
+    file = File('foo', str(empty_file))
+    assert list(file.iter_chunks(use_mmap=True)) == []
+
+    # Chunk size must be positive
+    with pytest.raises(ValueError):
+        list(file.iter_chunks(0))
+
+    # Streaming a missing file fails
+    file = File('foo', 'does-not-exist')
+    with pytest.raises(OSError):
+        list(file.iter_chunks())
+
+    # Stream remote file contents
+    response = mocker.MagicMock(status=200, will_close=True)
+    response.read.side_effect = [b'CON', b'TENT', b'']
+    connection = mocker.MagicMock()
+    connection.getresponse.return_value = response
+    mocker.patch('http.client.HTTPConnection', return_value=connection)
+
+    file = File('foo', 'http://127.0.0.1:8080/ANBDKAD23142421', token='xx')
+    assert list(file.iter_chunks(3)) == [b'CON', b'TENT']
+    response.read.assert_called_with(3)
+    # Token is sent to the file server
+    connection.request.assert_called_once_with(
+        'GET',
+        '/ANBDKAD23142421',
+        headers={'X-Token': 'xx'},
+        )
+
+
+def test_api_file_connection_pool(mocker):
+    connections = []
+
+    def create_connection(host, timeout):
+        response = mocker.MagicMock(status=200, reason='OK', will_close=False)
+        response.read.return_value = b'CONTENT'
+        response.isclosed.return_value = True
+        connection = mocker.MagicMock(host=host, timeout=timeout)
+        connection.getresponse.return_value = response
+        connections.append(connection)
+        return connection
+
+    mocker.patch('http.client.HTTPConnection', side_effect=create_connection)
+    pool = ConnectionPool(size=1, timeout=5)
+    url = 'http://127.0.0.1:8080/ANBDKAD23142421?a=1'
+
+    # Connections are returned to the pool when responses are fully read
+    with pool.request('GET', url) as response:
+        response.read()
+
+    assert pool.get_stats() == {'created': 1, 'reused': 0, 'idle': 1}
+    with pool.request('GET', url) as response:
+        assert response.status == 200
+        assert response.read() == b'CONTENT'
+
+    connections[0].request.assert_called_with(
+        'GET',
+        '/ANBDKAD23142421?a=1',
+        headers={},
+        )
+    assert len(connections) == 1
+    assert connections[0].timeout == 5
+    assert pool.get_stats() == {'created': 1, 'reused': 1, 'idle': 1}
+
+    # Connections are closed when the response is not fully read
+    connections[0].getresponse.return_value.isclosed.return_value = False
+    with pool.request('GET', url):
+        pass
+
+    connections[0].close.assert_called_once_with()
+    assert pool.get_stats() == {'created': 1, 'reused': 2, 'idle': 0}
+
+    # Connections are closed when the pool is full
+    first = pool.request('GET', url)
+    second = pool.request('GET', url)
+    first.close()
+    second.close()
+    # Closing a response twice has no effect
+    second.close()
+    assert pool.get_stats() == {'created': 3, 'reused': 2, 'idle': 1}
+    connections[2].close.assert_called_once_with()
+
+    # Requests are retried when a reused connection was closed by the server
+    connections[1].request.side_effect = ConnectionResetError
+    with pool.request('GET', url) as response:
+        assert response.read() == b'CONTENT'
+
+    connections[1].close.assert_called_once_with()
+    assert pool.get_stats() == {'created': 4, 'reused': 3, 'idle': 1}
+
+    # ... but not when the connection is a new one
+    pool.clear()
+    connections[3].close.assert_called_once_with()
+    connection = mocker.patch('http.client.HTTPConnection').return_value
+    connection.request.side_effect = ConnectionRefusedError
+    with pytest.raises(ConnectionRefusedError):
+        pool.request('GET', url)
+
+    # Idle connections are closed when the pool is cleared
+    pool.configure(size=5, timeout=1)
+    pool.release('127.0.0.1:8080', connections[0])
+    pool.clear()
+    assert connections[0].close.call_count == 2
+    assert pool.get_stats()['idle'] == 0
+
+
+def test_api_file_async(data_path, mocker):
+    requests = []
+    responses = {
+        '/length': (
+            b'HTTP/1.1 200 OK\r\nContent-Length: 7\r\n\r\nCONTENT'
+            ),
+        '/chunked': (
+            b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3\r\nCON\r\n4;ext=1\r\nTENT\r\n0\r\nTrailer: 1\r\n\r\n'
+            ),
+        '/eof': b'HTTP/1.0 200 OK\r\n\r\nCONTENT',
+        '/missing': b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n',
+        '/invalid': b'INVALID\r\n\r\n',
+        '/stalled': b'HTTP/1.1 200 OK\r\nContent-Length: 7\r\n\r\nCON',
+        }
+
+    @asyncio.coroutine
+    def handle(reader, writer):
+        request = b''
+        while not request.endswith(b'\r\n\r\n'):
+            request += yield from reader.readline()
+
+        requests.append(request)
+        path = request.split(b' ')[1].decode('ascii')
+        response = responses[path]
+        if request.startswith(b'HEAD'):
+            response = response.split(b'\r\n\r\n')[0] + b'\r\n\r\n'
+
+        writer.write(response)
+        yield from writer.drain()
+        if path == '/stalled':
+            # Keep the connection open without sending the rest
+            yield from asyncio.sleep(0.5)
+
+        writer.close()
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(
+        handle,
+        '127.0.0.1',
+        0,
+        ))
+    url = 'http://127.0.0.1:{}'.format(server.sockets[0].getsockname()[1])
+
+    @asyncio.coroutine
+    def read_chunks(file, size):
+        chunks = []
+        iterator = file.iter_chunks_async(size, loop=loop)
+        while True:
+            chunk = yield from iterator.next_chunk()
+            if not chunk:
+                return chunks
+
+            chunks.append(chunk)
+
+    try:
+        # Check remote files
+        for path in ('/length', '/chunked', '/eof'):
+            file = File('foo', url + path, token='xx')
+            assert loop.run_until_complete(file.exists_async(loop=loop))
+            assert loop.run_until_complete(file.read_async(loop=loop)) == (
+                b'CONTENT'
+                )
+            chunks = loop.run_until_complete(read_chunks(file, 5))
+            assert b''.join(chunks) == b'CONTENT'
+            assert all(len(chunk) <= 5 for chunk in chunks)
+
+        # The token is sent to the file server
+        assert requests[0].startswith(b'HEAD /length HTTP/1.1\r\n')
+        assert b'\r\nX-Token: xx\r\n' in requests[0]
+        assert requests[1].startswith(b'GET /length HTTP/1.1\r\n')
+
+        # Check remote file errors
+        for path in ('/missing', '/invalid'):
+            file = File('foo', url + path, token='xx')
+            assert not loop.run_until_complete(file.exists_async(loop=loop))
+            assert loop.run_until_complete(file.read_async(loop=loop)) == b''
+            with pytest.raises(OSError):
+                loop.run_until_complete(read_chunks(file, 5))
+
+        # Reading fails when the file server stops sending data
+        timeout = CONNECTION_POOL.timeout
+        CONNECTION_POOL.configure(timeout=0.1)
+        try:
+            file = File('foo', url + '/stalled', token='xx')
+            assert loop.run_until_complete(file.read_async(loop=loop)) == b''
+            with pytest.raises(asyncio.TimeoutError):
+                loop.run_until_complete(read_chunks(file, 5))
+        finally:
+            CONNECTION_POOL.configure(timeout=timeout)
+
+        # Check local files
+        local_file = os.path.join(data_path, 'foo.json')
+        with open(local_file, 'rb') as test_file:
+            content = test_file.read()
+
+        file = File('foo', local_file)
+        assert loop.run_until_complete(file.exists_async(loop=loop))
+        assert loop.run_until_complete(file.read_async(loop=loop)) == content
+        chunks = loop.run_until_complete(read_chunks(file, 10))
+        assert len(chunks) == 6
+        assert b''.join(chunks) == content
+
+        file = File('foo', 'does-not-exist')
+        assert not loop.run_until_complete(file.exists_async(loop=loop))
+        assert loop.run_until_complete(file.read_async(loop=loop)) == b''
+        with pytest.raises(OSError):
+            loop.run_until_complete(read_chunks(file, 10))
+
+        with pytest.raises(ValueError):
+            file.iter_chunks_async(0, loop=loop)
+
+        assert not loop.run_until_complete(File('foo', '').exists_async())
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+
+def test_api_file_fetch(data_path, mocker, tmpdir):
+    response = mocker.MagicMock(status=200, reason='OK', will_close=True)
+    connection = mocker.MagicMock()
+    connection.getresponse.return_value = response
+    mocker.patch('http.client.HTTPConnection', return_value=connection)
+    url = 'http://127.0.0.1:8080/ANBDKAD23142421'
+
+    # Fetch remote file data into a temporary file
+    response.read.side_effect = [b'CON', b'TENT', b'']
+    file = File('foo', url, token='xx')
+    assert not file.is_fetched()
+    assert file.fetch(directory=str(tmpdir)) == file
+    assert file.is_fetched()
+    assert len(tmpdir.listdir()) == 1
+    assert tmpdir.listdir()[0].read_binary() == b'CONTENT'
+
+    # Fetched files don't make requests to the file server
+    assert file.fetch() == file
+    assert file.exists()
+    assert file.read() == b'CONTENT'
+    assert b''.join(file.iter_chunks(3, use_mmap=True)) == b'CONTENT'
+    assert connection.request.call_count == 1
+
+    # Temporary files are removed with the file
+    del file
+    gc.collect()
+    assert tmpdir.listdir() == []
+
+    # Fetch remote file data into memory
+    response.read.side_effect = None
+    response.read.return_value = b'CONTENT'
+    file = File('foo', url, token='xx').fetch(in_memory=True)
+    assert file.is_fetched()
+    assert file.read() == b'CONTENT'
+    with file.open() as stream:
+        assert stream.read(3) == b'CON'
+
+    assert connection.request.call_count == 2
+
+    # Temporary files are removed when the download fails
+    response.read.side_effect = Exception
+    with pytest.raises(Exception):
+        File('foo', url, token='xx').fetch(directory=str(tmpdir))
+
+    assert tmpdir.listdir() == []
+
+    # Local files are not fetched
+    file = File('foo', os.path.join(data_path, 'foo.json')).fetch()
+    assert not file.is_fetched()
+
+
+def test_api_file_async_default_port(mocker):
+    loop = asyncio.new_event_loop()
+    connect = mocker.patch.object(loop, 'create_connection')
+    connect.side_effect = ConnectionRefusedError()
+    try:
+        with pytest.raises(ConnectionRefusedError):
+            loop.run_until_complete(
+                request_async('GET', 'http://127.0.0.1/foo', loop=loop),
+                )
+    finally:
+        loop.close()
+
+    # URLs without a port use the HTTP port
+    assert connect.call_args[0][1:] == ('127.0.0.1', 80)
@@ -0,0 +1,160 @@
+import multiprocessing
+
+import pytest
+
+from katana import urn
+from katana.api.ratelimit import client_key
+from katana.api.ratelimit import header_key
+from katana.api.ratelimit import RateLimiter
+from katana.api.ratelimit import RequestRateLimiter
+from katana.api.ratelimit import service_key
+from katana.api.request import Request
+from katana.schema import SchemaRegistry
+
+
+def create_request(**kwargs):
+    values = {
+        'attributes': {},
+        'component': object(),
+        'path': '/path/to/file.py',
+        'name': 'dummy',
+        'version': '1.0',
+        'framework_version': '1.0.0',
+        'client_address': '205.81.5.62:7681',
+        'gateway_protocol': urn.HTTP,
+        'gateway_addresses': ['12.34.56.78:1234', 'http://127.0.0.1:80'],
+        'service_name': 'users',
+        'service_version': '1.0.0',
+        'http_request': {
+            'method': 'GET',
+            'url': 'http://foo.com/bar',
+            'headers': {'X-Api-Key': ['secret']},
+            },
+        }
+    values.update(kwargs)
+    return Request(**values)
+
+
+def consume_many(directory, count, results):
+    limiter = RateLimiter('test', rate=0.001, capacity=10, directory=directory)
+    results.put(sum(limiter.consume('shared')[0] for _ in range(count)))
+
+
+def test_api_rate_limiter(tmpdir, mocker):
+    directory = str(tmpdir)
+    with pytest.raises(ValueError):
+        RateLimiter('test', rate=0, directory=directory)
+
+    time = mocker.patch('katana.api.ratelimit.time.time', return_value=100.0)
+    limiter = RateLimiter('test', rate=2, capacity=3, directory=directory)
+    assert limiter.get_path() == str(tmpdir.join('katana-ratelimit-test'))
+
+    assert limiter.consume('foo') == (True, 0.0)
+    assert limiter.consume('foo', tokens=2) == (True, 0.0)
+    assert limiter.consume('foo') == (False, 0.5)
+    # Other keys have their own bucket
+    assert limiter.consume('bar') == (True, 0.0)
+
+    # Buckets are refilled over time
+    time.return_value = 100.5
+    assert limiter.consume('foo') == (True, 0.0)
+    assert limiter.consume('foo') == (False, 0.5)
+
+    # Buckets are shared with other limiters that use the same table
+    other = RateLimiter('test', rate=2, capacity=3, directory=directory)
+    assert other.consume('foo') == (False, 0.5)
+    time.return_value = 110.0
+    assert other.consume('foo', tokens=3) == (True, 0.0)
+    assert limiter.consume('foo') == (False, 0.5)
+
+    # Tables can't be shared with a different number of slots
+    with pytest.raises(ValueError):
+        RateLimiter('test', rate=2, slots=10, directory=directory)
+
+    other.close()
+    limiter.close()
+
+
+def test_api_rate_limiter_full_table(tmpdir, mocker):
+    time = mocker.patch('katana.api.ratelimit.time.time', return_value=100.0)
+    limiter = RateLimiter('test', rate=1, slots=1, directory=str(tmpdir))
+    keys = ['key-{}'.format(index) for index in range(20)]
+    results = [limiter.consume(key)[0] for key in keys]
+    # When all the slots are used the buckets are shared
+    assert results.count(True) == 8
+
+    # Full buckets are reused by other keys
+    time.return_value = 200.0
+    assert all(limiter.consume(key)[0] for key in keys[:8])
+    limiter.close()
+
+
+def test_api_rate_limiter_processes(tmpdir):
+    directory = str(tmpdir)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=consume_many,
+            args=(directory, 10, results),
+            )
+        for _ in range(4)
+        ]
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join()
+
+    assert sum(results.get() for _ in processes) == 10
+
+
+def test_api_rate_limiter_keys():
+    SchemaRegistry()
+    request = create_request()
+    assert client_key(request) == '205.81.5.62'
+    # Addresses without a port are used as they are
+    request = create_request(client_address='205.81.5.62')
+    assert client_key(request) == '205.81.5.62'
+    request = create_request()
+    assert service_key(request) == 'users/1.0.0'
+    assert header_key('x-api-key')(request) == 'secret'
+    assert header_key('X-Missing')(request) == ''
+    assert header_key('X-Api-Key')(create_request(http_request=None)) == ''
+
+
+def test_api_request_rate_limiter(tmpdir):
+    SchemaRegistry()
+    limiter = RequestRateLimiter(
+        'test',
+        rate=0.5,
+        capacity=2,
+        key=header_key('X-Api-Key'),
+        directory=str(tmpdir),
+        )
+    assert isinstance(limiter.get_limiter(), RateLimiter)
+
+    request = create_request()
+    assert limiter.check(request) is None
+    assert limiter.check(request) is None
+
+    response = limiter.check(request)
+    http_response = response.get_http_response()
+    assert http_response.get_status() == '429 Too Many Requests'
+    assert http_response.get_header('Retry-After') == '2'
+
+    # Clients without a port in the address are also limited
+    client_limiter = RequestRateLimiter(
+        'test-client',
+        rate=0.5,
+        capacity=1,
+        directory=str(tmpdir),
+        )
+    request = create_request(client_address='205.81.5.62')
+    assert client_limiter.check(request) is None
+    assert client_limiter.check(request) is not None
+
+    # Requests without a key are not limited
+    request = create_request(http_request=None)
+    assert limiter.check(request) is None
+    assert limiter.check(request) is None
+    assert limiter.check(request) is None
@@ -117,6 +117,9 @@ def test_api_request_new_response():
     assert isinstance(response.get_transport(), Transport)
     # Check that no HTTP response was created
     assert response.get_http_response() is None
+    # The request logger is shared with the response
+    assert response._logger is request._logger
+    assert response._logger.rid == 'TEST'
 
     # Create an HTTP request with request data
     values['gateway_protocol'] = urn.HTTP
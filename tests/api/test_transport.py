@@ -4,6 +4,7 @@ from katana.api.file import File
 from katana.api.param import Param
 from katana.api.transport import TransactionTypeError
 from katana.api.transport import Transport
+from katana.api.transport.data import ActionData
 from katana.payload import delete_path
 
 
@@ -250,3 +251,138 @@ def test_api_transport_errors(read_json):
     # Remove errors
     assert delete_path(payload, 'errors')
     assert transport.get_errors() == []
+
+
+def test_api_transport_iterators(read_json):
+    transport = Transport(read_json('transport.json'))
+    payload = transport._Transport__transport
+    address = 'http://127.0.0.1:80'
+
+    # Data
+    assert transport.count_data() == 2
+    assert transport.has_data(service='users')
+    assert not transport.has_data(service='missing')
+    assert not transport.has_data(address='missing')
+    assert transport.count_data(address=address, version='1.1.0') == 1
+    data = list(transport.iter_data(action='list_users'))
+    assert len(data) == 1
+    assert data[0].get_name() == 'users'
+    assert list(transport.iter_data(service='users', version='2.0')) == []
+
+    # Relations
+    assert transport.count_relations() == 3
+    assert transport.count_relations(service='posts') == 2
+    assert not transport.has_relations(address='ktp://87.65.43.21:4321')
+    relations = list(transport.iter_relations(service='users'))
+    assert len(relations) == 1
+    assert relations[0].get_primary_key() == '123'
+
+    # Links
+    assert transport.has_links()
+    assert transport.count_links(service='users') == 1
+    assert not transport.has_links(service='posts')
+    links = list(transport.iter_links(address=address))
+    assert links[0].get_uri() == 'http://api.example.com/v1/users/123'
+
+    # Calls
+    assert transport.count_calls() == 3
+    assert transport.count_calls(service='users', version='1.0.0') == 2
+    assert transport.has_calls(action='update')
+    assert not transport.has_calls(service='foo', action='update')
+    calls = list(transport.iter_calls(service='foo', action='read'))
+    assert [call.get_action() for call in calls] == ['read']
+
+    # Errors
+    assert transport.has_errors()
+    assert transport.count_errors(service='users', version='1.0.0') == 1
+    assert not transport.has_errors(version='2.0.0')
+    errors = list(transport.iter_errors(address=address))
+    assert errors[0].get_code() == 9
+
+    # Without values in the Transport
+    for name in ('data', 'relations', 'links', 'calls', 'errors'):
+        assert delete_path(payload, name)
+
+    assert not transport.has_data()
+    assert transport.count_relations() == 0
+    assert list(transport.iter_links()) == []
+    assert not transport.has_calls()
+    assert transport.count_errors() == 0
+
+
+def test_api_transport_memoize(read_json, mocker):
+    transport = Transport(read_json('transport.json'))
+    payload = transport._Transport__transport
+
+    data = transport.get_data()
+    errors = transport.get_errors()
+    iter_data = mocker.spy(transport, 'iter_data')
+    iter_errors = mocker.spy(transport, 'iter_errors')
+
+    # Results are reused but each call returns a new list
+    assert transport.get_data() == data
+    assert transport.get_data() is not data
+    assert transport.get_errors() == errors
+    iter_data.assert_not_called()
+    iter_errors.assert_not_called()
+
+    # Results are updated when the payload changes
+    assert delete_path(payload, 'errors')
+    assert transport.get_errors() == []
+    assert iter_errors.call_count == 1
+
+
+def test_api_transport_columns(read_json, mocker):
+    transport = Transport(read_json('transport.json'))
+
+    # Collections and single entities are exported
+    assert transport.get_columns('users', '1.0.0', 'list_users') == {
+        'name': ['Foo', 'Mandela'],
+        'id': [1, 2],
+        }
+    assert transport.get_columns('users', '1.0.0', 'read_users') == {
+        'name': ['Foo', 'Mandela'],
+        'id': [1, 2],
+        }
+    columns = transport.get_columns(
+        'employees',
+        '1.1.0',
+        'read_employees',
+        address='http://127.0.0.1:80',
+        fields=['id', 'missing'],
+        )
+    assert columns == {'id': [1, 2], 'missing': [None, None]}
+    assert list(columns) == ['id', 'missing']
+    assert transport.get_columns('users', '1.0.0', 'missing') == {}
+    assert transport.get_columns('users', '1.0.0', 'read_users', 'x') == {}
+
+    # Missing entity fields are None
+    action = ActionData('list', [[{'a': 1}, {'b': 2}], {'a': 3, 'c': 4}])
+    columns = action.get_columns()
+    assert columns == {
+        'a': [1, None, 3],
+        'b': [None, 2, None],
+        'c': [None, None, 4],
+        }
+    # Columns keep the order in which the fields are first found
+    assert list(columns) == ['a', 'b', 'c']
+    action = ActionData('list', [{'z': 1, 'y': 2}, {'x': 3, 'z': 4}])
+    assert list(action.get_columns()) == ['z', 'y', 'x']
+
+    # NumPy is required to get arrays
+    mocker.patch.dict('sys.modules', {'numpy': None})
+    with pytest.raises(ImportError):
+        action.get_columns(as_array=True)
+
+
+def test_api_transport_columns_array(read_json):
+    numpy = pytest.importorskip('numpy')
+    transport = Transport(read_json('transport.json'))
+    columns = transport.get_columns(
+        'users',
+        '1.0.0',
+        'list_users',
+        as_array=True,
+        )
+    assert isinstance(columns['id'], numpy.ndarray)
+    assert columns['id'].sum() == 3
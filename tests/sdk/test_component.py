@@ -1,5 +1,9 @@
+import logging
+
 import pytest
 
+from katana.metrics import get_metrics_registry
+from katana.metrics import MetricsRegistry
 from katana.schema import get_schema_registry
 from katana.sdk.component import Component
 from katana.sdk.component import ComponentError
@@ -82,3 +86,18 @@ def test_component_log(logs):
     out = logs.getvalue()
     # Output without line break should match
     assert out.rstrip().endswith(expected)
+
+
+def test_component_metrics(mocker):
+    Component.instance = None
+    MetricsRegistry.instance = None
+    component = Component()
+    assert component.get_metrics() == {}
+
+    get_metrics_registry().observe('foo', 0.001)
+    metrics = component.get_metrics()
+    assert metrics['foo']['requests'] == 1
+
+    log = mocker.patch.object(component, 'log')
+    component.dump_metrics()
+    log.assert_called_once_with(metrics, level=logging.INFO)
@@ -71,6 +71,10 @@ def test_apply_cli_options(mocker, cli):
         'socket': '@katana-127-0-0-1-5010-foo',
         'tcp': 5010,
         'log_level': 6,
+        'log_queue': False,
+        'metrics': None,
+        'profile_rate': None,
+        'slow_threshold': None,
         'debug': True,
         'action': 'foo_action',
         'timeout': 30000,
@@ -188,6 +192,10 @@ def test_component_run(mocker, cli):
         'timeout': 30000,
         'disable_compact_names': True,
         'log_level': 6,
+        'log_queue': False,
+        'metrics': None,
+        'profile_rate': None,
+        'slow_threshold': None,
         'var': {'foo': 'bar', 'hello': 'world'},
         })
     assert 'debug' in kwargs
@@ -1,6 +1,14 @@
+import base64
+import io
 import logging
+import threading
 
+from katana import json
 from katana.logging import KatanaFormatter
+from katana.logging import MAX_LOG_BYTES
+from katana.logging import QueueStreamHandler
+from katana.logging import RequestLogger
+from katana.logging import setup_katana_logging
 from katana.logging import value_to_log_string
 
 
@@ -44,6 +52,31 @@ def test_value_to_los_string():
     assert len(value_to_log_string('*' * (max_chars + 10))) == max_chars
 
 
+def test_value_to_log_string_bounded():
+    # Output for big values is the same as truncating the full output
+    value = {'items': [{'id': index} for index in range(1000)]}
+    full = json.serialize(value, prettify=True).decode('utf8')
+    for max_chars in (1, 10, 100, 1000):
+        assert value_to_log_string(value, max_chars) == full[:max_chars]
+
+    value = bytes(range(256)) * 10
+    full = base64.b64encode(value).decode('utf8')
+    for max_chars in (1, 4, 5, 100):
+        assert value_to_log_string(value, max_chars) == full[:max_chars]
+
+    # Serialization stops when the maximum number of characters is reached
+    assert value_to_log_string(['*' * 200, object()], 100) == (
+        '[\n  "' + '*' * 95
+        )
+
+    # Binary values inside objects are summarized when they are big
+    assert value_to_log_string({'a': b'value'}) == '{\n  "a": "value"\n}'
+    assert value_to_log_string([b'\xff']) == '[\n  "/w=="\n]'
+    assert value_to_log_string([b'*' * (MAX_LOG_BYTES + 1)]) == (
+        '[\n  "[binary data: 1025 bytes]"\n]'
+        )
+
+
 def test_setup_katana_logging(logs):
     # Root logger must use KatanaFormatter
     assert len(logging.root.handlers) == 1
@@ -75,3 +108,110 @@ def test_setup_katana_logging(logs):
     assert out_parts[4] == '[INFO]'  # Level
     assert out_parts[5] == '[SDK]'  # SDK prefix
     assert ' '.join(out_parts[6:]).strip() == message
+
+
+def create_record(msg, *args):
+    return logging.makeLogRecord({
+        'levelname': 'INFO',
+        'msg': msg,
+        'args': args,
+        })
+
+
+def test_queue_stream_handler():
+    output = io.StringIO()
+    handler = QueueStreamHandler(stream=output, batch_size=2)
+    handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    for index in range(5):
+        handler.handle(create_record('Message %s', index))
+
+    handler.flush()
+    assert output.getvalue() == ''.join(
+        'INFO Message {}\n'.format(index) for index in range(5)
+        )
+    assert handler.get_dropped() == 0
+
+    # Queued messages are written when the handler is closed
+    handler.handle(create_record('Last message'))
+    handler.close()
+    assert output.getvalue().endswith('INFO Last message\n')
+    # Closing more than once is allowed
+    handler.close()
+
+
+def test_queue_stream_handler_full():
+    class BlockingStream(io.StringIO):
+        def write(self, value):
+            unblock.wait()
+            return super().write(value)
+
+    unblock = threading.Event()
+    output = BlockingStream()
+    handler = QueueStreamHandler(stream=output, max_size=2)
+
+    # The writer thread blocks on the first message so the queue fills up
+    for index in range(10):
+        handler.handle(create_record('Message %s', index))
+
+    assert handler.get_dropped() >= 7
+    unblock.set()
+    handler.close()
+    assert output.getvalue().count('\n') == 10 - handler.get_dropped()
+
+
+def test_setup_katana_logging_queue(mocker):
+    output = io.StringIO()
+    mocker.patch('katana.logging.get_output_buffer', return_value=output)
+    mocker.patch.object(logging.root, 'handlers', [])
+    names = ('katana', 'katana.api')
+    for name in names:
+        mocker.patch.object(logging.getLogger(name), 'handlers', [])
+
+    setup_katana_logging(
+        'component', 'name', 'version', 'framework-version', logging.INFO,
+        use_queue=True,
+        )
+
+    # All the loggers share the same queue handler
+    handler = logging.root.handlers[0]
+    assert isinstance(handler, QueueStreamHandler)
+    assert isinstance(handler.formatter, KatanaFormatter)
+    for name in names:
+        assert logging.getLogger(name).handlers == [handler]
+
+    handler.handle(create_record('Test message'))
+    handler.close()
+    assert output.getvalue().strip().endswith('[SDK] Test message')
+
+
+def test_request_logger(mocker):
+    logger = logging.Logger('test')
+    # Check levels without global settings because tests can disable logs
+    mocker.patch.object(
+        logger,
+        'isEnabledFor',
+        side_effect=lambda level: level >= logging.INFO,
+        )
+    mocker.patch('logging.getLogger', return_value=logger)
+    handle = mocker.patch.object(logger, 'handle')
+
+    rlog = RequestLogger('RID', 'test')
+    assert rlog.logger is logger
+    rlog.info('Message %s', 1)
+    record = handle.call_args[0][0]
+    assert record.getMessage() == 'Message 1 |RID|'
+
+    rlog.log(logging.WARNING, 'Warning')
+    assert handle.call_args[0][0].getMessage() == 'Warning |RID|'
+
+    # Request ID is optional
+    RequestLogger(None, 'test').error('Error')
+    assert handle.call_args[0][0].getMessage() == 'Error'
+
+    # Messages for disabled levels are not processed
+    process = mocker.spy(rlog, 'process')
+    handle.reset_mock()
+    rlog.debug('Debug %s', 1)
+    process.assert_not_called()
+    handle.assert_not_called()
+    assert not rlog.isEnabledFor(logging.DEBUG)
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+
+from katana.metrics import ActionMetrics
+from katana.metrics import escape_label
+from katana.metrics import get_metrics_registry
+from katana.metrics import LATENCY_BUCKETS
+from katana.metrics import MetricsListener
+from katana.metrics import MetricsRegistry
+from katana.metrics import PAYLOAD_BUCKETS
+from katana.metrics import PhaseTimer
+from katana.metrics import render_metrics
+from katana.schema import SchemaRegistry
+
+
+def test_action_metrics():
+    metrics = ActionMetrics()
+    metrics.observe(0.00005)
+    metrics.observe(0.0001)
+    metrics.observe(0.0003, error=True)
+    metrics.observe(60)
+
+    data = metrics.to_dict()
+    assert data['requests'] == 4
+    assert data['errors'] == 1
+    assert data['timeouts'] == 0
+    assert data['latency']['sum'] == 0.00005 + 0.0001 + 0.0003 + 60
+
+    buckets = data['latency']['buckets']
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    # Bucket bounds are inclusive
+    assert buckets[0] == [0.0001, 2]
+    assert buckets[1] == [0.0002, 0]
+    assert buckets[2] == [0.0004, 1]
+    assert buckets[-1] == [None, 1]
+    assert sum(count for _, count in buckets) == 4
+
+
+def test_phase_timer(mocker):
+    clock = mocker.patch('katana.metrics.time.perf_counter')
+    clock.return_value = 10.0
+    timer = PhaseTimer()
+    assert timer.action is None
+    assert timer.phases == []
+
+    clock.return_value = 10.001
+    timer.mark('recv')
+    clock.return_value = 10.004
+    timer.mark('callback')
+    assert [phase for phase, _ in timer.phases] == ['recv', 'callback']
+    assert round(timer.get_total(), 6) == 0.004
+    assert timer.format() == 'recv=1.000ms callback=3.000ms'
+
+    metrics = ActionMetrics()
+    metrics.observe_phases(timer.phases)
+    metrics.observe_phases([('recv', 0.5)])
+    phases = metrics.to_dict()['phases']
+    assert round(phases['recv'], 6) == 0.501
+    assert round(phases['callback'], 6) == 0.003
+
+
+def test_metrics_registry():
+    MetricsRegistry.instance = None
+    registry = get_metrics_registry()
+    assert registry is MetricsRegistry()
+    assert registry.get_metrics() == {}
+
+    registry.observe('foo', 0.001)
+    registry.observe('foo', 0.002, True)
+    registry.timeout('foo')
+    registry.timeout('bar')
+    metrics = registry.get_metrics()
+    assert sorted(metrics) == ['bar', 'foo']
+    assert metrics['foo']['requests'] == 2
+    assert metrics['foo']['errors'] == 1
+    assert metrics['foo']['timeouts'] == 1
+    assert metrics['bar']['requests'] == 0
+    assert metrics['bar']['timeouts'] == 1
+    assert registry.get_action('foo') is registry.get_action('foo')
+
+    registry.observe_payload('request', 100)
+    registry.observe_payload('response', 2000)
+    payloads = registry.get_payload_metrics()
+    assert payloads['request']['sum'] == 100
+    assert payloads['request']['buckets'][0] == [PAYLOAD_BUCKETS[0], 1]
+    assert payloads['response']['buckets'][1] == [PAYLOAD_BUCKETS[1], 0]
+    assert payloads['response']['buckets'][2] == [PAYLOAD_BUCKETS[2], 1]
+
+    registry.reset()
+    assert registry.get_metrics() == {}
+    assert registry.get_payload_metrics()['request']['sum'] == 0
+
+
+def test_metrics_registry_threads():
+    MetricsRegistry.instance = None
+    registry = get_metrics_registry()
+
+    def observe(name):
+        for _ in range(100):
+            registry.get_action(name)
+            registry.get_metrics()
+
+    threads = [
+        threading.Thread(target=observe, args=('action-{}'.format(index), ))
+        for index in range(4)
+        ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(registry.get_metrics()) == 4
+
+
+def test_render_metrics():
+    MetricsRegistry.instance = None
+    SchemaRegistry()
+    registry = get_metrics_registry()
+    registry.observe('foo', 0.00015)
+    registry.observe('foo', 20, True)
+    registry.timeout('foo')
+    registry.observe_payload('request', 300)
+    registry.observe_phases('foo', [('recv', 0.25), ('callback', 1.5)])
+
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+    lines = render_metrics(lag=(0.5, 1.5)).splitlines()
+    assert 'katana_action_requests_total{action="foo"} 2' in lines
+    assert 'katana_action_errors_total{action="foo"} 1' in lines
+    assert 'katana_action_timeouts_total{action="foo"} 1' in lines
+
+    # Histogram buckets are cumulative
+    name = 'katana_action_latency_seconds'
+    assert name + '_bucket{action="foo",le="0.0001"} 0' in lines
+    assert name + '_bucket{action="foo",le="0.0002"} 1' in lines
+    assert name + '_bucket{action="foo",le="13.1072"} 1' in lines
+    assert name + '_bucket{action="foo",le="+Inf"} 2' in lines
+    assert name + '_count{action="foo"} 2' in lines
+
+    name = 'katana_action_phase_seconds_total'
+    assert name + '{action="foo",phase="recv"} 0.25' in lines
+    assert name + '{action="foo",phase="callback"} 1.5' in lines
+
+    name = 'katana_payload_size_bytes'
+    assert name + '_bucket{kind="request",le="1024"} 1' in lines
+    assert name + '_bucket{kind="request",le="67108864"} 1' in lines
+    assert name + '_sum{kind="request"} 300' in lines
+    assert name + '_count{kind="response"} 0' in lines
+
+    assert 'katana_event_loop_lag_seconds 0.5' in lines
+    assert 'katana_event_loop_lag_max_seconds 1.5' in lines
+    assert 'katana_schema_registry_generation 0' in lines
+    rss = [line for line in lines if line.startswith('katana_process_')]
+    assert len(rss) == 1
+    assert int(rss[0].split()[1]) > 0
+
+
+def request_metrics(loop, address):
+    @asyncio.coroutine
+    def request():
+        listener = MetricsListener(address, loop, lag_interval=0.01)
+        task = loop.create_task(listener.serve())
+        yield from asyncio.sleep(0.05)
+        if address.isdigit():
+            reader, writer = yield from asyncio.open_connection(
+                '127.0.0.1',
+                int(address),
+                )
+        else:
+            reader, writer = yield from asyncio.open_unix_connection(address)
+
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = yield from reader.read()
+        writer.close()
+        task.cancel()
+        yield from asyncio.wait([task])
+        return response, listener.get_lag()
+
+    return loop.run_until_complete(request())
+
+
+def test_metrics_listener(tmpdir):
+    MetricsRegistry.instance = None
+    get_metrics_registry().observe('foo', 0.001)
+    loop = asyncio.new_event_loop()
+    try:
+        path = str(tmpdir.join('metrics.sock'))
+        response, lag = request_metrics(loop, path)
+        headers, body = response.split(b'\r\n\r\n', 1)
+        assert headers.startswith(b'HTTP/1.0 200 OK\r\n')
+        assert b'Content-Type: text/plain; version=0.0.4' in headers
+        content_length = 'Content-Length: {}'.format(len(body))
+        assert content_length.encode('utf8') in headers
+        assert b'katana_action_requests_total{action="foo"} 1' in body
+        assert b'katana_event_loop_lag_seconds' in body
+        assert lag[0] >= 0 and lag[1] >= lag[0]
+
+        # Get a free TCP port for the listener
+        server = loop.run_until_complete(
+            loop.create_server(asyncio.Protocol, '127.0.0.1', 0),
+            )
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+
+        response, _ = request_metrics(loop, str(port))
+        assert response.startswith(b'HTTP/1.0 200 OK\r\n')
+    finally:
+        loop.close()
+
+
+def test_metrics_listener_error(tmpdir, mocker):
+    log = mocker.patch('katana.metrics.LOG')
+    loop = asyncio.new_event_loop()
+    try:
+        # Serving ends without error when the address can't be used
+        path = str(tmpdir.join('missing', 'metrics.sock'))
+        listener = MetricsListener(path, loop)
+        loop.run_until_complete(listener.serve())
+    finally:
+        loop.close()
+
+    assert log.error.called
@@ -0,0 +1,91 @@
+import os
+import signal
+import threading
+import time
+
+from katana.profiler import get_label
+from katana.profiler import IDLE
+from katana.profiler import SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_profiler_label():
+    assert get_label('foo') == 'foo'
+    assert get_label('Thread-1 (worker);x') == 'Thread-1_(worker)_x'
+    assert get_label(123) == '123'
+
+
+def test_profiler(tmpdir, mocker):
+    action = ['foo']
+    profiler = SamplingProfiler(
+        rate=1000,
+        get_action=lambda: action[0],
+        directory=str(tmpdir),
+        )
+    assert not profiler.is_running()
+    # Stopping a profiler that is not running does nothing
+    assert profiler.stop() is None
+
+    # Track the threads that write the profile file
+    writers = []
+
+    def open_file(*args, **kwargs):
+        writers.append(threading.current_thread().name)
+        return open(*args, **kwargs)
+
+    mocker.patch('katana.profiler.open', create=True, side_effect=open_file)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop, ), name='busy')
+    thread.start()
+    try:
+        profiler.toggle()
+        assert profiler.is_running()
+        time.sleep(0.1)
+        action[0] = None
+        time.sleep(0.1)
+        profiler.toggle()
+    finally:
+        stop.set()
+        thread.join()
+
+    # Toggling doesn't wait for the file, but stop waits until it is saved
+    assert not profiler.is_running()
+    path = profiler.stop()
+    assert os.path.isfile(path)
+    assert writers == ['katana-profiler']
+    samples = profiler.get_samples()
+    stacks = [
+        stack for stack in samples
+        if stack[1] == 'busy' and stack[-1].endswith('test_profiler.busy_loop')
+        ]
+    # Samples are tagged with the current action and thread name
+    assert set(stack[0] for stack in stacks) == {'foo', IDLE}
+    assert stacks[0][2] == 'threading._bootstrap'
+
+    files = tmpdir.listdir()
+    assert len(files) == 1
+    assert files[0].basename.startswith(
+        'katana-profile-{}-'.format(os.getpid()),
+        )
+    lines = files[0].read().splitlines()
+    assert len(lines) == len(samples)
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert samples[tuple(stack.split(';'))] == int(count)
+
+
+def test_profiler_register(mocker):
+    context = mocker.MagicMock()
+    profiler = SamplingProfiler()
+    profiler.register(context)
+    context.add_signal_handler.assert_called_once_with(
+        signal.SIGUSR2,
+        profiler.toggle,
+        )
+    # A cleanup callback stops the profiler when the component stops
+    assert context.register_callback.call_count == 1
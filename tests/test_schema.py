@@ -24,8 +24,17 @@ def test_schema_registry():
 
     # Initially registry has no mappings
     assert registry.has_mappings is False
+    assert registry.generation == 0
     registry.update_registry({'data': {'field': expected}})
     assert registry.has_mappings
+    assert registry.generation == 1
+
+    # Values are cached until mappings are updated
+    assert registry.get_cached('key', lambda: 1) == 1
+    assert registry.get_cached('key', lambda: 2) == 1
+    registry.update_registry({'data': {'field': expected}})
+    assert registry.generation == 2
+    assert registry.get_cached('key', lambda: 2) == 2
 
     # Check paths
     assert registry.path_exists('data/field')
@@ -408,6 +408,18 @@ def test_lookup_dict():
     with pytest.raises(TypeError):
         lookup.push('new/path/more', '')
 
+    # Extend a list in a non existing path
+    assert lookup.path_exists('many/path') is False
+    lookup.extend('many/path', [1, 2])
+    assert lookup.get('many/path') == [1, 2]
+    # .. and extend it again using a delimiter
+    lookup.extend('many|path', [3], delimiter='|')
+    assert lookup.get('many/path') == [1, 2, 3]
+
+    # Is not possible to extend an existing value that is not a list
+    with pytest.raises(TypeError):
+        lookup.extend('new/path', [2])
+
 
 def test_lookup_dict_with_mappings():
     LookupDict = utils.LookupDict
@@ -621,6 +633,22 @@ def test_singleton():
     assert same.instance == singleton
 
 
+def test_run_context_signal_handlers(mocker):
+    loop = mocker.MagicMock()
+    context = utils.RunContext(loop)
+    callback = mocker.MagicMock()
+    context.add_signal_handler(signal.SIGUSR2, callback)
+    # Handlers are added to the loop when signals are hooked
+    assert not loop.add_signal_handler.called
+
+    context.hook_signals()
+    loop.add_signal_handler.assert_has_calls([
+        mocker.call(signal.SIGTERM, context.terminate),
+        mocker.call(signal.SIGINT, context.terminate),
+        mocker.call(signal.SIGUSR2, callback),
+        ])
+
+
 def test_run_context(mocker, async_mock):
     class TestException(Exception):
         pass